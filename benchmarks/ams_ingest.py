@@ -0,0 +1,59 @@
+# benchmarks/ams_ingest.py
+# Strømmende aggregering av AMS-timesverdier: syntetiske målere for ett år (8 760 timer hver)
+# genereres blokkvis som CSV i minnet og kjøres gjennom samme vei som en opplastet fil
+# (iter_chunks -> AmsAggregator). Tiden for å lage testdataene er ikke med i målingen.
+#
+#   python benchmarks/ams_ingest.py [antall_målere] [målere_pr_blokk]   (standard 10 000, 50)
+import io
+import pathlib
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from energisjekk.ams import AmsAggregator, aggregate
+
+HOURS = pd.date_range("2024-01-01", periods=8_784, freq="h").strftime("%Y-%m-%dT%H:%M").to_numpy()
+
+
+def block_csv(first: int, count: int, rng) -> bytes:
+    # Døgn- og årsvariasjon pluss støy; ulik grunnlast og størrelse pr. måler
+    h = np.arange(len(HOURS))
+    shape = 1.0 + 0.6 * np.cos(2 * np.pi * h / len(HOURS)) + 0.4 * ((h % 24 >= 7) & (h % 24 < 17))
+    size = rng.uniform(5, 200, count)[:, None]
+    kwh = np.round(size * shape[None, :] * rng.uniform(0.8, 1.2, (count, len(HOURS))), 3)
+    df = pd.DataFrame({
+        "målepunkt": np.repeat([f"7070575000{first + i:08d}" for i in range(count)], len(HOURS)),
+        "tid": np.tile(HOURS, count),
+        "kwh": kwh.ravel(),
+    })
+    return df.to_csv(sep=";", decimal=",", index=False).encode("utf-8")
+
+
+def main(meters: int = 10_000, per_block: int = 50):
+    rng = np.random.default_rng(1)
+    agg = AmsAggregator()
+    spent = 0.0
+    for first in range(0, meters, per_block):
+        data = block_csv(first, min(per_block, meters - first), rng)
+        t = time.perf_counter()
+        aggregate(io.BytesIO(data), "ams.csv", agg=agg)
+        spent += time.perf_counter() - t
+        done = min(first + per_block, meters)
+        if done % max(meters // 10, per_block) < per_block:
+            print(f"  {done:>6} målere  {agg.rows / spent:12,.0f} rader/s".replace(",", " "), flush=True)
+
+    res = agg.result()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{meters} målere, {agg.rows:,} timesrader på {spent:.1f} s "
+          f"({agg.rows / spent:,.0f} rader/s, {spent / meters * 1e3:.1f} ms/måler)".replace(",", " "))
+    print(f"maks RSS {peak_rss:.0f} MB, {len(res)} målepunkt-år, {agg.invalid} ugyldige rader")
+    assert len(res) == meters and (res["timer"] == len(HOURS)).all()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,131 @@
+# benchmarks/api_load.py
+# Lasttest av karakter-API-et (energisjekk.api). Tjenesten startes i en egen prosess;
+# klientene er tråder med hver sin keep-alive-forbindelse. Rapporterer forespørsler pr.
+# sekund og p50/p99-svartid for enkeltbygg, og for bulk i tillegg rader pr. sekund og tid
+# til første svarlinje (viser at svaret strømmes før hele forespørselen er behandlet).
+#
+#   python benchmarks/api_load.py [--klienter 8] [--enkelt 5000] [--bulk 40] [--rader 1000]
+import argparse
+import http.client
+import json
+import pathlib
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks.portfolio_grading import synthetic
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "energisjekk.api", "--port", str(port)], cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/healthz")
+            conn.getresponse().read()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("API-et startet ikke")
+
+
+def bodies(n: int, seed: int) -> list[bytes]:
+    kategori, arsforbruk, areal, fjernvarme = synthetic(n, seed)
+    return [
+        json.dumps({"id": i, "kategori": str(k), "arsforbruk": float(e), "areal": float(a), "fjernvarme": bool(f)},
+                   ensure_ascii=False).encode("utf-8")
+        for i, (k, e, a, f) in enumerate(zip(kategori, arsforbruk, areal, fjernvarme))
+    ]
+
+
+def run(port: int, clients: int, jobs: list[bytes], path: str, headers: dict):
+    # Fordeler jobbene på klienttrådene; returnerer (veggtid, svartider, tid til første linje)
+    latencies, first = [], []
+    lock = threading.Lock()
+    it = iter(jobs)
+
+    def worker():
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        mine, mine_first = [], []
+        while True:
+            with lock:
+                body = next(it, None)
+            if body is None:
+                break
+            t = time.perf_counter()
+            conn.request("POST", path, body=body, headers=headers)
+            resp = conn.getresponse()
+            line = resp.readline()
+            mine_first.append(time.perf_counter() - t)
+            rest = resp.read()
+            mine.append(time.perf_counter() - t)
+            if resp.status != 200 or b'"feil"' in line + rest:
+                raise RuntimeError(f"{resp.status}: {(line + rest)[:200]!r}")
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            first.extend(mine_first)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    t = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return time.perf_counter() - t, np.array(latencies), np.array(first)
+
+
+def report(name: str, wall: float, lat: np.ndarray, rows: int = 0, first=None):
+    p50, p99 = np.percentile(lat, [50, 99]) * 1000
+    line = f"{name:8} {len(lat):>6} forespørsler  {len(lat) / wall:8.0f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+    if rows:
+        line += f"  {rows / wall:8.0f} rader/s  første linje p99 {np.percentile(first, 99) * 1000:6.2f} ms"
+    print(line, flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--klienter", type=int, default=8)
+    ap.add_argument("--enkelt", type=int, default=5000, help="antall enkeltforespørsler")
+    ap.add_argument("--bulk", type=int, default=40, help="antall bulk-forespørsler")
+    ap.add_argument("--rader", type=int, default=1000, help="bygg pr. bulk-forespørsel")
+    args = ap.parse_args()
+
+    port = free_port()
+    proc = start_server(port)
+    try:
+        json_headers = {"Content-Type": "application/json"}
+        single = bodies(args.enkelt, seed=1)
+        run(port, args.klienter, single[:200], "/v1/karakter", json_headers)  # oppvarming
+        wall, lat, _ = run(port, args.klienter, single, "/v1/karakter", json_headers)
+        report("enkelt", wall, lat)
+
+        rows = bodies(args.rader, seed=2)
+        bulk = [b"\n".join(rows) + b"\n"] * args.bulk
+        wall, lat, first = run(port, args.klienter, bulk, "/v1/karakter/bulk",
+                               {"Content-Type": "application/x-ndjson"})
+        report("bulk", wall, lat, rows=args.bulk * args.rader, first=first)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
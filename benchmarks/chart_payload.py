@@ -0,0 +1,44 @@
+# benchmarks/chart_payload.py
+# Sammenligner PNG (matplotlib) mot Vega-Lite (JSON) for kake- og søylediagrammet:
+# byggetid på server og størrelse på det som sendes til nettleseren.
+#
+#   python benchmarks/chart_payload.py [gjentakelser]
+import json
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from energisjekk.charts import render_bar_png, render_pie_png
+from energisjekk.vega import bar_spec, pie_spec
+
+LABELS = ["1950 og eldre","1951–1970","1971–1988","1989–1998","1999–2008","2009–2020","AKTUELT BYGG"]
+VALS = [303.1, 282.4, 240.8, 202.6, 174.0, 156.4, 166.7]
+PIE_VALUES = [155_000, 25_000, 50_000, 80_000, 155_000, 35_000]
+PIE_LABELS = [f"{n}\n{v:,.0f} kWh".replace(",", " ") for n, v in zip(
+    ["Oppvarming","Tappevann","Ventilasjon","Belysning","El.spesifikk","Kjøling"], PIE_VALUES)]
+PIE_COLORS = ["#33C831","#097E3E","#74D680","#FFC107","#2E7BB4","#00ACC1"]
+
+
+def measure(fn, n: int):
+    t = time.perf_counter()
+    for _ in range(n):
+        out = fn()
+    return (time.perf_counter() - t) / n * 1000, out
+
+
+def main(n: int = 20):
+    cases = {
+        "kake  png ": lambda: render_pie_png(PIE_VALUES, PIE_LABELS, PIE_COLORS),
+        "kake  vega": lambda: json.dumps(pie_spec(PIE_VALUES, PIE_LABELS, PIE_COLORS)).encode(),
+        "søyle png ": lambda: render_bar_png(LABELS, VALS, "#A8E6A1", "#097E3E", "#097E3E"),
+        "søyle vega": lambda: json.dumps(bar_spec(LABELS, VALS, "#A8E6A1", "#097E3E", "#097E3E")).encode(),
+    }
+    for name, fn in cases.items():
+        ms, payload = measure(fn, n)
+        print(f"{name}  {ms:8.2f} ms  {len(payload) / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
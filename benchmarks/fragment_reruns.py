@@ -0,0 +1,108 @@
+# benchmarks/fragment_reruns.py
+# Rerun-tid pr. type inputendring, kjørt hodeløst med Streamlits AppTest. Cachene er som i en
+# vanlig sesjon: et nytt årsforbruk eller areal gir nye figurer som må tegnes.
+#
+# Sideinndata (kategori, årsforbruk, areal, fjernvarme) brukes av nesten alle seksjoner og kjører
+# hele siden på nytt. Widgets inne i et fragment (tiltaksvalg, målkarakter, historikk) kjører bare
+# fragmentet: "før" er hele siden slik det var uten fragmenter, "etter" er rerun av kun det
+# fragmentet, slik Streamlit gjør når en widget i fragmentet endres. AppTest kjører alltid hele
+# skriptet, så fragment-reruns startes her ved å legge fragment-ID-en i RerunData.
+#
+#   python benchmarks/fragment_reruns.py [antall_gjentakelser]   (standard 7)
+import functools
+import os
+import pathlib
+import statistics
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("ENERGISJEKK_WARMUP", "0")
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+
+from energisjekk.core import CATEGORIES
+
+
+def fragment_id(at: AppTest, name: str) -> str:
+    # Fragmentene registreres med en wrapper rundt seksjonsfunksjonen; ID-en finnes via navnet
+    for fid, wrapper in at._fragment_storage._fragments.items():
+        for cell in wrapper.__closure__ or ():
+            if getattr(cell.cell_contents, "__name__", None) == name:
+                return fid
+    raise KeyError(name)
+
+
+def timed_run(at: AppTest, fragment: str | None = None) -> float:
+    rerun_data = local_script_runner.RerunData
+    if fragment is not None:
+        local_script_runner.RerunData = functools.partial(rerun_data, fragment_id_queue=[fragment_id(at, fragment)])
+    try:
+        t = time.perf_counter()
+        at.run()
+        ms = (time.perf_counter() - t) * 1000
+    finally:
+        local_script_runner.RerunData = rerun_data
+    if at.exception:
+        raise RuntimeError(at.exception)
+    return ms
+
+
+def page_changes():
+    # (navn, funksjon som endrer én sideinndata; i = gjentakelse)
+    return [
+        ("kategori", lambda at, i: at.selectbox(key="kategori").select(CATEGORIES[i % 4])),
+        ("årsforbruk", lambda at, i: at.number_input(key="arsforbruk").set_value(400_000 + i * 10_000)),
+        ("areal", lambda at, i: at.number_input(key="areal").set_value(2_500 + i * 100)),
+        ("fjernvarme", lambda at, i: at.checkbox(key="fjernvarme").set_value(i % 2 == 0)),
+    ]
+
+
+def fragment_changes():
+    # (navn, fragment, funksjon som endrer en widget i fragmentet)
+    def tiltak(at, i):
+        ms = at.multiselect(key="mc_tiltak_Kontorbygning")
+        ms.set_value(ms.options[: 1 + i % 3])
+
+    def maal(at, i):
+        sb = at.selectbox(key="maalkarakter")
+        sb.select(sb.options[i % len(sb.options)])
+
+    return [
+        ("tiltak (Monte Carlo)", "tiltakssimulering", tiltak),
+        ("målkarakter", "tiltakspakke", maal),
+        ("bygg-ID (historikk)", "historikk", lambda at, i: at.text_input(key="historikk_bygg").input(f"b{i}")),
+    ]
+
+
+def main(n: int = 7):
+    at = AppTest.from_file(str(ROOT / "streamlit_app.py"), default_timeout=300)
+    at.run()
+    at.selectbox(key="kategori").select("Kontorbygning")
+    at.run()
+    print(f"{'endring':24} {'hele siden':>11} {'fragment':>10}  (median av {n}, ms)")
+    for name, change in page_changes():
+        times = []
+        for i in range(n):
+            change(at, i)
+            times.append(timed_run(at))
+        print(f"{name:24} {statistics.median(times):11.1f} {'–':>10}")
+    at.selectbox(key="kategori").select("Kontorbygning")
+    at.checkbox(key="fjernvarme").set_value(False)
+    at.run()
+    for name, fragment, change in fragment_changes():
+        full, part = [], []
+        for i in range(n):
+            change(at, i)
+            full.append(timed_run(at))
+            change(at, i + 1)
+            part.append(timed_run(at, fragment))
+            at.run()  # elementtreet etter en fragment-rerun har bare fragmentets elementer
+        a, b = statistics.median(full), statistics.median(part)
+        print(f"{name:24} {a:11.1f} {b:10.1f}  (-{(1 - b / a) * 100:.0f} %)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
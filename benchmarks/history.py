@@ -0,0 +1,64 @@
+# benchmarks/history.py
+# Byggregister med historikk (energisjekk.history) i SQLite: import av N bygg x år, deretter
+# spørringene appen gjør (historikk for ett bygg, trend pr. kategori, ID-søk) og inkrementell
+# lagring av ett nytt år. Målet er under 100 ms pr. spørring ved 50 000 bygg x 10 år.
+#
+#   python benchmarks/history.py [antall_bygg] [antall_år]   (standard 50 000 og 10)
+import pathlib
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks.portfolio_grading import synthetic
+from energisjekk.core import CATEGORIES
+from energisjekk.history import building_history, category_trend, connect, find_buildings, save_year, save_years
+
+
+def timed(fn, repeat: int):
+    times = []
+    for i in range(repeat):
+        t = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - t)
+    return np.percentile(times, 50) * 1000, max(times) * 1000
+
+
+def main(n: int = 50_000, years: int = 10):
+    kategori, arsforbruk, areal, fjernvarme = synthetic(n)
+    ids = [f"B{i:07d}" for i in range(n)]
+    rng = np.random.default_rng(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(str(pathlib.Path(tmp) / "historikk.sqlite3"))
+
+        t = time.perf_counter()
+        for y in range(2015, 2015 + years):
+            trend = rng.uniform(0.9, 1.05, n)
+            save_years(conn, zip(ids, [y] * n, kategori.tolist(), (arsforbruk * trend).tolist(),
+                                 areal.tolist(), fjernvarme.tolist()))
+        elapsed = time.perf_counter() - t
+        print(f"import: {n * years} bygg-år på {elapsed:.1f} s ({n * years / elapsed:,.0f} rader/s)".replace(",", " "))
+
+        cases = {
+            "historikk ett bygg": (lambda i: building_history(conn, ids[(i * 7919) % n]), 1000),
+            "trend pr. kategori": (lambda i: category_trend(conn, CATEGORIES[i % len(CATEGORIES)]), 48),
+            "ID-søk (prefiks)": (lambda i: find_buildings(conn, f"B00{i % 100:02d}"), 500),
+            "nytt år, ett bygg": (
+                lambda i: save_year(conn, ids[i], 2015 + years, str(kategori[i]), float(arsforbruk[i]),
+                                    float(areal[i]), bool(fjernvarme[i])), 500,
+            ),
+            "samme år på nytt (uendret)": (
+                lambda i: save_year(conn, ids[i], 2015 + years, str(kategori[i]), float(arsforbruk[i]),
+                                    float(areal[i]), bool(fjernvarme[i])), 500,
+            ),
+        }
+        for name, (fn, repeat) in cases.items():
+            p50, worst = timed(fn, repeat)
+            print(f"{name:28} p50 {p50:7.3f} ms  maks {worst:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,56 @@
+# benchmarks/number_parsing.py
+# Tolking av tallkolonner (energisjekk.parsing.parse_numbers) for tre typiske eksportformater,
+# mot den tidligere regex + pd.to_numeric-varianten. Kolonnene er pyarrow-strenger, slik
+# pandas leser CSV med dtype=str.
+#
+#   python benchmarks/number_parsing.py [antall_celler]   (standard 2 000 000)
+import pathlib
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from energisjekk.parsing import parse_numbers
+
+
+def previous(col: pd.Series) -> np.ndarray:
+    col = col.astype(str).str.replace(r"\s", "", regex=True).str.replace(",", ".", regex=False)
+    return pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def columns(n: int) -> dict[str, pd.Series]:
+    v = np.random.default_rng(1).lognormal(12, 1, n)
+    # Regnearkformat: hardt mellomrom som tusenskille, desimalkomma, enhet på hver tredje,
+    # én tom og én ugyldig celle pr. hundre
+    excel = [
+        ("" if i % 100 == 0 else "ca. 12") if i % 50 == 0
+        else f"{x:,.1f}".replace(",", "\u00a0").replace(".", ",") + (" kWh" if i % 3 == 0 else "")
+        for i, x in enumerate(v)
+    ]
+    return {
+        "heltall": pd.Series(np.round(v).astype(np.int64).astype(str), dtype="str"),
+        "desimalkomma": pd.Series([f"{x:.1f}".replace(".", ",") for x in v], dtype="str"),
+        "regneark": pd.Series(excel, dtype="str"),
+    }
+
+
+def main(n: int = 2_000_000):
+    for name, col in columns(n).items():
+        t = time.perf_counter()
+        parsed = parse_numbers(col)
+        new = time.perf_counter() - t
+        t = time.perf_counter()
+        old = previous(col)
+        old_time = time.perf_counter() - t
+        print(
+            f"{name:13} {new:5.2f} s ({n / new / 1e6:4.1f} M celler/s)  tidligere {old_time:5.2f} s  "
+            f"tolket {np.isfinite(parsed.values).sum()} (tidligere {np.isfinite(old).sum()}), "
+            f"tomme {parsed.empty.sum()}, ugyldige {parsed.invalid.sum()}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,54 @@
+# benchmarks/optimizer.py
+# Minste tiltakspakke: tid for ett bygg (kald og varm frontier), billigste pakke med
+# tilfeldige kostnader, og batch over en syntetisk portefølje.
+#
+#   python benchmarks/optimizer.py [antall_bygg] [målkarakter]   (standard 100 000, C)
+import pathlib
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks.portfolio_grading import synthetic
+from energisjekk.core import CATEGORIES, recommended
+from energisjekk.optimizer import FRONTIERS, minimum_measures, minimum_measures_portfolio
+
+
+def main(n: int = 100_000, target: str = "C"):
+    FRONTIERS.clear()
+    worst = 0.0
+    for kategori in CATEGORIES:
+        for fjv in (False, True):
+            t = time.perf_counter()
+            minimum_measures(kategori, 500_000, 3_000, target, fjv)
+            worst = max(worst, time.perf_counter() - t)
+    t = time.perf_counter()
+    for _ in range(1_000):
+        minimum_measures("Kontorbygning", 500_000, 3_000, target)
+    warm = (time.perf_counter() - t) / 1_000
+    print(f"ett bygg, færrest tiltak:   kald (verste kategori) {worst * 1e3:6.1f} ms   varm {warm * 1e3:6.3f} ms")
+
+    rng = random.Random(1)
+    worst = 0.0
+    for kategori in CATEGORIES:
+        costs = {m: rng.uniform(10_000, 2_000_000) for m in recommended(kategori)}
+        t = time.perf_counter()
+        minimum_measures(kategori, 500_000, 3_000, target, costs=costs)
+        worst = max(worst, time.perf_counter() - t)
+    print(f"ett bygg, billigste pakke:  verste kategori {worst * 1e3:6.1f} ms")
+
+    kategori, arsforbruk, areal, fjernvarme = synthetic(n)
+    t = time.perf_counter()
+    res = minimum_measures_portfolio(kategori, arsforbruk, areal, target, fjernvarme)
+    batch = time.perf_counter() - t
+    reached = res["n_tiltak"] >= 0
+    print(f"portefølje: {n:>9} bygg  {batch:6.3f} s  {batch / n * 1e6:6.2f} µs/bygg  "
+          f"når {target}: {reached.mean() * 100:.1f} %  median antall tiltak "
+          f"{np.median(res['n_tiltak'][reached]):.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000, sys.argv[2] if len(sys.argv) > 2 else "C")
@@ -0,0 +1,49 @@
+# benchmarks/portfolio_grading.py
+# Kostnad pr. bygg for vektorisert karaktersetting (grade_portfolio) mot én-og-én (assess).
+#
+#   python benchmarks/portfolio_grading.py [antall_bygg]   (standard 1 000 000)
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from energisjekk.core import CATEGORIES, assess
+from energisjekk.portfolio import grade_portfolio
+
+
+def synthetic(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    kategori = np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), n)]
+    areal = rng.integers(200, 20_000, n).astype(float)
+    arsforbruk = np.round(areal * rng.uniform(40, 600, n))
+    fjernvarme = rng.random(n) < 0.3
+    return kategori, arsforbruk, areal, fjernvarme
+
+
+def main(n: int = 1_000_000):
+    kategori, arsforbruk, areal, fjernvarme = synthetic(n)
+
+    t = time.perf_counter()
+    res = grade_portfolio(kategori, arsforbruk, areal, fjernvarme)
+    vec = time.perf_counter() - t
+    print(f"vektorisert: {n:>9} bygg  {vec:6.3f} s  {vec / n * 1e9:8.1f} ns/bygg")
+
+    m = min(n, 20_000)
+    t = time.perf_counter()
+    ref = [assess(str(kategori[i]), arsforbruk[i], areal[i], bool(fjernvarme[i])) for i in range(m)]
+    loop = time.perf_counter() - t
+    print(f"assess():    {m:>9} bygg  {loop:6.3f} s  {loop / m * 1e9:8.1f} ns/bygg")
+
+    # Kontroll: samme karakterer som den skalare implementasjonen
+    mismatch = sum(
+        r.old_label != res["old_label"][i] or r.new_label != res["new_label"][i]
+        for i, r in enumerate(ref)
+    )
+    print(f"avvik mot assess(): {mismatch}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
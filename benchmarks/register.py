@@ -0,0 +1,87 @@
+# benchmarks/register.py
+# Energimerkeregisteret: bygging av det minnekartlagte lageret fra en syntetisk dump, og
+# oppslag slik appen gjør dem (åpning, persentil, karakterfordeling, adresse/matrikkel).
+# Oppslagene måles i en fersk prosess. Minnet rapporteres som anonymt (heap) og filbasert RSS:
+# sidene fra lageret er delt sidecache som kjernen kan kaste, ikke en kopi av registeret.
+#
+#   python benchmarks/register.py [antall_attester]   (standard 2 000 000)
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from energisjekk.register import CATEGORY_ALIASES, build
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+STREETS = np.array([f"{n}{s}" for n in ("Stor", "Kirke", "Skole", "Park", "Sjø", "Berg", "Eik", "Lille")
+                    for s in ("gata", "veien", "bakken", "lia", "stien")])
+
+LOOKUPS = """
+import sys, time
+t = time.perf_counter()
+from energisjekk.register import open_register
+r = open_register(sys.argv[1])
+opened = time.perf_counter() - t
+rng = __import__("numpy").random.default_rng(3)
+t = time.perf_counter()
+for sp in rng.uniform(50, 400, 1000):
+    r.percentile("Kontorbygning", sp)
+pct = (time.perf_counter() - t) / 1000
+t = time.perf_counter()
+for _ in range(100):
+    r.new_grade_counts("Kontorbygning"); r.quantiles("Kontorbygning")
+dist = (time.perf_counter() - t) / 100
+t = time.perf_counter()
+hits = sum(len(r.lookup(f"Storgata {i}")) + len(r.lookup(f"0301-{i}/1")) for i in range(1, 101))
+look = (time.perf_counter() - t) / 200
+status = dict(l.split(":", 1) for l in open("/proc/self/status") if l.startswith("Rss"))
+mb = lambda k: int(status[k].split()[0]) / 1024
+print(f"import + åpning {opened * 1000:.1f} ms  persentil {pct * 1e6:.1f} µs  fordeling {dist * 1e6:.1f} µs  "
+      f"oppslag {look * 1e6:.1f} µs ({hits} treff)  RSS heap {mb('RssAnon'):.0f} MB, filer {mb('RssFile'):.0f} MB")
+"""
+
+
+def write_dump(path: pathlib.Path, n: int, block: int = 250_000):
+    rng = np.random.default_rng(1)
+    names = np.array(list(CATEGORY_ALIASES) + ["Småhus", "Boligblokker"])
+    for first in range(0, n, block):
+        m = min(block, n - first)
+        pd.DataFrame({
+            "Gatenavn": STREETS[rng.integers(0, len(STREETS), m)],
+            "Husnummer": rng.integers(1, 200, m),
+            "Postnummer": rng.integers(1, 9999, m),
+            "Kommunenummer": 301,
+            "Gårdsnummer": rng.integers(1, 500, m),
+            "Bruksnummer": rng.integers(1, 50, m),
+            "Bygningskategori": names[rng.integers(0, len(names), m)],
+            "Energikarakter": np.array(list("ABCDEFG"))[rng.integers(0, 7, m)],
+            "BeregnetLevertEnergiTotaltkWhm2": np.round(rng.lognormal(5.2, 0.4, m), 1),
+        }).to_csv(path, sep=";", decimal=",", index=False, header=first == 0, mode="a")
+
+
+def main(n: int = 2_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = pathlib.Path(tmp) / "energimerker.csv"
+        write_dump(dump, n)
+        store = pathlib.Path(tmp) / "lager"
+        t = time.perf_counter()
+        with open(dump, "rb") as f:
+            meta = build(f, str(dump), str(store), chunksize=200_000)
+        elapsed = time.perf_counter() - t
+        size = sum(p.stat().st_size for p in store.iterdir()) / 1e6
+        print(f"bygging: {n} rader ({meta['rows']} lagret) på {elapsed:.1f} s "
+              f"({n / elapsed:,.0f} rader/s), dump {dump.stat().st_size / 1e6:.0f} MB, lager {size:.0f} MB"
+              .replace(",", " "))
+        out = subprocess.run([sys.executable, "-c", LOOKUPS, str(store)], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        print(out.strip())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
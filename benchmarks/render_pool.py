@@ -0,0 +1,54 @@
+# benchmarks/render_pool.py
+# Sammenligner p50/p99 rerun-latens for rendering direkte i tråden vs. i prosesspool,
+# med 1, 10 og 50 samtidige (simulerte) sesjoner. Cachen omgås – hver rerun rendrer begge figurer.
+#
+#   python benchmarks/render_pool.py [reruns_per_sesjon] [workers]
+import pathlib
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from energisjekk import charts
+
+LABELS = ["1950 og eldre","1951–1970","1971–1988","1989–1998","1999–2008","2009–2020","AKTUELT BYGG"]
+REF = [303.1, 282.4, 240.8, 202.6, 174.0, 156.4]
+COLORS = ["#33C831","#097E3E","#74D680","#FFC107","#2E7BB4","#00ACC1"]
+SHARES = [31, 5, 10, 16, 31, 7]
+
+
+def rerun(i: int) -> float:
+    arsforbruk = 100_000 + i * 37
+    values = [arsforbruk * s / 100 for s in SHARES]
+    t = time.perf_counter()
+    charts.render(charts.render_pie_png, values, [f"del {j}" for j in range(len(values))], COLORS)
+    charts.render(charts.render_bar_png, LABELS, REF + [arsforbruk / 3_000], "#A8E6A1", "#097E3E", "#097E3E")
+    return time.perf_counter() - t
+
+
+def run(sessions: int, reruns: int) -> list[float]:
+    with ThreadPoolExecutor(max_workers=sessions) as ex:
+        return list(ex.map(rerun, range(sessions * reruns)))
+
+
+def pct(xs: list[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))] * 1000
+
+
+def main(reruns: int = 5, workers: int = 4):
+    for mode, n_workers in (("inline", 0), (f"pool({workers})", workers)):
+        charts._reset_pool()
+        charts.RENDER_WORKERS = n_workers
+        charts._get_pool()  # varm pool før måling
+        for sessions in (1, 10, 50):
+            lat = run(sessions, reruns)
+            print(f"{mode:>10}  {sessions:>3} sesjoner  p50 {pct(lat, 0.50):8.1f} ms  "
+                  f"p99 {pct(lat, 0.99):8.1f} ms  snitt {statistics.mean(lat)*1000:8.1f} ms", flush=True)
+    charts._reset_pool()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,162 @@
+# benchmarks/rerun_bench.py
+# Rerun-latens for hele appen, kjørt hodeløst med Streamlits AppTest.
+# Sveiper alle 12 kategorier, et utvalg årsforbruk/areal og fjernvarme av/på, og
+# registrerer veggtid, allokeringer og toppminne pr. rerun. Fasene (beregning, HTML,
+# kake, søyle) måles ved å kjøre de samme funksjonene som appen bruker utenfor AppTest;
+# HTML/Streamlit er resten av rerun-tiden.
+#
+#   python benchmarks/rerun_bench.py [--quick] [--cold] [--out fil.json]
+#   python benchmarks/rerun_bench.py --compare gammel.json ny.json
+import argparse
+import itertools
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("ENERGISJEKK_WARMUP", "0")
+
+from energisjekk import charts, results
+from energisjekk.core import CATEGORIES, assess, tek17_comparison
+
+ARSFORBRUK = (100_000, 500_000, 2_000_000)
+AREAL = (1_000, 5_000)
+
+
+def cases(quick: bool):
+    cats = CATEGORIES[:3] if quick else CATEGORIES
+    ars = ARSFORBRUK[1:2] if quick else ARSFORBRUK
+    return list(itertools.product(cats, ars, AREAL, (False, True)))
+
+
+def phases(kategori, arsforbruk, areal, fjernvarme) -> dict:
+    t = time.perf_counter()
+    assess(kategori, arsforbruk, areal, fjernvarme)
+    tek17_comparison(arsforbruk / areal, kategori)
+    t_compute = time.perf_counter() - t
+
+    t = time.perf_counter()
+    charts.render_pie_png(*charts.pie_data(kategori, arsforbruk))
+    t_pie = time.perf_counter() - t
+
+    t = time.perf_counter()
+    charts.render_bar_png(*charts.bar_data(kategori, arsforbruk / areal),
+                          charts.BAR_LIGHT, charts.BAR_DARK, charts.PRIMARY)
+    t_bar = time.perf_counter() - t
+    return {"compute_ms": t_compute * 1000, "pie_ms": t_pie * 1000, "bar_ms": t_bar * 1000}
+
+
+def clear_caches():
+    # Kald rerun: ingen ferdige resultater (energisjekk.results) eller figurer i noen cache
+    results.RESULTS.clear()
+    for cache in (charts.PIE_CACHE, charts.BAR_CACHE, charts.WHATIF_CACHE):
+        cache.clear()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run(quick: bool, cold: bool) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "streamlit_app.py"), default_timeout=300)
+    at.run()
+
+    rows = []
+    for kategori, arsforbruk, areal, fjernvarme in cases(quick):
+        at.selectbox[0].select(kategori)
+        at.number_input[0].set_value(arsforbruk)
+        at.number_input[1].set_value(areal)
+        at.checkbox(key="fjernvarme").set_value(fjernvarme)
+        if cold:
+            clear_caches()
+        else:
+            # Varm cache: figurene for denne inputen ligger klare før målingen
+            charts.pie_png(kategori, arsforbruk)
+            charts.bar_png(kategori, arsforbruk / areal)
+        t = time.perf_counter()
+        at.run()
+        wall = time.perf_counter() - t
+        if at.exception:
+            raise RuntimeError(at.exception)
+
+        # Minne måles i en egen, identisk rerun – tracemalloc gjør selve kjøringen flere ganger tregere
+        if cold:
+            clear_caches()
+        tracemalloc.start()
+        at.run()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        row = {
+            "kategori": kategori, "arsforbruk": arsforbruk, "areal": areal, "fjernvarme": fjernvarme,
+            "wall_ms": wall * 1000, "alloc_kb": current / 1024, "peak_kb": peak / 1024,
+        }
+        row.update(phases(kategori, arsforbruk, areal, fjernvarme))
+        # Med varm cache rendres ingen figurer i selve rerunen
+        render = row["pie_ms"] + row["bar_ms"] if cold else 0.0
+        row["html_ms"] = max(0.0, row["wall_ms"] - row["compute_ms"] - render)
+        rows.append(row)
+        print(f"{kategori[:28]:28} {arsforbruk:>9} {areal:>6} fv={int(fjernvarme)}  "
+              f"{row['wall_ms']:8.1f} ms  topp {row['peak_kb']:8.0f} KiB", flush=True)
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cold": cold,
+        "summary": summarize(rows),
+        "runs": rows,
+    }
+
+
+def summarize(rows) -> dict:
+    keys = ("wall_ms", "compute_ms", "html_ms", "pie_ms", "bar_ms", "alloc_kb", "peak_kb")
+    out = {}
+    for k in keys:
+        xs = sorted(r[k] for r in rows)
+        out[k] = {"median": statistics.median(xs), "p95": xs[min(len(xs) - 1, int(0.95 * len(xs)))]}
+    return out
+
+
+def compare(old_path: str, new_path: str):
+    old = json.loads(pathlib.Path(old_path).read_text())["summary"]
+    new = json.loads(pathlib.Path(new_path).read_text())["summary"]
+    for k in new:
+        a, b = old[k]["median"], new[k]["median"]
+        change = (b - a) / a * 100 if a else 0.0
+        print(f"{k:12} {a:10.2f} -> {b:10.2f}  ({change:+6.1f} %)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--quick", action="store_true", help="kun 3 kategorier og ett årsforbruk")
+    ap.add_argument("--cold", action="store_true", help="tøm resultat- og figurcachene før hver rerun")
+    ap.add_argument("--out", default="rerun_bench.json")
+    ap.add_argument("--compare", nargs=2, metavar=("GAMMEL", "NY"))
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    result = run(args.quick, args.cold)
+    pathlib.Path(args.out).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+    for k, v in result["summary"].items():
+        print(f"{k:12} median {v['median']:10.2f}  p95 {v['p95']:10.2f}")
+    print(f"Skrev {args.out}")
+
+
+if __name__ == "__main__":
+    main()
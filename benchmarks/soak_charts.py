@@ -0,0 +1,60 @@
+# benchmarks/soak_charts.py
+# Soak-test for figurrenderingen: rendrer kake- og søylediagram N ganger uten cache og skriver
+# ut RSS underveis. Hver rerun kjører i en ny tråd, slik Streamlit starter en ny ScriptRunner-
+# tråd pr. rerun. RSS skal flate ut etter oppvarming; vokser den mer enn grensen, feiler testen.
+#
+#   python benchmarks/soak_charts.py [antall] [maks_vekst_MB]   (standard 10 000 og 20)
+import pathlib
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from energisjekk.charts import render_bar_png, render_pie_png
+
+LABELS = ["1950 og eldre", "1951–1970", "1971–1988", "1989–1998", "1999–2008", "2009–2020", "AKTUELT BYGG"]
+REF = [303.1, 282.4, 240.8, 202.6, 174.0, 156.4]
+COLORS = ["#33C831", "#097E3E", "#74D680", "#FFC107", "#2E7BB4", "#00ACC1"]
+SHARES = [31, 5, 10, 16, 31, 7]
+WARMUP = 100
+
+
+def rss_mb() -> float:
+    # Gjeldende RSS fra /proc (Linux)
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * 4096 / 1e6
+
+
+def rerun(i: int):
+    arsforbruk = 100_000 + i * 37
+    values = [arsforbruk * s / 100 for s in SHARES]
+    render_pie_png(values, [f"del {j}" for j in range(len(values))], COLORS)
+    render_bar_png(LABELS, REF + [arsforbruk / 3_000], "#A8E6A1", "#097E3E", "#097E3E")
+
+
+def main(n: int = 10_000, max_growth: float = 20.0) -> int:
+    t0 = time.perf_counter()
+    step = max(n // 10, 1)
+    baseline = None
+    for i in range(1, n + 1):
+        t = threading.Thread(target=rerun, args=(i,))
+        t.start()
+        t.join()
+        if i == min(WARMUP, n):
+            baseline = rss_mb()
+        if i % step == 0:
+            print(f"{i:>6} reruns  RSS {rss_mb():7.1f} MB  ({(time.perf_counter()-t0)/i*1000:.1f} ms/rerun)", flush=True)
+
+    growth = rss_mb() - baseline
+    print(f"RSS-vekst etter oppvarming ({WARMUP} reruns): {growth:.1f} MB (grense {max_growth:.0f} MB)")
+    if growth > max_growth:
+        print("FEIL: minnebruken vokser med antall reruns", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+                  float(sys.argv[2]) if len(sys.argv) > 2 else 20.0))
@@ -0,0 +1,70 @@
+# benchmarks/startup.py
+# Kaldstart: importtid for beregningskjernen og figurmodulen, tid til første rendering,
+# og første/andre AppTest-kjøring av hele appen. Hvert tall måles i en fersk prosess.
+#
+#   python benchmarks/startup.py
+import json
+import pathlib
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+CASES = {
+    "import energisjekk.core": """
+import time; t = time.perf_counter()
+import energisjekk.core
+print(time.perf_counter() - t)
+""",
+    "import energisjekk.charts (uten matplotlib)": """
+import sys, time; t = time.perf_counter()
+import energisjekk.charts
+assert "matplotlib" not in sys.modules
+print(time.perf_counter() - t)
+""",
+    "første rendering (kake + søyle)": """
+import time; t = time.perf_counter()
+from energisjekk.charts import bar_png, pie_png
+pie_png("Kontorbygning", 500_000); bar_png("Kontorbygning", 500_000 / 3_000)
+print(time.perf_counter() - t)
+""",
+    "warm_up() alle kategorier": """
+import time; t = time.perf_counter()
+from energisjekk.warmup import warm_up
+warm_up()
+print(time.perf_counter() - t)
+""",
+    "AppTest første kjøring": """
+import os, time
+os.environ["ENERGISJEKK_WARMUP"] = "0"
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("streamlit_app.py", default_timeout=300)
+t = time.perf_counter(); at.run()
+print(time.perf_counter() - t)
+""",
+    "AppTest andre kjøring": """
+import os, time
+os.environ["ENERGISJEKK_WARMUP"] = "0"
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("streamlit_app.py", default_timeout=300)
+at.run()
+t = time.perf_counter(); at.run()
+print(time.perf_counter() - t)
+""",
+}
+
+
+def main():
+    results = {}
+    for name, code in CASES.items():
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        results[name] = round(float(out) * 1000, 1)
+        print(f"{name:45} {results[name]:9.1f} ms", flush=True)
+    if "--json" in sys.argv:
+        print(json.dumps(results, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
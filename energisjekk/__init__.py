@@ -0,0 +1 @@
+# energisjekk – hjelpemoduler for Energisjekk-appen
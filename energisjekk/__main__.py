@@ -0,0 +1,6 @@
+# python -m energisjekk
+import sys
+
+from energisjekk.cli import main
+
+sys.exit(main())
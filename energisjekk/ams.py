@@ -0,0 +1,178 @@
+# energisjekk/ams.py
+# Timesverdier fra AMS-målere (én rad pr. målepunkt og time) aggregeres i biter til
+# årsforbruk, månedsprofil, maks effekt og grunnlast pr. målepunkt og år. Minnebruken
+# styres av chunksize og antall målepunkt-år, ikke av antall timesrader.
+#
+# Grunnlast = gjennomsnittlig last kl. 01–06 (nattlast). Det krever bare sum og antall
+# pr. målepunkt, i motsetning til en persentil som må se alle timene.
+import numpy as np
+import pandas as pd
+
+from energisjekk.importer import CHUNKSIZE, COLUMN_ALIASES, grade_chunk, iter_chunks, to_number
+
+MONTHS = ("jan", "feb", "mar", "apr", "mai", "jun", "jul", "aug", "sep", "okt", "nov", "des")
+NIGHT_HOURS = (1, 6)  # [fra, til) – timene 01:00–05:59
+
+AMS_ALIASES = {
+    "målepunkt": "malepunkt", "malepunkt": "malepunkt", "maalepunkt": "malepunkt",
+    "målepunktid": "malepunkt", "malepunkt_id": "malepunkt", "meteringpointid": "malepunkt",
+    "måler": "malepunkt", "maler": "malepunkt", "id": "malepunkt",
+    "tid": "tid", "tidspunkt": "tid", "fra": "tid", "fradato": "tid", "starttid": "tid",
+    "timestamp": "tid", "time": "tid",
+    "kwh": "kwh", "forbruk": "kwh", "forbruk(kwh)": "kwh", "volum": "kwh", "energi": "kwh", "verdi": "kwh",
+}
+AMS_REQUIRED = ("malepunkt", "tid", "kwh")
+
+_OFFSET = r"(Z|[+-]\d{2}:?\d{2})$"  # tidssone fjernes: vi bruker lokal klokketime slik den står i filen
+
+
+def _rename(df: pd.DataFrame, aliases: dict, required: tuple) -> pd.DataFrame:
+    rename = {}
+    for col in df.columns:
+        key = str(col).strip().lower().replace(" ", "")
+        if key in aliases:
+            rename[col] = aliases[key]
+    df = df.rename(columns=rename)
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Mangler kolonne(r): {', '.join(missing)}")
+    return df
+
+
+def _parse_times(values: pd.Series) -> pd.Series:
+    # Kjente formater først (raske og entydige); bare det som gjenstår tolkes fritt med dag først
+    values = values.astype(str).str.strip().str.replace(_OFFSET, "", regex=True)
+    ts = pd.to_datetime(values, format="ISO8601", errors="coerce")
+    for fmt in ("%d.%m.%Y %H:%M", "%d.%m.%Y %H:%M:%S", None):
+        missing = ts.isna()
+        if not missing.any():
+            break
+        ts[missing] = pd.to_datetime(
+            values[missing], errors="coerce", **({"format": fmt} if fmt else {"format": "mixed", "dayfirst": True})
+        )
+    return ts
+
+
+def time_parts(col: pd.Series):
+    # (år, måned, time) som float-vektorer (NaN = ugyldig). Samme tidspunkt går igjen for
+    # hver måler, så bare de unike verdiene tolkes (8 784 i et år) og fordeles med koder.
+    codes, unique = pd.factorize(col)
+    ts = _parse_times(pd.Series(unique, dtype=object))
+    parts = []
+    for values in (ts.dt.year, ts.dt.month, ts.dt.hour):
+        lookup = np.append(values.to_numpy(dtype=np.float64, na_value=np.nan), np.nan)
+        parts.append(lookup[codes])  # kode -1 (tom celle) peker på NaN til slutt
+    return tuple(parts)
+
+
+class AmsAggregator:
+    """Løpende summer pr. (målepunkt, år); add() tar én bit timesverdier om gangen."""
+
+    def __init__(self, capacity: int = 1024):
+        self._index: dict[tuple[str, int], int] = {}
+        self._energy = np.zeros((capacity, 12))
+        self._peak = np.full(capacity, -np.inf)
+        self._night = np.zeros(capacity)
+        self._night_hours = np.zeros(capacity, dtype=np.int64)
+        self._hours = np.zeros(capacity, dtype=np.int64)
+        self.rows = 0
+        self.invalid = 0
+
+    def _grow(self, needed: int):
+        cap = len(self._peak)
+        if needed <= cap:
+            return
+        new = max(needed, cap * 2)
+        self._energy = np.vstack([self._energy, np.zeros((new - cap, 12))])
+        self._peak = np.concatenate([self._peak, np.full(new - cap, -np.inf)])
+        self._night = np.concatenate([self._night, np.zeros(new - cap)])
+        self._night_hours = np.concatenate([self._night_hours, np.zeros(new - cap, dtype=np.int64)])
+        self._hours = np.concatenate([self._hours, np.zeros(new - cap, dtype=np.int64)])
+
+    def add(self, df: pd.DataFrame):
+        df = _rename(df, AMS_ALIASES, AMS_REQUIRED)
+        # Samme tolkning som porteføljeimporten, også for Excel-kolonner med både tall og tekst
+        kwh = to_number(df["kwh"])
+        year, month, hour = time_parts(df["tid"])
+        # Målepunkt-ID-ene ryddes bare for de unike verdiene i biten
+        raw_code, raw_names = pd.factorize(df["malepunkt"], use_na_sentinel=False)
+        name_code, meter_names = pd.factorize(pd.Index(raw_names).astype(str).str.strip())
+        meter_code = name_code[raw_code]
+        ok = (
+            np.isfinite(kwh) & np.isfinite(year) & (month >= 1) & (month <= 12) & (hour >= 0) & (hour <= 23)
+            & (np.asarray(meter_names)[meter_code] != "")
+        )
+        self.rows += len(df)
+        self.invalid += int((~ok).sum())
+        if not ok.any():
+            return
+
+        kwh, year, month, hour = kwh[ok], year[ok].astype(np.int64), month[ok].astype(np.intp) - 1, hour[ok]
+        meter_code = meter_code[ok]
+
+        # Lokale koder for (målepunkt, år) i biten; kun de unike parene slås opp i indeksen
+        pair_code, pairs = pd.factorize(meter_code.astype(np.int64) * 10_000 + year)
+        n = len(pairs)
+        rows = np.empty(n, dtype=np.intp)
+        for i, p in enumerate(pairs.tolist()):
+            key = (meter_names[p // 10_000], p % 10_000)
+            row = self._index.get(key)
+            if row is None:
+                row = self._index[key] = len(self._index)
+            rows[i] = row
+        self._grow(len(self._index))
+
+        energy = np.bincount(pair_code * 12 + month, weights=kwh, minlength=n * 12).reshape(n, 12)
+        self._energy[rows] += energy
+        peak = np.full(n, -np.inf)
+        np.maximum.at(peak, pair_code, kwh)
+        self._peak[rows] = np.maximum(self._peak[rows], peak)
+        night = (hour >= NIGHT_HOURS[0]) & (hour < NIGHT_HOURS[1])
+        self._night[rows] += np.bincount(pair_code[night], weights=kwh[night], minlength=n)
+        self._night_hours[rows] += np.bincount(pair_code[night], minlength=n)
+        self._hours[rows] += np.bincount(pair_code, minlength=n)
+
+    def result(self) -> pd.DataFrame:
+        n = len(self._index)
+        keys = list(self._index)
+        energy = self._energy[:n]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            grunnlast = self._night[:n] / self._night_hours[:n]
+        out = pd.DataFrame({
+            "malepunkt": [k[0] for k in keys],
+            "ar": np.array([k[1] for k in keys], dtype=np.int64),
+            "arsforbruk": energy.sum(axis=1),
+            "timer": self._hours[:n],
+            # Timesverdier: kWh i timen med høyest forbruk = gjennomsnittlig kW i den timen
+            "maks_effekt_kw": self._peak[:n],
+            "grunnlast_kw": grunnlast,
+        })
+        for i, m in enumerate(MONTHS):
+            out[f"kwh_{m}"] = energy[:, i]
+        return out.sort_values(["malepunkt", "ar"], ignore_index=True)
+
+
+def aggregate(file, filename: str, chunksize: int = CHUNKSIZE * 4, progress=None,
+              agg: AmsAggregator | None = None) -> AmsAggregator:
+    # Leser en timesfil (CSV/Excel/Parquet) bit for bit. progress(rader) kalles etter hver bit.
+    agg = AmsAggregator() if agg is None else agg
+    for chunk in iter_chunks(file, filename, chunksize):
+        agg.add(chunk)
+        if progress is not None:
+            progress(agg.rows)
+    return agg
+
+
+def read_buildings(file, filename: str) -> pd.DataFrame:
+    # Byggregister: målepunkt, kategori, areal og (valgfritt) fjernvarme
+    df = pd.concat(list(iter_chunks(file, filename)), ignore_index=True)
+    return _rename(df, {**COLUMN_ALIASES, **AMS_ALIASES}, ("malepunkt", "kategori", "areal"))
+
+
+def grade_meters(meters: pd.DataFrame, buildings: pd.DataFrame) -> pd.DataFrame:
+    # Målt årsforbruk pr. målepunkt-år karaktersettes med samme regler som porteføljeimporten
+    buildings = buildings.assign(malepunkt=buildings["malepunkt"].astype(str).str.strip())
+    merged = meters.merge(
+        buildings.drop(columns=["arsforbruk"], errors="ignore"), on="malepunkt", how="inner"
+    )
+    return grade_chunk(merged)
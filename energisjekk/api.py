@@ -0,0 +1,303 @@
+# energisjekk/api.py
+# Lokal HTTP-tjeneste for karaktersetting, uavhengig av Streamlit-appen:
+#
+#   energisjekk-api --port 8765          (eller python -m energisjekk.api)
+#
+#   GET  /v1/karakter?kategori=Kontorbygning&arsforbruk=500000&areal=3000&fjernvarme=ja
+#   POST /v1/karakter          {"kategori": ..., "arsforbruk": ..., "areal": ..., "fjernvarme": false}
+#   POST /v1/karakter/bulk     NDJSON inn, NDJSON ut (én linje pr. bygg, strømmes tilbake)
+#   GET  /metrics, /healthz
+#
+# Samme regler som appen (energisjekk.core.assess). Bulk-endepunktet leser forespørselen
+# bit for bit og skriver svarene som HTTP/1.1 chunked, så minnebruken er uavhengig av antall
+# linjer. En ugyldig linje gir {"linje": n, "feil": ...} og stopper ikke resten.
+# Kun standardbiblioteket.
+import argparse
+import json
+import math
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from energisjekk.core import assess
+from energisjekk.metrics import CONTENT_TYPE, REGISTRY, start_exporters
+from energisjekk.parsing import parse_number
+
+DEFAULT_PORT = 8765
+MAX_BODY = 1024 * 1024       # enkeltforespørsel
+MAX_LINE = 64 * 1024         # én NDJSON-linje
+READ_SIZE = 64 * 1024        # svarene sendes hver gang vi må vente på mer input ...
+FLUSH_LINES = 256            # ... og ellers for hver FLUSH_LINES linje
+TRUTHY = {"1", "ja", "j", "x", "true", "sann", "yes", "y"}  # som i importer
+
+API_REQUESTS = REGISTRY.counter(
+    "energisjekk_api_requests", "HTTP-forespørsler mot karakter-API-et.", ("endpoint", "status")
+)
+API_SECONDS = REGISTRY.histogram("energisjekk_api_seconds", "Svartid for karakter-API-et.", ("endpoint",))
+API_ROWS = REGISTRY.counter("energisjekk_api_rows", "Bygg karaktersatt via bulk-endepunktet.", ("status",))
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(data, name: str) -> float:
+    # Tall eller tekst som i regnearkene ("1 234 567,5", "12 kWh"), samme regler som filimporten
+    return parse_number(data.get(name), name)
+
+
+def _flag(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in TRUTHY
+    return bool(value)
+
+
+def grade(data) -> dict:
+    # Ett bygg (dict med kategori, arsforbruk, areal[, fjernvarme, id]) -> svar-dict.
+    # Feltnavnene er de samme som resultatkolonnene i porteføljeimporten.
+    if not isinstance(data, dict):
+        raise ValueError("forventet et JSON-objekt")
+    kategori = data.get("kategori")
+    if not isinstance(kategori, str) or not kategori.strip():
+        raise ValueError("kategori mangler")
+    arsforbruk = _number(data, "arsforbruk")
+    areal = _number(data, "areal")
+    if arsforbruk < 0:
+        raise ValueError("arsforbruk kan ikke være negativt")
+    if areal <= 0:
+        raise ValueError("areal må være større enn 0")
+
+    a = assess(kategori.strip(), arsforbruk, areal, _flag(data.get("fjernvarme", False)))
+    out = {"id": data["id"]} if "id" in data else {}
+    out.update(
+        kategori=a.kategori, arsforbruk=a.arsforbruk, areal=a.areal, fjernvarme=a.har_fjernvarme,
+        sp=a.sp, sp_ny_vektet=a.sp_ny_vektet, old_label=a.old_label, new_label=a.new_label, delta=a.delta,
+        better_label=a.improvement.better_label, needed_kwh_m2=a.improvement.needed_kwh_m2,
+        needed_pct=a.improvement.needed_pct, needed_kwh_tot=a.improvement.needed_kwh_tot,
+        tek17_ref=a.tek17.ref, tek17_diff=a.tek17.diff, tek17_diff_pct=a.tek17.diff_pct,
+    )
+    # JSON har ikke Infinity/NaN: ekstreme kombinasjoner (f.eks. areal nær 0) gir 400, ikke et
+    # svar klientene ikke kan lese
+    if not all(math.isfinite(v) for v in out.values() if isinstance(v, float)):
+        raise ValueError("arsforbruk og areal gir et resultat utenfor gyldig tallområde")
+    return out
+
+
+def _loads(data: bytes):
+    try:
+        return json.loads(data)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"ugyldig JSON: {e}") from None
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def _split_lines(blocks):
+    # Bytesblokker -> hele linjer (uten linjeskift), uavhengig av hvor blokkene deles
+    rest = b""
+    for block in blocks:
+        rest += block
+        *lines, rest = rest.split(b"\n")
+        yield from lines
+        if len(rest) > MAX_LINE:
+            raise RequestError(413, f"linje lengre enn {MAX_LINE} byte")
+    if rest:
+        yield rest
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive og chunked svar
+    disable_nagle_algorithm = True
+    server_version = "energisjekk-api"
+
+    # ---------- ruting ----------
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/v1/karakter":
+            self._single("karakter", lambda: dict(parse_qsl(query)))
+        elif path == "/healthz":
+            self._send(200, b'{"status":"ok"}', "healthz")
+        elif path == "/metrics":
+            self._send(200, REGISTRY.render().encode("utf-8"), "metrics", CONTENT_TYPE)
+        else:
+            self._error(404, "ukjent sti", "annet")
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path == "/v1/karakter":
+            self._single("karakter", self._json_body)
+        elif path == "/v1/karakter/bulk":
+            self._bulk()
+        else:
+            self._error(404, "ukjent sti", "annet", close=True)
+
+    # ---------- ett bygg ----------
+    def _single(self, endpoint: str, read):
+        t = time.perf_counter()
+        try:
+            body = _dumps(grade(read()))
+        except RequestError as e:
+            self._error(e.status, str(e), endpoint, close=True)
+        except ValueError as e:
+            self._error(400, str(e), endpoint)
+        else:
+            self._send(200, body, endpoint)
+        API_SECONDS.observe(time.perf_counter() - t, endpoint=endpoint)
+
+    def _json_body(self):
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            # Ingen Content-Length å sjekke på forhånd: grensen telles mens bitene leses
+            blocks, size = [], 0
+            for block in self._chunked_blocks():
+                size += len(block)
+                if size > MAX_BODY:
+                    raise RequestError(413, f"forespørselen er større enn {MAX_BODY} byte")
+                blocks.append(block)
+            body = b"".join(blocks)
+        else:
+            length = self._content_length()
+            if length > MAX_BODY:
+                raise RequestError(413, f"forespørselen er større enn {MAX_BODY} byte")
+            body = self.rfile.read(length)
+        return _loads(body)
+
+    # ---------- bulk (NDJSON) ----------
+    def _bulk(self):
+        t = time.perf_counter()
+        chunked = "chunked" in self.headers.get("Transfer-Encoding", "").lower()
+        try:
+            length = None if chunked else self._content_length()
+        except RequestError as e:
+            self._error(e.status, str(e), "bulk", close=True)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        self._pending = []
+        blocks = self._chunked_blocks() if chunked else self._length_blocks(length)
+        ok = failed = 0
+        try:
+            for n, line in enumerate(_split_lines(blocks), start=1):
+                if not line.strip():
+                    continue
+                data = None
+                try:
+                    data = _loads(line)
+                    row = {"linje": n, **grade(data)}
+                    ok += 1
+                except ValueError as e:
+                    row = {"linje": n, "feil": str(e)}
+                    if isinstance(data, dict) and "id" in data:
+                        row["id"] = data["id"]
+                    failed += 1
+                self._pending.append(_dumps(row))
+                if len(self._pending) >= FLUSH_LINES:
+                    self._flush()
+        except RequestError as e:
+            # Svaret er allerede startet: feilen blir siste linje, og forbindelsen lukkes
+            self._pending.append(_dumps({"feil": str(e)}))
+            self.close_connection = True
+        self._flush()
+        self.wfile.write(b"0\r\n\r\n")
+        API_ROWS.inc(ok, status="ok")
+        API_ROWS.inc(failed, status="invalid")
+        API_REQUESTS.inc(endpoint="bulk", status="200")
+        API_SECONDS.observe(time.perf_counter() - t, endpoint="bulk")
+
+    def _flush(self):
+        if self._pending:
+            data = b"\n".join(self._pending) + b"\n"
+            self._pending = []
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _length_blocks(self, length: int):
+        while length > 0:
+            self._flush()  # alt som er ferdig sendes før vi (kanskje) venter på klienten
+            block = self.rfile.read1(min(length, READ_SIZE))
+            if not block:
+                raise RequestError(400, "forespørselen ble avbrutt")
+            length -= len(block)
+            yield block
+
+    def _chunked_blocks(self):
+        while True:
+            if getattr(self, "_pending", None):
+                self._flush()
+            size_line = self.rfile.readline(1024)
+            try:
+                size = int(size_line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise RequestError(400, "ugyldig chunked-koding") from None
+            if size == 0:
+                while self.rfile.readline(1024).strip():  # eventuelle trailere
+                    pass
+                return
+            while size > 0:
+                block = self.rfile.read1(min(size, READ_SIZE))
+                if not block:
+                    raise RequestError(400, "forespørselen ble avbrutt")
+                size -= len(block)
+                yield block
+            self.rfile.readline(1024)  # CRLF etter hver chunk
+
+    # ---------- svar ----------
+    def _content_length(self) -> int:
+        try:
+            return int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise RequestError(400, "ugyldig Content-Length") from None
+
+    def _send(self, status: int, body: bytes, endpoint: str, content_type="application/json; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        API_REQUESTS.inc(endpoint=endpoint, status=str(status))
+
+    def _error(self, status: int, message: str, endpoint: str, close: bool = False):
+        # close: forespørselen er ikke lest ferdig, og resten ville blitt tolket som neste forespørsel
+        self.close_connection = self.close_connection or close
+        self._send(status, _dumps({"feil": message}), endpoint)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # lastmønsteret er mange samtidige keep-alive-klienter
+
+
+def make_server(port: int = DEFAULT_PORT, addr: str = "127.0.0.1") -> Server:
+    return Server((addr, port), Handler)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="energisjekk-api", description="Lokal HTTP-tjeneste for energikarakter.")
+    ap.add_argument("--port", type=int, default=int(os.environ.get("ENERGISJEKK_API_PORT", DEFAULT_PORT)))
+    ap.add_argument("--addr", default=os.environ.get("ENERGISJEKK_API_ADDR", "127.0.0.1"),
+                    help="adresse å lytte på (standard: kun lokalt)")
+    args = ap.parse_args(argv)
+
+    start_exporters()
+    server = make_server(args.port, args.addr)
+    print(f"energisjekk-api lytter på http://{args.addr}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,293 @@
+# energisjekk/charts.py
+# Rendering av kake- og søylediagram med objektorientert matplotlib (Figure + Agg).
+# Vi går aldri via pyplot: pyplot har et globalt figurregister som deles av alle
+# Streamlit-tråder og som vokser så lenge figurene ikke lukkes eksplisitt.
+# matplotlib importeres først når en figur faktisk skal tegnes.
+import io
+import multiprocessing
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from energisjekk.cache import LRUCache
+from energisjekk.core import FORMAL_PARTS, GRADES, REF, share_label
+from energisjekk.metrics import ERRORS, REGISTRY, RENDER_SECONDS, RENDERS
+from energisjekk.style import BAR_DARK, BAR_LIGHT, FORMAL_COLORS, PRIMARY, WHATIF_COLORS, fmt_int
+
+PIE_CACHE = LRUCache(maxsize=256)
+BAR_CACHE = LRUCache(maxsize=256)
+WHATIF_CACHE = LRUCache(maxsize=128)
+HISTORY_CACHE = LRUCache(maxsize=128)
+
+# Valgfri prosesspool for rendering (matplotlib holder GIL-en mens den tegner).
+# ENERGISJEKK_RENDER_WORKERS=0 (standard) betyr rendering direkte i Streamlit-tråden.
+RENDER_WORKERS = int(os.environ.get("ENERGISJEKK_RENDER_WORKERS", "0"))
+RENDER_TIMEOUT = float(os.environ.get("ENERGISJEKK_RENDER_TIMEOUT", "10"))
+
+_pool = None
+_pool_failed = False  # oppvarmingen feilet – rendrer direkte resten av prosessens levetid
+_pool_lock = threading.Lock()
+
+# Én figur per diagramtype for hele prosessen, gjenbrukt (fig.clear()) i stedet for å lages på
+# nytt. Ikke pr. tråd: Streamlit starter en ny ScriptRunner-tråd for hver rerun, så trådlokale
+# figurer ville aldri blitt gjenbrukt. Låsen pr. type holdes mens figuren tegnes og lagres.
+_figures: dict = {}
+_figure_locks: dict[str, threading.Lock] = {}
+_figures_lock = threading.Lock()
+
+
+@contextmanager
+def _figure(name: str, figsize: tuple[float, float]):
+    with _figures_lock:
+        lock = _figure_locks.setdefault(name, threading.Lock())
+    with lock:
+        fig = _figures.get(name)
+        if fig is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            _figures[name] = fig
+        try:
+            yield fig
+        finally:
+            fig.clear()  # slipp aksene og tekstene til neste bruk
+
+
+def _png(fig, dpi: int) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=dpi)
+    return buf.getvalue()
+
+
+def render_pie_png(values, labels, colors) -> bytes:
+    with _figure("pie", (5.2, 4.8)) as fig:
+        ax = fig.subplots()
+        ax.pie(values, labels=labels, colors=colors,
+               autopct=lambda p: f"{p:.1f}%", startangle=90, counterclock=False)
+        ax.axis("equal")
+        return _png(fig, dpi=160)
+
+
+def render_bar_png(cols, vals, light: str, dark: str, accent: str) -> bytes:
+    with _figure("bar", (4.6, 2.3)) as fig:
+        ax = fig.subplots()
+        bar_colors = [light] * (len(vals)-1) + [dark]
+        bars = ax.bar(cols, vals, color=bar_colors, width=0.55)
+
+        ax.set_ylabel("kWh/m² BRA", fontsize=10, color=accent, labelpad=4)
+        ax.set_ylim(0, max(vals)*1.25)
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+
+        for t in ax.get_xticklabels():
+            t.set_rotation(20)
+            t.set_ha("right")
+
+        for b, v in zip(bars, vals):
+            ax.text(b.get_x()+b.get_width()/2, v+3, f"{v:.1f}",
+                    ha="center", va="bottom", fontsize=8, color=accent)
+
+        # Fremhev "AKTUELT BYGG" uten kantlinje
+        bars[-1].set_linewidth(0)
+        bars[-1].set_alpha(0.95)
+        return _png(fig, dpi=200)
+
+
+def render_whatif_png(reductions, names, curves, colors, accent: str) -> bytes:
+    # Karakter (A øverst) som funksjon av prosent reduksjon i levert energi, én trappekurve pr. variant
+    with _figure("whatif", (6.0, 2.8)) as fig:
+        ax = fig.subplots()
+        for i, (name, curve, color) in enumerate(zip(names, curves, colors)):
+            ax.step(reductions, curve, where="post", color=color, linewidth=1.6,
+                    linestyle="--" if i % 2 else "-", label=name)
+        ax.set_yticks(range(len(GRADES)), GRADES)
+        ax.set_ylim(len(GRADES) - 0.5, -0.5)
+        ax.set_xlim(reductions[0], reductions[-1])
+        ax.set_xlabel("Reduksjon i levert energi (%)", fontsize=9, color=accent)
+        ax.set_ylabel("Energikarakter", fontsize=9, color=accent)
+        ax.grid(axis="y", alpha=0.3)
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+        ax.legend(fontsize=7, frameon=False, loc="best")
+        return _png(fig, dpi=160)
+
+
+def render_history_png(years, sp, old, new, accent: str) -> bytes:
+    # Øverst kWh/m² pr. år, under karakteren i gammel (grå) og ny ordning (grønn) pr. år
+    with _figure("history", (6.0, 3.6)) as fig:
+        ax_sp, ax_k = fig.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios": [3, 2]})
+        ax_sp.plot(years, sp, marker="o", color=accent, linewidth=1.6)
+        for y, v in zip(years, sp):
+            ax_sp.annotate(f"{v:.0f}", (y, v), textcoords="offset points", xytext=(0, 5),
+                           ha="center", fontsize=7, color=accent)
+        ax_sp.set_ylabel("kWh/m² BRA", fontsize=9, color=accent)
+        ax_sp.set_ylim(0, max(sp) * 1.25)
+        ax_k.step(years, old, where="mid", color="#8C8C8C", linewidth=1.6, linestyle="--", label="Gammel ordning")
+        ax_k.step(years, new, where="mid", color=accent, linewidth=1.6, label="Ny ordning")
+        ax_k.set_yticks(range(len(GRADES)), GRADES)
+        ax_k.set_ylim(len(GRADES) - 0.5, -0.5)
+        ax_k.set_xticks(years, [str(y) for y in years])
+        ax_k.legend(fontsize=7, frameon=False, loc="best", ncol=2)
+        for ax in (ax_sp, ax_k):
+            ax.spines["top"].set_visible(False)
+            ax.spines["right"].set_visible(False)
+            ax.grid(axis="y", alpha=0.3)
+        return _png(fig, dpi=160)
+
+
+def _noop():
+    return None
+
+
+def _get_pool():
+    global _pool, _pool_failed
+    if RENDER_WORKERS <= 0 or _pool_failed:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: Streamlit kjører mange tråder, og fork fra en flertrådet prosess er utrygt
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            # Varm opp alle arbeiderne slik at første ekte jobb slipper oppstartskostnaden
+            try:
+                for f in [_pool.submit(_noop) for _ in range(RENDER_WORKERS)]:
+                    f.result(timeout=RENDER_TIMEOUT * 3)
+            except (BrokenProcessPool, FutureTimeout, OSError):
+                _pool.shutdown(wait=False)
+                _pool = None
+                _pool_failed = True
+                ERRORS.inc(kind="render_pool_start")
+                return None
+        return _pool
+
+
+def _reset_pool():
+    # Uten cancel_futures: jobber andre sesjoner allerede har lagt i kø på den gamle poolen
+    # gjøres ferdig der, og nye jobber går til en ny pool
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def render(fn, *args) -> bytes:
+    # Kjør render-funksjonen i prosesspoolen hvis den er slått på, ellers (eller ved feil/timeout) direkte
+    pool = _get_pool()
+    if pool is None:
+        return fn(*args)
+    try:
+        future = pool.submit(fn, *args)
+    except (BrokenProcessPool, RuntimeError):
+        ERRORS.inc(kind="render_pool_broken")
+        _reset_pool()
+        return fn(*args)
+    try:
+        return future.result(timeout=RENDER_TIMEOUT)
+    except FutureTimeout:  # ikke det innebygde TimeoutError før Python 3.11
+        ERRORS.inc(kind="render_timeout")
+        # cancel() stopper ikke en jobb som allerede kjører. Da byttes poolen ut, så nye
+        # jobber ikke blir stående i kø bak en opptatt arbeider; den gamle prosessen avslutter
+        # når jobben er ferdig.
+        if not future.cancel():
+            _reset_pool()
+        return fn(*args)
+    except BrokenProcessPool:
+        ERRORS.inc(kind="render_pool_broken")
+        _reset_pool()
+        return fn(*args)
+    except CancelledError:
+        # Jobben ble avbrutt utenfra (f.eks. ved avslutning) – tegnes direkte i stedet
+        ERRORS.inc(kind="render_cancelled")
+        return fn(*args)
+
+
+def _measured_render(chart: str, fn, *args) -> bytes:
+    # Måles her og ikke rundt savefig i render_*_png: de kan kjøre i en arbeiderprosess,
+    # og måletallene skal ligge i Streamlit-prosessen (inkluderer da også IPC mot poolen)
+    RENDERS.inc(chart=chart)
+    with RENDER_SECONDS.time(chart=chart):
+        return render(fn, *args)
+
+
+# Kakediagrammet avhenger kun av (kategori, årsforbruk), søylediagrammet av (kategori, sp).
+def cached_pie_png(kategori: str, arsforbruk: float, render) -> bytes:
+    return PIE_CACHE.get_or_compute((kategori, arsforbruk), render)
+
+
+def cached_bar_png(kategori: str, sp: float, render) -> bytes:
+    return BAR_CACHE.get_or_compute((kategori, sp), render)
+
+
+def cache_stats() -> dict:
+    return {
+        "pie": PIE_CACHE.stats(), "bar": BAR_CACHE.stats(), "whatif": WHATIF_CACHE.stats(),
+        "history": HISTORY_CACHE.stats(),
+    }
+
+
+def _collect_cache_metrics():
+    stats = cache_stats()
+    for field, kind, help in (
+        ("hits", "counter", "Treff i figurcachen."),
+        ("misses", "counter", "Bom i figurcachen."),
+        ("evictions", "counter", "Figurer kastet ut av cachen (LRU)."),
+        ("size", "gauge", "Antall figurer i cachen."),
+    ):
+        name = f"energisjekk_chart_cache_{field}" + ("_total" if kind == "counter" else "")
+        yield name, kind, help, [({"cache": cache}, s[field]) for cache, s in stats.items()]
+
+
+REGISTRY.register_collector(_collect_cache_metrics)
+
+
+# ---------- Figurdata pr. kategori (delt av PNG- og Vega-visningen) ----------
+def pie_data(kategori: str, arsforbruk: float):
+    ordered = FORMAL_PARTS[kategori]
+    values = [arsforbruk * (v/100) for _, v in ordered]
+    labels = [f"{share_label(k, kategori)}\n{fmt_int(val)} kWh" for (k, _), val in zip(ordered, values)]
+    colors = [FORMAL_COLORS[k] for k, _ in ordered]
+    return values, labels, colors
+
+
+def bar_data(kategori: str, sp: float):
+    return list(REF["labels"]) + ["AKTUELT BYGG"], list(REF[kategori]) + [sp]
+
+
+def pie_png(kategori: str, arsforbruk: float) -> bytes:
+    return cached_pie_png(
+        kategori, arsforbruk, lambda: _measured_render("pie", render_pie_png, *pie_data(kategori, arsforbruk))
+    )
+
+
+def bar_png(kategori: str, sp: float) -> bytes:
+    return cached_bar_png(
+        kategori, sp,
+        lambda: _measured_render("bar", render_bar_png, *bar_data(kategori, sp), BAR_LIGHT, BAR_DARK, PRIMARY),
+    )
+
+
+def whatif_png(kategori: str, arsforbruk: float, areal: float) -> bytes:
+    from energisjekk.whatif import curve_data, what_if
+
+    return WHATIF_CACHE.get_or_compute(
+        (kategori, arsforbruk, areal),
+        lambda: _measured_render(
+            "whatif", render_whatif_png, *curve_data(what_if(kategori, arsforbruk, areal)), WHATIF_COLORS, PRIMARY
+        ),
+    )
+
+
+def history_png(years, sp, old, new) -> bytes:
+    # Nøkkelen er selve dataene – et nytt eller endret år gir ny figur, resten treffer cachen
+    key = (tuple(years), tuple(sp), tuple(old), tuple(new))
+    return HISTORY_CACHE.get_or_compute(
+        key, lambda: _measured_render("history", render_history_png, years, sp, old, new, PRIMARY)
+    )
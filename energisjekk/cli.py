@@ -0,0 +1,157 @@
+# energisjekk/cli.py
+# Kommandolinje for batch-karaktersetting av bygningsregistre:
+#
+#   energisjekk register.csv -o resultat.csv --workers 4
+#   cat register.csv | energisjekk - > resultat.csv
+#   energisjekk timer.csv --ams --bygg bygg.csv -o resultat.csv   (AMS-timesverdier)
+#   energisjekk energimerker.csv --energimerker -o energimerker/    (indeksert attestregister)
+#
+# Leser CSV/Excel/Parquet i biter, karaktersetter med samme regler som appen
+# (energisjekk.portfolio) og skriver resultatet som CSV (semikolon, desimalkomma).
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from energisjekk.importer import CHUNKSIZE, grade_chunk, iter_chunks, write_csv
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="energisjekk",
+        description="Karaktersett bygg (gammel/ny energikarakter, TEK17-avvik og forbedringsbehov).",
+    )
+    ap.add_argument("input", help="CSV/XLSX/Parquet-fil, eller - for CSV på stdin")
+    ap.add_argument("-o", "--output", default="-", help="resultatfil (standard: stdout)")
+    ap.add_argument("-w", "--workers", type=int, default=1,
+                    help="antall prosesser (standard 1 = ingen pool, 0 = alle kjerner)")
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE, help="rader pr. bit")
+    ap.add_argument("--ams", action="store_true",
+                    help="input er AMS-timesverdier (målepunkt, tid, kWh); gir årsforbruk, "
+                         "månedsprofil, maks effekt og grunnlast pr. målepunkt og år")
+    ap.add_argument("--bygg", metavar="FIL",
+                    help="med --ams: byggregister (målepunkt, kategori, areal[, fjernvarme]) – "
+                         "målt årsforbruk karaktersettes")
+    ap.add_argument("--energimerker", action="store_true",
+                    help="input er en dump av energimerkeregisteret; bygger et minnekartlagt lager "
+                         "i mappen gitt med -o (brukes av appen via ENERGISJEKK_REGISTER)")
+    return ap.parse_args(argv)
+
+
+def _graded_chunks(chunks, workers: int):
+    if workers == 1:
+        for chunk in chunks:
+            yield grade_chunk(chunk)
+        return
+    # Begrenset antall biter i arbeid samtidig, og resultatene skrives i samme rekkefølge som input
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(grade_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+
+    if args.input == "-":
+        src, name = sys.stdin.buffer, "stdin.csv"
+    else:
+        try:
+            src, name = open(args.input, "rb"), args.input
+        except OSError as e:
+            return _fail(f"kan ikke lese {args.input}: {e.strerror}")
+    if args.energimerker:
+        return _register(args, src, name)
+    try:
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8-sig", newline="")
+    except OSError as e:
+        src.close()
+        return _fail(f"kan ikke skrive {args.output}: {e.strerror}")
+
+    t0 = time.perf_counter()
+    rows = errors = 0
+    try:
+        if args.ams:
+            rows, workers = _ams(args, src, name, out), 1
+        else:
+            chunks = iter_chunks(src, name, args.chunksize)
+            for i, graded in enumerate(_graded_chunks(chunks, workers)):
+                write_csv(graded, out, header=(i == 0))
+                rows += len(graded)
+                errors += int((graded["feil"] != "").sum())
+    except BrokenPipeError:
+        # Mottakeren lukket røret (f.eks. `energisjekk fil.csv | head`). stdout pekes til
+        # /dev/null så Python ikke feiler igjen når den tømmer bufferen ved avslutning.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except ValueError as e:
+        return _fail(str(e))
+    except OSError as e:
+        return _fail(f"{e.filename or args.input}: {e.strerror or e}")
+    finally:
+        if src is not sys.stdin.buffer:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+
+    if errors:
+        print(f"energisjekk: {errors} rader med manglende eller ugyldige tall (se kolonnen feil)", file=sys.stderr)
+    return _report(rows, t0, workers)
+
+
+def _ams(args, src, name, out) -> int:
+    from energisjekk.ams import aggregate, grade_meters, read_buildings
+
+    # Timesfilene er smale (tre kolonner), så bitene kan være større enn for byggregistre
+    agg = aggregate(src, name, chunksize=args.chunksize * 4)
+    result = agg.result()
+    if agg.invalid:
+        print(f"energisjekk: {agg.invalid} timesrader uten gyldig målepunkt/tid/kWh ble hoppet over",
+              file=sys.stderr)
+    if args.bygg:
+        with open(args.bygg, "rb") as f:
+            result = grade_meters(result, read_buildings(f, args.bygg))
+    write_csv(result, out, header=True)
+    return agg.rows
+
+
+def _register(args, src, name) -> int:
+    from energisjekk.register import build
+
+    if args.output == "-":
+        return _fail("--energimerker krever -o MAPPE")
+    t0 = time.perf_counter()
+    try:
+        meta = build(src, name, args.output, chunksize=args.chunksize * 4)
+    except ValueError as e:
+        return _fail(str(e))
+    except OSError as e:
+        return _fail(f"{e.filename or args.output}: {e.strerror or e}")
+    finally:
+        if src is not sys.stdin.buffer:
+            src.close()
+    if meta["skipped"]:
+        print(f"energisjekk: {meta['skipped']} attester uten kjent kategori eller gyldig kWh/m² ble hoppet over",
+              file=sys.stderr)
+    return _report(meta["rows"], t0, 1)
+
+
+def _fail(message: str) -> int:
+    print(f"energisjekk: {message}", file=sys.stderr)
+    return 2
+
+
+def _report(rows: int, t0: float, workers: int) -> int:
+    elapsed = time.perf_counter() - t0
+    rate = rows / elapsed if elapsed > 0 else float("inf")
+    rate_txt = f"{rate:,.0f}".replace(",", " ")
+    print(f"energisjekk: {rows} rader på {elapsed:.2f} s ({rate_txt} rader/s, {workers} prosess(er))",
+          file=sys.stderr)
+    return 0
@@ -0,0 +1,14 @@
+# energisjekk.core – rene beregninger og referansedata, uten Streamlit/pandas/matplotlib
+from energisjekk.core.data import (
+    CATEGORIES, CORRECTED_SHARES, FALLBACK_CATEGORY, FJERNVARME_FAKTOR, FORMAL_ORDER, FORMAL_PARTS, GRADES,
+    NEW_THRESH, OLD_THRESH, REF, SHARE_MERGES, SHARES, TEK17_ALT, TEK17_REF,
+)
+from energisjekk.core.grading import (
+    Assessment, Improvement, Tek17,
+    assess, corrected_shares, energy_label, grade_delta, heating_share, improvement_from_table,
+    improvement_to_better_grade, share_label, tek17_comparison, thresholds_for, weighted_sp,
+)
+from energisjekk.core.lookup import NEW_TABLES, OLD_TABLES, GradeTable, table_for
+from energisjekk.core.tiltak import (
+    ANBEFALTE_TILTAK, SAVINGS, TILTAK_DATA, TILTAK_NAMES, SavingsRange, parse_savings, recommended,
+)
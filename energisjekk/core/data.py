@@ -0,0 +1,169 @@
+# energisjekk/core/data.py
+# Referansedata for beregningene. Alt er frosset (tuple / MappingProxyType) slik at
+# samme objekter trygt kan deles mellom sesjoner, tråder og batchjobber.
+from types import MappingProxyType
+from typing import Mapping
+
+
+def _freeze(d: dict) -> Mapping:
+    return MappingProxyType({
+        k: _freeze(v) if isinstance(v, dict) else (tuple(v) if isinstance(v, list) else v)
+        for k, v in d.items()
+    })
+
+
+GRADES = ("A", "B", "C", "D", "E", "F", "G")
+
+CATEGORIES = (
+    "Barnehage","Kontorbygning","Skolebygning","Universitets- og høgskolebygning",
+    "Sykehus","Sykehjem","Hotellbygning","Idrettsbygning",
+    "Forretningsbygning","Kulturbygning","Lett industribygning, verksted","Kombinasjon",
+)
+
+# Kategori som brukes når en ukjent kategori kommer inn
+FALLBACK_CATEGORY = "Kombinasjon"
+
+# Ny energimerkeordning: oppvarming fra fjernvarme vektes med 0,45
+FJERNVARME_FAKTOR = 0.45
+
+# ---------- FORMÅLSFORDELING (NVE 2016:24), prosent ----------
+FORMAL_ORDER = ("Oppvarming","Tappevann","Ventilasjon","Belysning","El.spesifikk","Kjøling")
+
+SHARES = _freeze({
+    "Barnehage":{"Oppvarming":61,"Tappevann":5,"Ventilasjon":14,"Belysning":9,"El.spesifikk":13,"Kjøling":0},
+    "Kontorbygning":{"Oppvarming":31,"Tappevann":5,"Ventilasjon":10,"Belysning":16,"El.spesifikk":31,"Kjøling":7},
+    "Skolebygning":{"Oppvarming":58,"Tappevann":4,"Ventilasjon":8,"Belysning":15,"El.spesifikk":15,"Kjøling":0},
+    "Universitets- og høgskolebygning":{"Oppvarming":37,"Tappevann":7,"Ventilasjon":14,"Belysning":15,"El.spesifikk":19,"Kjøling":8},
+    "Sykehus":{"Oppvarming":33,"Tappevann":8,"Ventilasjon":0,"Belysning":0,"El.spesifikk":45,"Kjøling":14},
+    "Sykehjem":{"Oppvarming":52,"Tappevann":10,"Ventilasjon":12,"Belysning":10,"El.spesifikk":15,"Kjøling":0},
+    "Hotellbygning":{"Oppvarming":42,"Tappevann":16,"Ventilasjon":13,"Belysning":13,"El.spesifikk":15,"Kjøling":1},
+    "Idrettsbygning":{"Oppvarming":36,"Tappevann":10,"Ventilasjon":14,"Belysning":15,"El.spesifikk":16,"Kjøling":10},
+    "Forretningsbygning":{"Oppvarming":22,"Tappevann":3,"Ventilasjon":11,"Belysning":0,"El.spesifikk":58,"Kjøling":6},
+    "Kulturbygning":{"Oppvarming":68,"Tappevann":1,"Ventilasjon":9,"Belysning":9,"El.spesifikk":12,"Kjøling":1},
+    "Lett industribygning, verksted":{"Oppvarming":63,"Tappevann":2,"Ventilasjon":5,"Belysning":13,"El.spesifikk":15,"Kjøling":2},
+    "Kombinasjon":{"Oppvarming":61,"Tappevann":5,"Ventilasjon":10,"Belysning":15,"El.spesifikk":9,"Kjøling":0},
+})
+
+# Korreksjoner (NVE 2016:24): formål som er slått sammen med El.spesifikk
+SHARE_MERGES = _freeze({
+    "Forretningsbygning": ["Belysning"],
+    "Sykehus": ["Ventilasjon", "Belysning"],
+})
+
+# ---------- REFERANSER TIL SØYLE (kWh/m² BRA pr. byggeperiode) ----------
+REF = _freeze({
+    "labels":["1950 og eldre","1951–1970","1971–1988","1989–1998","1999–2008","2009–2020"],
+    "Barnehage":[407.1,374.5,263.4,231.6,190.0,157.5],
+    "Kontorbygning":[303.1,282.4,240.8,202.6,174.0,156.4],
+    "Skolebygning":[317.2,293.3,237.8,204.3,172.7,143.8],
+    "Universitets- og høgskolebygning":[318.5,297.5,255.7,217.4,189.4,171.4],
+    "Sykehus":[507.6,485.2,440.8,400.9,372.7,355.6],
+    "Sykehjem":[473.3,448.6,389.4,354.0,320.1,290.9],
+    "Hotellbygning":[405.7,380.8,322.0,286.7,254.1,225.2],
+    "Idrettsbygning":[462.7,425.8,360.5,289.4,249.2,202.6],
+    "Forretningsbygning":[405.7,383.6,338.1,297.8,269.5,252.7],
+    "Kulturbygning":[350.8,324.0,264.7,230.2,199.2,171.5],
+    "Lett industribygning, verksted":[462.7,427.7,357.9,285.5,241.6,212.4],
+    "Kombinasjon":[350.8,324.0,264.7,230.2,199.2,171.5],
+})
+
+# ---------- ENERGIKARAKTER ----------
+
+# Gammel ordning (dagens skala)
+OLD_THRESH = _freeze({
+    "Barnehage":dict(A=85,B=115,C=145,D=180,E=220,F=275),
+    "Kontorbygning":dict(A=90,B=115,C=145,D=180,E=220,F=275),
+    "Skolebygning":dict(A=75,B=105,C=135,D=175,E=220,F=280),
+    "Universitets- og høgskolebygning":dict(A=90,B=125,C=160,D=200,E=240,F=300),
+    "Sykehus":dict(A=175,B=240,C=305,D=360,E=415,F=505),
+    "Sykehjem":dict(A=145,B=195,C=240,D=295,E=355,F=440),
+    "Hotellbygning":dict(A=140,B=190,C=240,D=290,E=340,F=415),
+    "Idrettsbygning":dict(A=125,B=165,C=205,D=275,E=345,F=440),
+    "Forretningsbygning":dict(A=115,B=160,C=210,D=255,E=300,F=375),
+    "Kulturbygning":dict(A=95,B=135,C=175,D=215,E=255,F=320),
+    "Lett industribygning, verksted":dict(A=105,B=145,C=185,D=250,E=315,F=405),
+    "Kombinasjon":dict(A=95,B=135,C=175,D=215,E=255,F=320),
+})
+
+# Ny ordning (justert skala)
+NEW_THRESH = _freeze({
+    "Barnehage":dict(A=105,B=120,C=180,D=240,E=300,F=360),
+    "Kontorbygning":dict(A=75,B=90,C=140,D=190,E=235,F=285),
+    "Skolebygning":dict(A=70,B=85,C=150,D=210,E=275,F=340),
+    "Universitets- og høgskolebygning":dict(A=75,B=90,C=140,D=190,E=245,F=295),
+    "Sykehus":dict(A=125,B=145,C=220,D=300,E=375,F=455),
+    "Sykehjem":dict(A=95,B=115,C=190,D=265,E=340,F=415),
+    "Hotellbygning":dict(A=100,B=115,C=195,D=275,E=355,F=435),
+    "Idrettsbygning":dict(A=85,B=100,C=170,D=235,E=305,F=375),
+    "Forretningsbygning":dict(A=110,B=130,C=200,D=265,E=330,F=395),
+    "Kulturbygning":dict(A=80,B=95,C=165,D=230,E=300,F=370),
+    "Lett industribygning, verksted":dict(A=95,B=110,C=190,D=270,E=345,F=425),
+    # for kombinasjon bruker vi samme som kulturbygg
+    "Kombinasjon":dict(A=80,B=95,C=165,D=230,E=300,F=370),
+})
+
+# ---------- TEK17-referansetall pr kategori (§ 14-2, netto energibehov) ----------
+TEK17_REF = _freeze({
+    "Barnehage": 135,
+    "Kontorbygning": 115,
+    "Skolebygning": 110,
+    "Universitets- og høgskolebygning": 125,
+    "Sykehus": 225,                             # alternativt nivå: 265
+    "Sykehjem": 195,                            # alternativt nivå: 230
+    "Hotellbygning": 170,
+    "Idrettsbygning": 145,
+    "Forretningsbygning": 180,
+    "Kulturbygning": 130,
+    "Lett industribygning, verksted": 140,      # alternativt nivå: 160
+    "Kombinasjon": 135,
+})
+
+# Parentesverdier der TEK17 oppgir to tall (vises i grått som "ev. XXX")
+TEK17_ALT = _freeze({
+    "Sykehus": 265,
+    "Sykehjem": 230,
+    "Lett industribygning, verksted": 160,
+})
+
+
+# ---------- AVLEDEDE VISNINGER (beregnes én gang ved import) ----------
+def _corrected(kategori: str) -> dict[str, int]:
+    pct = dict(SHARES[kategori])
+    for name in SHARE_MERGES.get(kategori, ()):
+        pct["El.spesifikk"] += pct.get(name, 0)
+        pct[name] = 0
+    return pct
+
+
+# Formålsfordeling med NVE-korreksjonene for Sykehus/Forretningsbygning
+CORRECTED_SHARES = _freeze({k: _corrected(k) for k in CATEGORIES})
+
+# (formål, prosent) i fast rekkefølge, kun formål med andel > 0 – det kakediagrammet viser
+FORMAL_PARTS = MappingProxyType({
+    k: tuple((f, CORRECTED_SHARES[k][f]) for f in FORMAL_ORDER if CORRECTED_SHARES[k][f] > 0)
+    for k in CATEGORIES
+})
+
+
+def _validate():
+    tables = {"SHARES": SHARES, "REF": REF, "OLD_THRESH": OLD_THRESH,
+              "NEW_THRESH": NEW_THRESH, "TEK17_REF": TEK17_REF}
+    for name, table in tables.items():
+        missing = [k for k in CATEGORIES if k not in table]
+        if missing:
+            raise ValueError(f"{name} mangler kategori(er): {missing}")
+    for k in CATEGORIES:
+        if set(SHARES[k]) != set(FORMAL_ORDER):
+            raise ValueError(f"SHARES[{k!r}] har ikke formålene {FORMAL_ORDER}")
+        # NVE-tallene er avrundet, så summen kan avvike litt fra 100
+        if abs(sum(SHARES[k].values()) - 100) > 3:
+            raise ValueError(f"SHARES[{k!r}] summerer ikke til ~100 %")
+        if len(REF[k]) != len(REF["labels"]):
+            raise ValueError(f"REF[{k!r}] har feil antall perioder")
+        for name in ("OLD_THRESH", "NEW_THRESH"):
+            limits = [tables[name][k][g] for g in GRADES[:-1]]
+            if any(a >= b for a, b in zip(limits, limits[1:])):
+                raise ValueError(f"{name}[{k!r}] er ikke stigende A..F")
+
+
+_validate()
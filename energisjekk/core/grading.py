@@ -0,0 +1,142 @@
+# energisjekk/core/grading.py
+# Rene beregningsfunksjoner for energikarakter, fjernvarmevekting og TEK17-sammenligning.
+# Ingen avhengigheter utover standardbiblioteket.
+from typing import Mapping, NamedTuple, Optional
+
+from energisjekk.core.data import (
+    CORRECTED_SHARES, FALLBACK_CATEGORY, FJERNVARME_FAKTOR, GRADES, SHARE_MERGES, SHARES, TEK17_ALT,
+    TEK17_REF,
+)
+from energisjekk.core.lookup import NEW_TABLES, OLD_TABLES, GradeTable, table_for
+
+
+class Improvement(NamedTuple):
+    better_label: Optional[str]
+    needed_kwh_m2: Optional[float]
+    needed_pct: Optional[float]
+    needed_kwh_tot: Optional[float]
+
+
+class Tek17(NamedTuple):
+    ref: Optional[float]
+    alt: Optional[float]
+    diff: float
+    diff_pct: float
+
+
+class Assessment(NamedTuple):
+    kategori: str
+    arsforbruk: float
+    areal: float
+    har_fjernvarme: bool
+    sp: float
+    sp_ny_vektet: float
+    andel_oppvarming: float
+    old_label: str
+    new_label: str
+    delta: int
+    improvement: Improvement
+    tek17: Tek17
+
+
+def energy_label(sp_kwh_m2: float, thresholds: Mapping[str, float]) -> str:
+    for letter in GRADES[:-1]:
+        if sp_kwh_m2 <= thresholds[letter]:
+            return letter
+    return "G"
+
+
+def thresholds_for(kategori: str, table: Mapping[str, Mapping[str, float]]) -> Mapping[str, float]:
+    return table.get(kategori, table[FALLBACK_CATEGORY])
+
+
+def heating_share(kategori: str) -> float:
+    # Andel oppvarming fra formålsfordelingen (NVE 2016:24)
+    return thresholds_for(kategori, SHARES)["Oppvarming"] / 100.0
+
+
+def weighted_sp(sp: float, kategori: str, har_fjernvarme: bool) -> float:
+    # Spesifikt årsforbruk som brukes til NY energikarakter (oppvarming vektes 0,45 ved fjernvarme)
+    if not har_fjernvarme:
+        return sp
+    sp_oppvarming = sp * heating_share(kategori)
+    return sp - sp_oppvarming + sp_oppvarming * FJERNVARME_FAKTOR
+
+
+def grade_delta(old_label: str, new_label: str) -> int:
+    return GRADES.index(new_label) - GRADES.index(old_label)
+
+
+def improvement_to_better_grade(
+    sp: float,
+    kategori: str,
+    thresholds: Mapping[str, Mapping[str, float]],
+    current_label: str,
+    areal: float,
+) -> Improvement:
+    # A er best mulig – da finnes det ingen bedre karakter
+    if current_label == "A":
+        return Improvement(None, None, None, None)
+
+    better_label = GRADES[GRADES.index(current_label) - 1]   # én bedre karakter (for eksempel C -> B)
+    limit = thresholds_for(kategori, thresholds)[better_label]
+
+    needed_kwh_m2 = max(0.0, sp - limit)
+    needed_pct = (needed_kwh_m2 / sp * 100) if sp > 0 else 0.0
+    needed_kwh_tot = needed_kwh_m2 * areal
+
+    return Improvement(better_label, needed_kwh_m2, needed_pct, needed_kwh_tot)
+
+
+def improvement_from_table(table: GradeTable, sp: float, current_idx: int, areal: float) -> Improvement:
+    # Som improvement_to_better_grade, men med ferdigkompilert tabell og kjent karakterindeks
+    if current_idx == 0:
+        return Improvement(None, None, None, None)
+    needed_kwh_m2 = table.needed(sp, current_idx - 1)
+    needed_pct = (needed_kwh_m2 / sp * 100) if sp > 0 else 0.0
+    return Improvement(GRADES[current_idx - 1], needed_kwh_m2, needed_pct, needed_kwh_m2 * areal)
+
+
+def tek17_comparison(sp: float, kategori: str) -> Tek17:
+    ref = TEK17_REF.get(kategori)
+    diff = sp - ref if ref else 0
+    diff_pct = (diff / ref) * 100 if ref else 0
+    return Tek17(ref, TEK17_ALT.get(kategori), diff, diff_pct)
+
+
+def corrected_shares(kategori: str) -> Mapping[str, int]:
+    # Formålsfordeling i prosent med NVE-korreksjonene for Sykehus/Forretningsbygning (forhåndsberegnet)
+    return thresholds_for(kategori, CORRECTED_SHARES)
+
+
+def share_label(name: str, kategori: str) -> str:
+    merged = SHARE_MERGES.get(kategori)
+    if name == "El.spesifikk" and merged:
+        return f"El.spesifikk (inkl. {' og '.join(m.lower() for m in merged)})"
+    return name
+
+
+def assess(kategori: str, arsforbruk: float, areal: float, har_fjernvarme: bool = False) -> Assessment:
+    sp = arsforbruk / areal
+    sp_ny_vektet = weighted_sp(sp, kategori, har_fjernvarme)
+
+    new_table = table_for(kategori, NEW_TABLES)
+    # Gammel ordning: alltid basert på uvektet levert energi
+    old_idx = table_for(kategori, OLD_TABLES).index(sp)
+    # Ny ordning: tar hensyn til fjernvarme hvis valgt
+    new_idx = new_table.index(sp_ny_vektet)
+
+    return Assessment(
+        kategori=kategori,
+        arsforbruk=arsforbruk,
+        areal=areal,
+        har_fjernvarme=har_fjernvarme,
+        sp=sp,
+        sp_ny_vektet=sp_ny_vektet,
+        andel_oppvarming=heating_share(kategori),
+        old_label=GRADES[old_idx],
+        new_label=GRADES[new_idx],
+        delta=new_idx - old_idx,
+        improvement=improvement_from_table(new_table, sp_ny_vektet, new_idx, areal),
+        tek17=tek17_comparison(sp, kategori),
+    )
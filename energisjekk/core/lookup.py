@@ -0,0 +1,64 @@
+# energisjekk/core/lookup.py
+# Forhåndskompilerte oppslagstabeller for energikarakter pr. kategori og ordning.
+# Bygges én gang ved import: sorterte grenser (A..F) + en tett tabell over heltalls
+# kWh/m², slik at karakter og avstand til bedre karakterer blir konstanttidsoppslag.
+# Bøtter der en grense ligger inne i [n, n+1) faller tilbake til eksakt bisect.
+from bisect import bisect_left
+from typing import Mapping
+
+from energisjekk.core.data import CATEGORIES, FALLBACK_CATEGORY, GRADES, NEW_THRESH, OLD_THRESH
+
+_BOUNDARY = 255
+_WORST = len(GRADES) - 1  # G
+
+
+class GradeTable:
+    __slots__ = ("limits", "_dense", "_top")
+
+    def __init__(self, thresholds: Mapping[str, float]):
+        self.limits = tuple(float(thresholds[g]) for g in GRADES[:-1])
+        self._top = int(self.limits[-1]) + 1
+        dense = bytearray(self._top)
+        g = 0  # antall grenser < n
+        for n in range(self._top):
+            while g < len(self.limits) and self.limits[g] < n:
+                g += 1
+            boundary = g < len(self.limits) and self.limits[g] < n + 1
+            dense[n] = _BOUNDARY if boundary else g
+        self._dense = bytes(dense)
+
+    def index(self, sp: float) -> int:
+        # Karakterindeks 0=A ... 6=G, identisk med energy_label (sp <= grense -> karakter)
+        if sp >= self._top:
+            return _WORST
+        if sp >= 0:
+            g = self._dense[int(sp)]
+            return g if g != _BOUNDARY else bisect_left(self.limits, sp)
+        return _WORST if sp != sp else 0  # NaN -> G, negativ -> A
+
+    def label(self, sp: float) -> str:
+        return GRADES[self.index(sp)]
+
+    def limit(self, label: str) -> float:
+        return self.limits[GRADES.index(label)]
+
+    def needed(self, sp: float, target_idx: int) -> float:
+        # kWh/m² som må bort for å nå karakteren med indeks target_idx
+        return max(0.0, sp - self.limits[target_idx])
+
+    def ladder(self, sp: float) -> tuple[tuple[str, float], ...]:
+        # (karakter, nødvendig reduksjon i kWh/m²) for alle karakterer bedre enn dagens
+        return tuple((GRADES[j], self.needed(sp, j)) for j in range(self.index(sp) - 1, -1, -1))
+
+
+def _compile(table: Mapping[str, Mapping[str, float]]) -> Mapping[str, GradeTable]:
+    return {k: GradeTable(table[k]) for k in CATEGORIES}
+
+
+OLD_TABLES = _compile(OLD_THRESH)
+NEW_TABLES = _compile(NEW_THRESH)
+
+
+def table_for(kategori: str, tables: Mapping[str, GradeTable]) -> GradeTable:
+    return tables.get(kategori, tables[FALLBACK_CATEGORY])
+
@@ -0,0 +1,497 @@
+# energisjekk/core/tiltak.py
+# Tiltakstabellen og anbefalte tiltak pr. kategori. Lastes og valideres én gang pr.
+# prosess og deles (skrivebeskyttet) mellom alle sesjoner.
+import re
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+from energisjekk.core.data import CATEGORIES, FORMAL_ORDER, _freeze
+
+# ---------- TILTAKSTABELL (typisk effekt) ----------
+TILTAK_DATA = tuple(MappingProxyType(t) for t in [
+    {
+        "Tiltak": "🛠️ Driftstidsoptimalisering",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "✓",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "5–15 % (ventilasjon/oppvarming)",
+    },
+    {
+        "Tiltak": "🌡️ Temperatur-senking natt/helg",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "5–10 % (oppvarming/kjøling)",
+    },
+    {
+        "Tiltak": "👥 Brukeratferd/opplæring",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "✓",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "2–5 % (totalt)",
+    },
+    {
+        "Tiltak": "🔌 Standby-reduksjon/utstyr",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "",
+        "🌍CO₂-utslipp ↓": "",
+        "🌡️Inneklima": "",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "",
+        "Typisk besparelse / gjelder for": "2–5 % (el-spesifikk)",
+    },
+    {
+        "Tiltak": "📊 EOS (energiovervåking)",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "2–10 % (totalt)",
+    },
+    {
+        "Tiltak": "🌬️ Behovsstyrt ventilasjon",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "✓",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "10–25 % (ventilasjon)",
+    },
+    {
+        "Tiltak": "🔥 Varmegjenvinning ventilasjon",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "20–40 % (ventilasjon/oppvarming)",
+    },
+    {
+        "Tiltak": "🔄 Optimalisering varme/kjøl",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "5–15 % (oppvarming/kjøling)",
+    },
+    {
+        "Tiltak": "🔋 Effektstyring/lastutjevning",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "",
+        "🌍CO₂-utslipp ↓": "",
+        "🌡️Inneklima": "",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "5–10 % kostnad (effektledd)",
+    },
+    {
+        "Tiltak": "🚗 Smart elbillading",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "",
+        "🌍CO₂-utslipp ↓": "",
+        "🌡️Inneklima": "",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "5–10 % kostnad (effektledd)",
+    },
+    {
+        "Tiltak": "💡 LED-belysning",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "✓",
+        "🔧Driftskontroll": "",
+        "Typisk besparelse / gjelder for": "30–60 % (belysning)",
+    },
+    {
+        "Tiltak": "💡 Dagslys-/tilstede-styring",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "✓",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "10–30 % (belysning)",
+    },
+    {
+        "Tiltak": "❄️🔥 Varmepumpe",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "",
+        "Typisk besparelse / gjelder for": "40–70 % (oppvarming)",
+    },
+    {
+        "Tiltak": "☀️ Solceller",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "",
+        "Typisk besparelse / gjelder for": "Avhengig anlegg (red. kjøpt el)",
+    },
+    {
+        "Tiltak": "🏭 Spillvarmegjenvinning",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "✓",
+        "Typisk besparelse / gjelder for": "20–50 % (prosess/oppvarming)",
+    },
+    {
+        "Tiltak": "🧱 Etterisolering tak/vegger",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "✓",
+        "🔧Driftskontroll": "",
+        "Typisk besparelse / gjelder for": "10–25 % (oppvarming)",
+    },
+    {
+        "Tiltak": "🪟 Utskifting av vinduer",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "✓",
+        "🔧Driftskontroll": "",
+        "Typisk besparelse / gjelder for": "10–20 % (oppvarming)",
+    },
+    {
+        "Tiltak": "🕳️ Tetthetstiltak (luftlekkasjer)",
+        "💰Strøm-regning ↓": "✓",
+        "🏷️Energimerke ↑": "✓",
+        "🌍CO₂-utslipp ↓": "✓",
+        "🌡️Inneklima": "✓",
+        "☀️Overtemp ↓": "",
+        "🔧Driftskontroll": "",
+        "Typisk besparelse / gjelder for": "5–15 % (oppvarming)",
+    },
+])
+
+# hvilke tiltak vi typisk vil fremheve per kategori (kan justeres fritt)
+ANBEFALTE_TILTAK = _freeze({
+    # Barnehage – mye ventilasjon, oppvarming og belysning
+    "Barnehage": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "👥 Brukeratferd/opplæring",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Kontorbygg – mye el-spesifikk, belysning, ventilasjon
+    "Kontorbygning": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "👥 Brukeratferd/opplæring",
+        "🔌 Standby-reduksjon/utstyr",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "🔋 Effektstyring/lastutjevning",
+        "🚗 Smart elbillading",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Skole – likner barnehage, litt mer belysning
+    "Skolebygning": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "👥 Brukeratferd/opplæring",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Universitet / høgskole – mye ventilasjon, prosess/el-spesifikk
+    "Universitets- og høgskolebygning": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "👥 Brukeratferd/opplæring",
+        "🔌 Standby-reduksjon/utstyr",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "🔋 Effektstyring/lastutjevning",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🏭 Spillvarmegjenvinning",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Sykehus – tunge tekniske anlegg og prosess/varme
+    "Sykehus": [
+        "🛠️ Driftstidsoptimalisering",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",          # der det er mulig
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "🔋 Effektstyring/lastutjevning",
+        "❄️🔥 Varmepumpe",
+        "🏭 Spillvarmegjenvinning",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Sykehjem – mye varme, komfort og belysning
+    "Sykehjem": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "👥 Brukeratferd/opplæring",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Hotell – varme, ventilasjon, varmtvann, belysning
+    "Hotellbygning": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "👥 Brukeratferd/opplæring",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Idrettsbygg – mye ventilasjon, varmtvann og belysning
+    "Idrettsbygning": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "💡 LED-belysning",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Forretningsbygg – lys, el-spesifikk, ventilasjon, effekt
+    "Forretningsbygning": [
+        "🛠️ Driftstidsoptimalisering",
+        "🔌 Standby-reduksjon/utstyr",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "🔋 Effektstyring/lastutjevning",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Kulturbygg – ofte mye ventilasjon, belysning, varme
+    "Kulturbygning": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Lett industri/verksted – prosess, ventilasjon, bygningskropp
+    "Lett industribygning, verksted": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "🔌 Standby-reduksjon/utstyr",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "🔋 Effektstyring/lastutjevning",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🏭 Spillvarmegjenvinning",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Kombinasjon – bruk en “generell kontor/næring”-pakke
+    "Kombinasjon": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "👥 Brukeratferd/opplæring",
+        "🔌 Standby-reduksjon/utstyr",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "🔋 Effektstyring/lastutjevning",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+
+    # Fallback hvis noe nytt skulle dukke opp
+    "default": [
+        "🛠️ Driftstidsoptimalisering",
+        "🌡️ Temperatur-senking natt/helg",
+        "👥 Brukeratferd/opplæring",
+        "🔌 Standby-reduksjon/utstyr",
+        "📊 EOS (energiovervåking)",
+        "🌬️ Behovsstyrt ventilasjon",
+        "🔥 Varmegjenvinning ventilasjon",
+        "🔄 Optimalisering varme/kjøl",
+        "💡 LED-belysning",
+        "💡 Dagslys-/tilstede-styring",
+        "❄️🔥 Varmepumpe",
+        "☀️ Solceller",
+        "🧱 Etterisolering tak/vegger",
+        "🪟 Utskifting av vinduer",
+        "🕳️ Tetthetstiltak (luftlekkasjer)",
+    ],
+})
+
+TILTAK_NAMES = tuple(t["Tiltak"] for t in TILTAK_DATA)
+
+
+# ---------- BESPARELSER SOM TALL ----------
+class SavingsRange(NamedTuple):
+    low: float                  # andel (0–1) av forbruket til formålene under
+    high: float
+    end_uses: tuple[str, ...]   # formål i FORMAL_ORDER
+
+
+# Ord i "gjelder for"-teksten -> formål i SHARES. "prosess" finnes ikke som eget formål hos NVE.
+_END_USE_WORDS = {
+    "oppvarming": ("Oppvarming",),
+    "ventilasjon": ("Ventilasjon",),
+    "kjøling": ("Kjøling",),
+    "belysning": ("Belysning",),
+    "el-spesifikk": ("El.spesifikk",),
+    "tappevann": ("Tappevann",),
+    "totalt": FORMAL_ORDER,
+    "prosess": (),
+}
+_RANGE = re.compile(r"^(\d+)\s*[–-]\s*(\d+)\s*%\s*(kostnad\s*)?\((.+)\)$")
+
+
+def parse_savings(text: str) -> Optional[SavingsRange]:
+    # "10–25 % (ventilasjon)" -> SavingsRange(0.10, 0.25, ("Ventilasjon",)).
+    # None for tiltak uten energieffekt i tabellen: kostnadsbesparelser (effektledd) og
+    # "Avhengig anlegg" (solceller). Ukjent format gir ValueError.
+    m = _RANGE.match(text.strip())
+    if m is None:
+        if text.startswith("Avhengig"):
+            return None
+        raise ValueError(f"Ukjent besparelsesformat: {text!r}")
+    low, high, kostnad, words = m.groups()
+    if kostnad:
+        return None
+    end_uses = []
+    for word in words.split("/"):
+        word = word.strip().lower()
+        if word not in _END_USE_WORDS:
+            raise ValueError(f"Ukjent formål {word!r} i {text!r}")
+        end_uses += [e for e in _END_USE_WORDS[word] if e not in end_uses]
+    return SavingsRange(int(low) / 100, int(high) / 100, tuple(end_uses))
+
+
+SAVINGS = MappingProxyType({t["Tiltak"]: parse_savings(t["Typisk besparelse / gjelder for"]) for t in TILTAK_DATA})
+
+
+def recommended(kategori: str) -> tuple[str, ...]:
+    return ANBEFALTE_TILTAK.get(kategori, ANBEFALTE_TILTAK["default"])
+
+
+def _validate():
+    if len(set(TILTAK_NAMES)) != len(TILTAK_NAMES):
+        raise ValueError("TILTAK_DATA inneholder dupliserte tiltak")
+    for kategori, names in ANBEFALTE_TILTAK.items():
+        if kategori not in CATEGORIES and kategori != "default":
+            raise ValueError(f"ANBEFALTE_TILTAK: ukjent kategori {kategori!r}")
+        unknown = [n for n in names if n not in TILTAK_NAMES]
+        if unknown:
+            raise ValueError(f"ANBEFALTE_TILTAK[{kategori!r}]: ukjente tiltak {unknown}")
+    for name, r in SAVINGS.items():
+        if r is not None and not (0 <= r.low <= r.high < 1 and r.end_uses):
+            raise ValueError(f"Ugyldig besparelse for {name!r}: {r}")
+
+
+_validate()
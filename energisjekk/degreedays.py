@@ -0,0 +1,103 @@
+# energisjekk/degreedays.py
+# Graddagskorrigering: oppvarmingsandelen (SHARES["Oppvarming"]) av levert energi skaleres
+# med normalårets graddager / årets graddager, resten av forbruket står urørt.
+# Tabellen (sted, år, graddager) leses én gang; korreksjonsfaktorene bygges og caches pr. sted.
+#
+# Det følger ingen graddagstabell med pakken: korreksjonen er slått av til ENERGISJEKK_GRADDAGER
+# peker på en CSV med offisielle tall (Meteorologisk institutt / Enova), semikolonseparert:
+#
+#   sted;ar;graddager
+#   Oslo;normal;3950        <- normalår, påkrevd for hvert sted
+#   Oslo;2023;3710
+import csv
+import os
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+from energisjekk.portfolio import HEAT_SHARE, category_codes
+
+NORMAL = "normal"
+
+
+def table_path() -> str | None:
+    return os.environ.get("ENERGISJEKK_GRADDAGER") or None
+
+
+def available() -> bool:
+    # Graddagskorrigering vises og eksporteres bare med en konfigurert tabell
+    path = table_path()
+    return path is not None and os.path.isfile(path)
+
+
+@lru_cache(maxsize=1)
+def load_table(path: str | None = None):
+    # {sted: {år: graddager, "normal": graddager}} – frosset og delt mellom sesjoner
+    path = path or table_path()
+    if path is None:
+        raise ValueError("Ingen graddagstabell er konfigurert (ENERGISJEKK_GRADDAGER)")
+    table: dict[str, dict] = {}
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = csv.DictReader((line for line in f if not line.startswith("#")), delimiter=";")
+        for row in rows:
+            sted, ar = row["sted"].strip(), row["ar"].strip().lower()
+            key = NORMAL if ar == NORMAL else int(ar)
+            table.setdefault(sted, {})[key] = float(row["graddager"].replace(",", "."))
+    for sted, years in table.items():
+        if NORMAL not in years:
+            raise ValueError(f"Graddagstabellen mangler normalår for {sted!r}")
+    return MappingProxyType({s: MappingProxyType(y) for s, y in table.items()})
+
+
+def locations() -> tuple[str, ...]:
+    return tuple(sorted(load_table()))
+
+
+def years(sted: str) -> tuple[int, ...]:
+    return tuple(sorted(y for y in load_table().get(sted, {}) if y != NORMAL))
+
+
+@lru_cache(maxsize=None)
+def _factors(sted: str):
+    # Sorterte år og faktor normal/årets graddager for ett sted (skrivebeskyttet)
+    data = load_table().get(sted)
+    if data is None:
+        raise KeyError(f"Ukjent sted {sted!r} i graddagstabellen")
+    ar = np.array(years(sted), dtype=np.int64)
+    f = data[NORMAL] / np.array([data[int(y)] for y in ar])
+    ar.flags.writeable = False
+    f.flags.writeable = False
+    return ar, f
+
+
+def factor(sted: str, ar) -> np.ndarray:
+    # Korreksjonsfaktor for oppvarmingen; NaN for år som mangler i tabellen
+    known, f = _factors(sted)
+    ar = np.asarray(ar, dtype=np.float64)
+    if not len(known):
+        return np.full(ar.shape, np.nan)
+    pos = np.clip(np.searchsorted(known, np.nan_to_num(ar, nan=-1)), 0, len(known) - 1)
+    return np.where(known[pos] == ar, f[pos], np.nan)
+
+
+def normalize(kategori, arsforbruk, sted, ar) -> np.ndarray:
+    # Normalårskorrigert årsforbruk, vektorisert over bygg og år. sted kan være én verdi eller
+    # en vektor; hvert unike sted slås opp én gang. Ukjent sted/år gir NaN.
+    codes = category_codes(np.atleast_1d(kategori))
+    arsforbruk = np.asarray(arsforbruk, dtype=np.float64)
+    ar = np.asarray(ar, dtype=np.float64)
+    shape = np.broadcast_shapes(codes.shape, arsforbruk.shape, ar.shape, np.shape(sted))
+    sted = np.broadcast_to(np.asarray(sted, dtype=object), shape)
+    ar = np.broadcast_to(ar, shape)
+
+    # Én sammenligning pr. sted i tabellen (som category_codes) – raskere enn np.unique over strenger
+    f = np.full(shape, np.nan)
+    for name in locations():
+        rows = sted == name
+        if not rows.any():
+            continue
+        f[rows] = factor(name, ar[rows])
+
+    heat = arsforbruk * np.broadcast_to(HEAT_SHARE[codes], shape)
+    return arsforbruk - heat + heat * f
@@ -0,0 +1,108 @@
+# energisjekk/diagnostics.py
+# Tidsmåling pr. seksjon av appen, med valgfri cProfile-dump pr. rerun.
+# Slås på med ENERGISJEKK_DIAG=1 eller ?diag=1. Avslått koster section() kun ett
+# funksjonskall som returnerer en delt nullcontext.
+import contextlib
+import cProfile
+import os
+import pathlib
+import threading
+import time
+
+_NULL = contextlib.nullcontext()
+
+# Bare én cProfile-profiler kan være aktiv i prosessen (fra Python 3.12 gir en til ValueError),
+# så samtidige sesjoner med profilering på deler én. (tråd, profiler) for den som har den.
+_profile_lock = threading.Lock()
+_profile_owner = None
+
+
+def _claim_profiler():
+    # Ny aktiv profiler for denne tråden, eller None hvis en annen sesjon profilerer nå
+    global _profile_owner
+    with _profile_lock:
+        if _profile_owner is not None:
+            thread, profiler = _profile_owner
+            if thread.is_alive():
+                return None
+            # Rerunnen som startet den ble avbrutt før stop() – frigjøres for neste
+            profiler.disable()
+            _profile_owner = None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # et annet profileringsverktøy er aktivt i prosessen
+            return None
+        _profile_owner = (threading.current_thread(), profiler)
+        return profiler
+
+
+def _release_profiler(profiler):
+    global _profile_owner
+    with _profile_lock:
+        profiler.disable()
+        if _profile_owner is not None and _profile_owner[1] is profiler:
+            _profile_owner = None
+
+
+class Diagnostics:
+    def __init__(self, enabled: bool = False, profile_dir: str | None = None):
+        self.enabled = enabled
+        self.profile_dir = pathlib.Path(profile_dir) if (enabled and profile_dir) else None
+        self.timings: dict[str, float] = {}  # seksjon -> ms (summeres hvis seksjonen kjøres flere ganger)
+        self.total_ms = 0.0
+        self._t0 = 0.0
+        self._profiler = None
+        self.profile_busy = False  # profilering var på, men en annen sesjon profilerte allerede
+
+    @classmethod
+    def from_env(cls, query_params=None) -> "Diagnostics":
+        query_params = query_params or {}
+        enabled = os.environ.get("ENERGISJEKK_DIAG") == "1" or "diag" in query_params
+        return cls(enabled, os.environ.get("ENERGISJEKK_PROFILE_DIR"))
+
+    def section(self, name: str):
+        if not self.enabled:
+            return _NULL
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - t) * 1000
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._t0 = time.perf_counter()
+        if self.profile_dir is not None:
+            self._profiler = _claim_profiler()
+            self.profile_busy = self._profiler is None
+
+    def stop(self) -> pathlib.Path | None:
+        # Avslutter målingen; returnerer stien til pstats-filen hvis profilering er på
+        if not self.enabled:
+            return None
+        self.total_ms = (time.perf_counter() - self._t0) * 1000
+        if self._profiler is None:
+            return None
+        _release_profiler(self._profiler)
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        path = self.profile_dir / f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(self):x}.pstats"
+        self._profiler.dump_stats(path)
+        self._profiler = None
+        return path
+
+    def rows(self) -> list[tuple[str, float, float]]:
+        # (seksjon, ms, andel av hele reruns i %)
+        total = self.total_ms or sum(self.timings.values()) or 1.0
+        return [(name, ms, ms / total * 100) for name, ms in self.timings.items()]
+
+    def markdown(self) -> str:
+        lines = ["| Seksjon | ms | Andel |", "|---|---:|---:|"]
+        lines += [f"| {name} | {ms:.1f} | {share:.0f} % |" for name, ms, share in self.rows()]
+        lines.append(f"| **Hele reruns** | **{self.total_ms:.1f}** | |")
+        return "\n".join(lines)
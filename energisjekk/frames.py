@@ -0,0 +1,19 @@
+# energisjekk/frames.py
+# pandas-visninger av tiltakstabellen. Bygges første gang de trengs og deles deretter
+# (skrivebeskyttet) mellom alle sesjoner i prosessen.
+from functools import lru_cache
+
+import pandas as pd
+
+from energisjekk.core import TILTAK_DATA, recommended
+
+
+@lru_cache(maxsize=None)
+def tiltak_frame() -> pd.DataFrame:
+    return pd.DataFrame([dict(t) for t in TILTAK_DATA]).set_index("Tiltak")
+
+
+@lru_cache(maxsize=None)
+def anbefalte_frame(kategori: str) -> pd.DataFrame:
+    df = tiltak_frame()
+    return df[df.index.isin(recommended(kategori))]
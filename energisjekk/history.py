@@ -0,0 +1,272 @@
+# energisjekk/history.py
+# Byggregister med historikk i lokal SQLite: inndata pr. bygg og år (kategori, årsforbruk,
+# areal, fjernvarme) lagres sammen med beregnet resultat, så trender over flere år kan vises
+# uten å regne alt på nytt.
+#
+# Inkrementell omregning: bare (bygg, år)-radene som faktisk er nye eller endret karaktersettes
+# ved lagring. Hver rad husker hvilken regelversjon (RULES_VERSION, sjekksum av tersklene og
+# vektingen) resultatet ble regnet med; endres reglene, regnes kun de utdaterte radene om.
+#
+# Databasefil: ENERGISJEKK_HISTORIKK (standard energisjekk_historikk.sqlite3 i arbeidsmappen).
+import os
+import sqlite3
+import threading
+import zlib
+from typing import NamedTuple
+
+import numpy as np
+
+from energisjekk.core import assess
+from energisjekk.core.data import FJERNVARME_FAKTOR, GRADES, NEW_THRESH, OLD_THRESH, SHARES, TEK17_REF
+from energisjekk.portfolio import grade_portfolio
+
+DEFAULT_PATH = "energisjekk_historikk.sqlite3"
+
+RULES_VERSION = zlib.crc32(
+    repr((OLD_THRESH, NEW_THRESH, {k: v["Oppvarming"] for k, v in SHARES.items()}, TEK17_REF, FJERNVARME_FAKTOR))
+    .encode()
+)
+
+# Økes når SCHEMA endres; lagres i databasefilen (PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bygg (
+    bygg_id    TEXT PRIMARY KEY,
+    navn       TEXT NOT NULL DEFAULT '',
+    kategori   TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bygg_kategori ON bygg (kategori);
+
+CREATE TABLE IF NOT EXISTS arsdata (
+    bygg_id        TEXT    NOT NULL REFERENCES bygg (bygg_id) ON DELETE CASCADE,
+    ar             INTEGER NOT NULL,
+    kategori       TEXT    NOT NULL,
+    arsforbruk     REAL    NOT NULL,
+    areal          REAL    NOT NULL,
+    fjernvarme     INTEGER NOT NULL,
+    sp             REAL    NOT NULL,
+    sp_ny_vektet   REAL    NOT NULL,
+    old_label      TEXT    NOT NULL,
+    new_label      TEXT    NOT NULL,
+    tek17_diff_pct REAL    NOT NULL,
+    regelverk      INTEGER NOT NULL,
+    PRIMARY KEY (bygg_id, ar)
+) WITHOUT ROWID;
+-- Dekkende indekser: trend pr. kategori og år leses uten oppslag i tabellen
+CREATE INDEX IF NOT EXISTS arsdata_kategori_ar ON arsdata (kategori, ar, sp, old_label, new_label);
+CREATE INDEX IF NOT EXISTS arsdata_ar ON arsdata (ar);
+CREATE INDEX IF NOT EXISTS arsdata_regelverk ON arsdata (regelverk);
+"""
+
+_UPSERT = """
+INSERT INTO arsdata (bygg_id, ar, kategori, arsforbruk, areal, fjernvarme,
+                     sp, sp_ny_vektet, old_label, new_label, tek17_diff_pct, regelverk)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (bygg_id, ar) DO UPDATE SET
+    kategori = excluded.kategori, arsforbruk = excluded.arsforbruk, areal = excluded.areal,
+    fjernvarme = excluded.fjernvarme, sp = excluded.sp, sp_ny_vektet = excluded.sp_ny_vektet,
+    old_label = excluded.old_label, new_label = excluded.new_label,
+    tek17_diff_pct = excluded.tek17_diff_pct, regelverk = excluded.regelverk
+"""
+
+
+class YearRow(NamedTuple):
+    ar: int
+    kategori: str
+    arsforbruk: float
+    areal: float
+    fjernvarme: bool
+    sp: float
+    sp_ny_vektet: float
+    old_label: str
+    new_label: str
+    tek17_diff_pct: float
+
+
+class TrendRow(NamedTuple):
+    ar: int
+    bygg: int
+    sp_snitt: float
+    old_counts: dict
+    new_counts: dict
+
+
+# ---------- tilkobling ----------
+_local = threading.local()
+_setup_lock = threading.Lock()
+
+
+def _setup(conn: sqlite3.Connection):
+    # Skjema og WAL settes opp én gang pr. databasefil, ikke for hver tråds tilkobling:
+    # journal_mode = WAL er varig i filen, og user_version viser at skjemaet allerede finnes.
+    if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        return
+    with _setup_lock:
+        if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA + f"PRAGMA user_version = {SCHEMA_VERSION};")
+
+
+def connect(path: str | None = None, create: bool = True) -> sqlite3.Connection | None:
+    # Én tilkobling pr. tråd og fil (Streamlit kjører sesjoner i egne tråder). Med create=False
+    # returneres None hvis databasefilen ikke finnes ennå (appen lager den først ved lagring).
+    path = path or os.environ.get("ENERGISJEKK_HISTORIKK", DEFAULT_PATH)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        if not create and not os.path.exists(path):
+            return None
+        conn = sqlite3.connect(path)
+        _setup(conn)
+        # Gjelder bare denne tilkoblingen og må settes hver gang
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conns[path] = conn
+    return conn
+
+
+# ---------- skriving ----------
+def _grade_and_write(conn, rows):
+    # rows: (bygg_id, år, kategori, årsforbruk, areal, fjernvarme). Karaktersettes samlet
+    # (grade_portfolio, samme regler som assess) og skrives i én transaksjon hos kalleren.
+    kategori = np.array([r[2] for r in rows])
+    arsforbruk = np.array([r[3] for r in rows], dtype=np.float64)
+    areal = np.array([r[4] for r in rows], dtype=np.float64)
+    fjernvarme = np.array([bool(r[5]) for r in rows])
+    res = grade_portfolio(kategori, arsforbruk, areal, fjernvarme)
+    conn.executemany(_UPSERT, [
+        (r[0], int(r[1]), str(r[2]), float(r[3]), float(r[4]), int(bool(r[5])), float(sp), float(spv), ol, nl,
+         float(t), RULES_VERSION)
+        for r, sp, spv, ol, nl, t in zip(
+            rows, res["sp"], res["sp_ny_vektet"], res["old_label"].tolist(), res["new_label"].tolist(),
+            res["tek17_diff_pct"],
+        )
+    ])
+
+
+def save_year(conn, bygg_id: str, ar: int, kategori: str, arsforbruk: float, areal: float,
+              fjernvarme: bool = False, navn: str | None = None) -> bool:
+    # Lagrer ett bygg-år. Bare denne raden karaktersettes; uendrede inndata skrives ikke.
+    # Returnerer True hvis raden ble (om)beregnet.
+    if areal <= 0 or arsforbruk < 0:
+        raise ValueError("Areal må være større enn 0 og årsforbruk kan ikke være negativt")
+    old = conn.execute(
+        "SELECT kategori, arsforbruk, areal, fjernvarme, regelverk FROM arsdata WHERE bygg_id = ? AND ar = ?",
+        (bygg_id, ar),
+    ).fetchone()
+    if old == (kategori, float(arsforbruk), float(areal), int(fjernvarme), RULES_VERSION) and not navn:
+        return False
+    with conn:
+        _upsert_building(conn, [(bygg_id, navn, kategori)])
+        a = assess(kategori, arsforbruk, areal, fjernvarme)
+        conn.execute(_UPSERT, (
+            bygg_id, int(ar), kategori, float(arsforbruk), float(areal), int(fjernvarme), a.sp, a.sp_ny_vektet,
+            a.old_label, a.new_label, a.tek17.diff_pct, RULES_VERSION,
+        ))
+    return True
+
+
+def save_years(conn, rows) -> int:
+    # Mange bygg-år på én gang (import): rader med samme inndata og regelversjon som i databasen
+    # hoppes over, resten karaktersettes samlet. rows: (bygg_id, år, kategori, årsforbruk, areal,
+    # fjernvarme[, navn]). Returnerer antall rader som ble beregnet.
+    rows = [tuple(r) + (None,) * (7 - len(r)) for r in rows]
+    if not rows:
+        return 0
+    stored = {}
+    for bygg_id in {r[0] for r in rows}:
+        for ar, *inputs in conn.execute(
+            "SELECT ar, kategori, arsforbruk, areal, fjernvarme, regelverk FROM arsdata WHERE bygg_id = ?",
+            (bygg_id,),
+        ):
+            stored[(bygg_id, ar)] = tuple(inputs)
+    changed = [
+        r for r in rows
+        if stored.get((r[0], int(r[1]))) != (r[2], float(r[3]), float(r[4]), int(bool(r[5])), RULES_VERSION)
+    ]
+    if not changed:
+        return 0
+    with conn:
+        _upsert_building(conn, [(r[0], r[6], r[2]) for r in changed])
+        _grade_and_write(conn, changed)
+    return len(changed)
+
+
+def _upsert_building(conn, rows):
+    # Kategorien på bygget følger sist lagrede år; navnet beholdes hvis det ikke er oppgitt
+    conn.executemany(
+        """INSERT INTO bygg (bygg_id, navn, kategori) VALUES (?, COALESCE(?, ''), ?)
+           ON CONFLICT (bygg_id) DO UPDATE SET
+               navn = COALESCE(NULLIF(?, ''), bygg.navn), kategori = excluded.kategori""",
+        [(b, n, k, n) for b, n, k in rows],
+    )
+
+
+def regrade_stale(conn) -> int:
+    # Regner om rader beregnet med en eldre regelversjon (f.eks. etter nye terskler)
+    stale = conn.execute(
+        "SELECT bygg_id, ar, kategori, arsforbruk, areal, fjernvarme FROM arsdata WHERE regelverk != ?",
+        (RULES_VERSION,),
+    ).fetchall()
+    if stale:
+        with conn:
+            _grade_and_write(conn, stale)
+    return len(stale)
+
+
+def delete_year(conn, bygg_id: str, ar: int):
+    with conn:
+        conn.execute("DELETE FROM arsdata WHERE bygg_id = ? AND ar = ?", (bygg_id, ar))
+
+
+# ---------- spørringer ----------
+def building_history(conn, bygg_id: str) -> list[YearRow]:
+    # Primærnøkkelen (bygg_id, ar) gir radene sortert på år uten egen sortering
+    return [
+        YearRow(ar, k, e, m, bool(f), sp, spv, ol, nl, t)
+        for ar, k, e, m, f, sp, spv, ol, nl, t in conn.execute(
+            """SELECT ar, kategori, arsforbruk, areal, fjernvarme, sp, sp_ny_vektet, old_label, new_label,
+                      tek17_diff_pct
+               FROM arsdata WHERE bygg_id = ? ORDER BY ar""",
+            (bygg_id,),
+        )
+    ]
+
+
+def find_buildings(conn, prefix: str = "", limit: int = 50) -> list[tuple[str, str, str]]:
+    # (bygg_id, navn, kategori) for ID-er som starter med prefix – områdesøk i primærnøkkelen
+    if not prefix:
+        return conn.execute("SELECT bygg_id, navn, kategori FROM bygg ORDER BY bygg_id LIMIT ?", (limit,)).fetchall()
+    return conn.execute(
+        "SELECT bygg_id, navn, kategori FROM bygg WHERE bygg_id >= ? AND bygg_id < ? ORDER BY bygg_id LIMIT ?",
+        (prefix, prefix + "\U0010ffff", limit),
+    ).fetchall()
+
+
+def category_trend(conn, kategori: str) -> list[TrendRow]:
+    # Antall bygg, snitt kWh/m² og karakterfordeling pr. år for én kategori (kun dekkende indeks)
+    rows = conn.execute(
+        """SELECT ar, old_label, new_label, COUNT(*), SUM(sp)
+           FROM arsdata WHERE kategori = ? GROUP BY ar, old_label, new_label""",
+        (kategori,),
+    ).fetchall()
+    years: dict[int, list] = {}
+    for ar, ol, nl, n, sp_sum in rows:
+        y = years.setdefault(ar, [0, 0.0, dict.fromkeys(GRADES, 0), dict.fromkeys(GRADES, 0)])
+        y[0] += n
+        y[1] += sp_sum
+        y[2][ol] += n
+        y[3][nl] += n
+    return [TrendRow(ar, n, s / n, old, new) for ar, (n, s, old, new) in sorted(years.items())]
+
+
+def trend_data(history: list[YearRow]):
+    # Felles data for PNG- og Vega-figuren: (år, kWh/m², karakterindeks gammel, karakterindeks ny)
+    return (
+        [r.ar for r in history], [r.sp for r in history],
+        [GRADES.index(r.old_label) for r in history], [GRADES.index(r.new_label) for r in history],
+    )
@@ -0,0 +1,222 @@
+# energisjekk/importer.py
+# Lesing av porteføljefiler (CSV/Excel) i biter, slik at minnebruken styres av
+# chunksize og ikke av filstørrelsen. Hver bit karaktersettes med grade_portfolio.
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from energisjekk.degreedays import available as degreedays_available
+from energisjekk.degreedays import normalize
+from energisjekk.metrics import BATCH_ROWS, GRADING_SECONDS
+from energisjekk.parsing import parse_numbers
+from energisjekk.portfolio import grade_portfolio
+
+CHUNKSIZE = 50_000
+
+# Godtatte kolonnenavn (små bokstaver, uten mellomrom) -> internt navn
+COLUMN_ALIASES = {
+    "kategori": "kategori", "bygningskategori": "kategori",
+    "årsforbruk": "arsforbruk", "arsforbruk": "arsforbruk", "årsforbruk(kwh)": "arsforbruk",
+    "forbruk": "arsforbruk", "kwh": "arsforbruk",
+    "areal": "areal", "oppvarmetareal": "areal", "bra": "areal", "areal(m²bra)": "areal",
+    "fjernvarme": "fjernvarme",
+    "sted": "sted", "lokasjon": "sted", "kommune": "sted",
+    "år": "ar", "ar": "ar", "year": "ar",
+}
+REQUIRED = ("kategori", "arsforbruk", "areal")
+TRUTHY = {"1", "ja", "j", "x", "true", "sann", "yes", "y"}
+
+RESULT_COLUMNS = (
+    "sp", "sp_ny_vektet", "old_label", "new_label", "delta",
+    "better_label", "needed_kwh_m2", "needed_pct", "needed_kwh_tot", "tek17_diff_pct",
+)
+# Legges til når filen har kolonnene sted og år og en graddagstabell er konfigurert
+# (graddagskorrigert mot normalår, se energisjekk.degreedays)
+NORMALIZED_COLUMNS = ("arsforbruk_normalisert", "old_label_normalisert", "new_label_normalisert")
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    rename = {}
+    for col in df.columns:
+        key = str(col).strip().lower().replace(" ", "")
+        if key in COLUMN_ALIASES:
+            rename[col] = COLUMN_ALIASES[key]
+    df = df.rename(columns=rename)
+    missing = [c for c in REQUIRED if c not in df.columns]
+    if missing:
+        raise ValueError(f"Mangler kolonne(r): {', '.join(missing)}")
+    return df
+
+
+def _sniff_sep(head: str) -> str:
+    # Norske eksporter bruker ofte semikolon (komma er desimaltegn)
+    try:
+        return csv.Sniffer().sniff(head, delimiters=";,\t").delimiter
+    except csv.Error:
+        return ";" if head.count(";") > head.count(",") else ","
+
+
+def iter_csv(file, chunksize: int = CHUNKSIZE):
+    if hasattr(file, "peek"):
+        head = file.peek(64 * 1024)[:64 * 1024]  # fungerer også for stdin (ikke søkbar)
+    else:
+        head = file.read(64 * 1024)
+        file.seek(0)
+    if isinstance(head, bytes):
+        head = head.decode("utf-8-sig", errors="replace")
+    sep = _sniff_sep(head.split("\n", 1)[0] + "\n")
+    # Alt leses som tekst; tall tolkes i energisjekk.parsing (mellomrom/desimalkomma/enheter)
+    reader = pd.read_csv(
+        file, sep=sep, chunksize=chunksize,
+        dtype=str, keep_default_na=False, encoding="utf-8-sig",
+    )
+    for chunk in reader:
+        yield chunk
+
+
+def iter_excel(file, chunksize: int = CHUNKSIZE):
+    # read_only gir radvis strømming i openpyxl i stedet for å bygge hele arbeidsboken i minnet
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h) if h is not None else "" for h in next(rows)]
+        buf = []
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= chunksize:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+    finally:
+        wb.close()
+
+
+def iter_parquet(file, chunksize: int = CHUNKSIZE):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(file).iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def iter_chunks(file, filename: str, chunksize: int = CHUNKSIZE):
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        yield from iter_excel(file, chunksize)
+    elif filename.lower().endswith(".parquet"):
+        yield from iter_parquet(file, chunksize)
+    else:
+        yield from iter_csv(file, chunksize)
+
+
+def to_number(col: pd.Series) -> np.ndarray:
+    # Tomme og ugyldige celler blir NaN; se energisjekk.parsing for formatene som godtas
+    return parse_numbers(col).values
+
+
+def _row_errors(fields, invalid_areal) -> np.ndarray:
+    # Én feiltekst pr. rad ("" for gyldige rader). Bare radene med feil bygges i Python.
+    n = len(invalid_areal)
+    bad = invalid_areal.copy()
+    for _, parsed, _ in fields:
+        bad |= parsed.empty | parsed.invalid
+    out = np.full(n, "", dtype=object)
+    for i in np.flatnonzero(bad):
+        msgs = []
+        for label, parsed, raw in fields:
+            if parsed.empty[i]:
+                msgs.append(f"{label} mangler")
+            elif parsed.invalid[i]:
+                msgs.append(f"{label}: ugyldig tall «{raw.iat[i]}»")
+        if not msgs and invalid_areal[i]:
+            msgs.append("areal må være større enn 0")
+        out[i] = "; ".join(msgs)
+    return out
+
+
+def parse_flags(col: pd.Series) -> np.ndarray:
+    # Ja/nei-kolonne. Tall teller som ja når de er endelige og ulik 0 – Excel gjør en kolonne med
+    # 1 og tomme celler til float, så 1 kommer inn som 1.0 og ikke som teksten "1"
+    values = parse_numbers(col).values
+    text = col.astype("str").str.strip().str.lower()
+    return text.isin(TRUTHY).to_numpy(dtype=bool) | (np.isfinite(values) & (values != 0))
+
+
+def grade_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Beregningen bruker de interne kolonnenavnene; resultatet beholder brukerens egne
+    # kolonneoverskrifter med resultatkolonnene lagt til bak
+    df = normalize_columns(chunk)
+    fjernvarme = parse_flags(df["fjernvarme"]) if "fjernvarme" in df.columns else False
+    forbruk_tall, areal_tall = parse_numbers(df["arsforbruk"]), parse_numbers(df["areal"])
+    arsforbruk, areal = forbruk_tall.values, areal_tall.values
+    with np.errstate(divide="ignore", invalid="ignore"), GRADING_SECONDS.time(kind="batch"):
+        res = grade_portfolio(
+            df["kategori"].astype(str).str.strip().to_numpy(), arsforbruk, areal, fjernvarme
+        )
+    out = chunk.copy()
+    for name in RESULT_COLUMNS:
+        values = res[name]
+        if values.dtype.kind == "f":
+            values = np.round(values, 1)
+        elif values.dtype.kind == "i":
+            values = pd.array(values, dtype="Int64")  # tåler tomme felt for ugyldige rader
+        out[name] = values
+    result_columns = list(RESULT_COLUMNS)
+    if "sted" in df.columns and "ar" in df.columns and degreedays_available():
+        kategori = df["kategori"].astype(str).str.strip().to_numpy()
+        sted = df["sted"].astype(str).str.strip().to_numpy()
+        normalisert = normalize(kategori, arsforbruk, sted, to_number(df["ar"]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            res_n = grade_portfolio(kategori, normalisert, areal, fjernvarme)
+        ukjent = ~np.isfinite(normalisert)  # sted/år mangler i graddagstabellen
+        out["arsforbruk_normalisert"] = np.round(normalisert)
+        out["old_label_normalisert"] = np.where(ukjent, None, res_n["old_label"])
+        out["new_label_normalisert"] = np.where(ukjent, None, res_n["new_label"])
+        result_columns += NORMALIZED_COLUMNS
+    # Rader uten gyldig forbruk/areal får tomme resultatfelt i stedet for falske karakterer
+    invalid = ~np.isfinite(arsforbruk) | ~np.isfinite(areal) | (areal <= 0)
+    n_invalid = int(invalid.sum())
+    if n_invalid:
+        out.loc[invalid, result_columns] = None
+    # Alltid med (også tom), så alle biter i samme fil har like kolonner
+    out["feil"] = _row_errors(
+        [("årsforbruk", forbruk_tall, df["arsforbruk"]), ("areal", areal_tall, df["areal"])],
+        np.isfinite(areal) & (areal <= 0),
+    )
+    BATCH_ROWS.inc(len(out) - n_invalid, status="ok")
+    BATCH_ROWS.inc(n_invalid, status="invalid")
+    return out
+
+
+def write_csv(df: pd.DataFrame, out, header: bool):
+    # Samme format som norske regneark forventer: semikolon og desimalkomma
+    df.to_csv(out, sep=";", decimal=",", index=False, header=header)
+
+
+def grade_file(file, filename: str, out, chunksize: int = CHUNKSIZE, progress=None) -> int:
+    # Karaktersetter hele filen bit for bit og skriver resultat-CSV til `out`.
+    # progress(andel_ferdig, rader) kalles etter hver bit. Returnerer antall rader.
+    size = _size(file)
+    rows = 0
+    for i, chunk in enumerate(iter_chunks(file, filename, chunksize)):
+        graded = grade_chunk(chunk)
+        write_csv(graded, out, header=(i == 0))
+        rows += len(graded)
+        if progress is not None:
+            done = min(file.tell() / size, 1.0) if size and hasattr(file, "tell") else 0.0
+            progress(done, rows)
+    return rows
+
+
+def _size(file) -> int:
+    try:
+        pos = file.tell()
+        file.seek(0, io.SEEK_END)
+        size = file.tell()
+        file.seek(pos)
+        return size
+    except (AttributeError, OSError):
+        return 0
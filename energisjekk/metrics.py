@@ -0,0 +1,234 @@
+# energisjekk/metrics.py
+# Prosessvide måletall (tellere og latenshistogrammer) for alle sesjoner, i Prometheus-tekstformat.
+# Eksporteres på et lokalt HTTP-endepunkt (ENERGISJEKK_METRICS_PORT) og/eller skrives
+# jevnlig til fil (ENERGISJEKK_METRICS_FILE, hvert ENERGISJEKK_METRICS_INTERVAL sekund).
+# Kun standardbiblioteket.
+import contextlib
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Sekunder – dekker alt fra cache-oppslag til en treg rendering
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+def _num(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monoton teller, valgfritt med etiketter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels[n] for n in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}_total{_labels(self.labelnames, key)} {_num(value)}"
+
+
+class Histogram:
+    """Latenshistogram med faste bøtter (sekunder)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {}  # etiketter -> [telling pr. bøtte ..., sum, antall]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t, **labels)
+
+    def count(self, **labels) -> int:
+        row = self._values.get(tuple(labels[n] for n in self.labelnames))
+        return row[-1] if row else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        names = self.labelnames + ("le",)
+        for key, row in items:
+            cumulative = 0
+            for upper, n in zip(self.buckets, row):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(names, key + (_num(upper),))} {cumulative}"
+            yield f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {row[-1]}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_num(row[-2])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {row[-1]}"
+
+
+class Registry:
+    """Samling av måletall; collectors leses først når noen henter måletallene."""
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            # Streamlit kjører skriptet på nytt: samme navn gir samme måletall
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collect):
+        # collect() -> iterable av (navn, type, hjelpetekst, [(etiketter, verdi), ...])
+        with self._lock:
+            if collect not in self._collectors:
+                self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for m in metrics:
+            # Tellere eksponeres som <navn>_total (samme som prometheus_client i tekstformat 0.0.4)
+            name = f"{m.name}_total" if m.kind == "counter" else m.name
+            lines.append(f"# HELP {name} {m.help}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            lines.extend(m.samples())
+        for collect in collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+RERUNS = REGISTRY.counter("energisjekk_reruns", "Antall kjøringer av Streamlit-skriptet.")
+RERUN_SECONDS = REGISTRY.histogram("energisjekk_rerun_seconds", "Tid for en hel kjøring av skriptet.")
+RENDERS = REGISTRY.counter("energisjekk_chart_renders", "Figurer tegnet (cache-bom).", ("chart",))
+RENDER_SECONDS = REGISTRY.histogram(
+    "energisjekk_chart_render_seconds", "Tid for å tegne og lagre en figur som PNG.", ("chart",)
+)
+GRADING_SECONDS = REGISTRY.histogram(
+    "energisjekk_grading_seconds", "Tid for karakterberegning (ett bygg eller én bit av en fil).", ("kind",)
+)
+BATCH_ROWS = REGISTRY.counter("energisjekk_batch_rows", "Rader karaktersatt fra opplastede filer.", ("status",))
+ERRORS = REGISTRY.counter("energisjekk_errors", "Feil og fallback-situasjoner.", ("kind",))
+
+
+# ---------- Eksport ----------
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="energisjekk-metrics", daemon=True).start()
+    return server
+
+
+def write_file(path: str):
+    # Skriv til midlertidig fil og bytt om – den som leser ser aldri en halvskrevet fil
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp, path)
+
+
+def start_file_writer(path: str, interval: float = 15.0) -> threading.Thread:
+    def loop():
+        while True:
+            try:
+                write_file(path)
+            except OSError:
+                ERRORS.inc(kind="metrics_file")
+            time.sleep(interval)
+
+    t = threading.Thread(target=loop, name="energisjekk-metrics-file", daemon=True)
+    t.start()
+    return t
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_exporters():
+    # Startes én gang pr. prosess ut fra miljøvariablene; uten variabler skjer ingenting
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    port = os.environ.get("ENERGISJEKK_METRICS_PORT")
+    if port:
+        try:
+            start_http_server(int(port), os.environ.get("ENERGISJEKK_METRICS_ADDR", "127.0.0.1"))
+        except OSError:
+            ERRORS.inc(kind="metrics_port")
+    path = os.environ.get("ENERGISJEKK_METRICS_FILE")
+    if path:
+        start_file_writer(path, float(os.environ.get("ENERGISJEKK_METRICS_INTERVAL", "15")))
@@ -0,0 +1,106 @@
+# energisjekk/montecarlo.py
+# Monte Carlo-simulering av besparelse for en kombinasjon av tiltak. Hvert tiltak trekker
+# en besparelse jevnt fordelt i sitt intervall (SAVINGS) på formålene det gjelder; flere
+# tiltak på samme formål virker multiplikativt (restforbruk = produktet av (1 - besparelse)).
+# Trekkene avhenger kun av (kategori, tiltak) og caches; bygget (årsforbruk, areal,
+# fjernvarme) legges på etterpå som en billig vektoroperasjon.
+import zlib
+from typing import NamedTuple
+
+import numpy as np
+
+from energisjekk.cache import LRUCache
+from energisjekk.core.data import CORRECTED_SHARES, FALLBACK_CATEGORY, FJERNVARME_FAKTOR, FORMAL_ORDER, GRADES
+from energisjekk.core.grading import heating_share
+from energisjekk.core.tiltak import SAVINGS
+from energisjekk.portfolio import NEW_MATRIX, OLD_MATRIX, category_codes
+
+SAMPLES = 20_000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_HEAT = FORMAL_ORDER.index("Oppvarming")
+
+CACHE = LRUCache(maxsize=64)
+
+
+class Simulation(NamedTuple):
+    kategori: str
+    measures: tuple[str, ...]
+    kwh: np.ndarray          # (trekk,) levert energi pr. år etter tiltakene
+    percentiles: dict        # persentil -> kWh/år
+    old_prob: np.ndarray     # (karakter,) sannsynlighet for hver karakter A..G, gammel ordning
+    new_prob: np.ndarray     # (karakter,) ny ordning (med fjernvarmevekting hvis valgt)
+    new_reach: np.ndarray    # (karakter,) sannsynlighet for minst denne karakteren, ny ordning
+
+
+def effective_measures(measures) -> tuple[str, ...]:
+    # Tiltak uten energieffekt i tabellen (effektledd, solceller) påvirker ikke trekkene
+    return tuple(sorted(m for m in set(measures) if SAVINGS.get(m) is not None))
+
+
+def measure_matrix(measures: tuple[str, ...]):
+    # (nedre, øvre) besparelse pr. tiltak og (tiltak x formål)-matrise med 1 der tiltaket virker
+    low = np.array([SAVINGS[m].low for m in measures])
+    high = np.array([SAVINGS[m].high for m in measures])
+    hits = np.array(
+        [[e in SAVINGS[m].end_uses for e in FORMAL_ORDER] for m in measures], dtype=np.float64
+    ).reshape(len(measures), len(FORMAL_ORDER))
+    return low, high, hits
+
+
+def _shares(kategori: str) -> np.ndarray:
+    shares = CORRECTED_SHARES.get(kategori, CORRECTED_SHARES[FALLBACK_CATEGORY])
+    w = np.array([shares[e] for e in FORMAL_ORDER], dtype=np.float64)
+    return w / w.sum()
+
+
+def _draw(kategori: str, measures: tuple[str, ...], samples: int):
+    # Restandel av totalforbruket og av oppvarmingen for hvert trekk
+    if not measures:
+        ones = np.ones(samples)
+        return ones, ones
+    low, high, hits = measure_matrix(measures)
+    rng = np.random.default_rng(zlib.crc32(repr((kategori, measures, samples)).encode()))
+    savings = rng.uniform(low, high, size=(samples, len(measures)))
+    remaining = np.exp(np.log1p(-savings) @ hits)  # (trekk, formål)
+    total = remaining @ _shares(kategori)
+    heat = remaining[:, _HEAT].copy()
+    total.flags.writeable = False
+    heat.flags.writeable = False
+    return total, heat
+
+
+def draws(kategori: str, measures, samples: int = SAMPLES):
+    measures = effective_measures(measures)
+    return CACHE.get_or_compute((kategori, measures, samples), lambda: _draw(kategori, measures, samples))
+
+
+def _grade_prob(sp: np.ndarray, limits: np.ndarray) -> np.ndarray:
+    idx = np.searchsorted(limits, sp, side="left")  # sp <= grense -> karakter, som energy_label
+    return np.bincount(idx, minlength=len(GRADES)) / len(sp)
+
+
+def simulate(kategori: str, arsforbruk: float, areal: float, measures,
+             har_fjernvarme: bool = False, samples: int = SAMPLES) -> Simulation:
+    total, heat = draws(kategori, measures, samples)
+    code = int(category_codes([kategori])[0])
+
+    kwh = arsforbruk * total
+    sp = kwh / areal
+    if har_fjernvarme:
+        # Som weighted_sp, men med oppvarmingen etter tiltakene
+        opp = arsforbruk * heating_share(kategori) * heat / areal
+        sp_ny = sp - opp + opp * FJERNVARME_FAKTOR
+    else:
+        sp_ny = sp
+
+    new_prob = _grade_prob(sp_ny, NEW_MATRIX[code])
+    return Simulation(
+        kategori=kategori,
+        measures=effective_measures(measures),
+        kwh=kwh,
+        percentiles=dict(zip(PERCENTILES, np.percentile(kwh, PERCENTILES).tolist())),
+        old_prob=_grade_prob(sp, OLD_MATRIX[code]),
+        new_prob=new_prob,
+        new_reach=np.cumsum(new_prob),
+    )
@@ -0,0 +1,225 @@
+# energisjekk/optimizer.py
+# Minste (eller billigste) sett av anbefalte tiltak som forventes å gi en målkarakter i ny ordning.
+# Forventet effekt = midtpunktet i besparelsesintervallet (SAVINGS); tiltak på samme formål
+# virker multiplikativt, som i energisjekk.montecarlo.
+#
+# Vektet restandel f(S) = sum_e w_e * rest_e(S) er lineær i restforbruket pr. formål med
+# positive vekter, så et tiltak sparer aldri mer når flere tiltak allerede er valgt. Summen av
+# enkelttiltakenes marginale besparelse i en node er derfor en gyldig øvre grense for hva de
+# resterende tiltakene kan spare – det er den branch-and-bound beskjærer på.
+from typing import Mapping, NamedTuple, Optional
+
+import numpy as np
+
+from energisjekk.cache import LRUCache
+from energisjekk.core.data import (
+    CATEGORIES, CORRECTED_SHARES, FALLBACK_CATEGORY, FJERNVARME_FAKTOR, FORMAL_ORDER, GRADES,
+)
+from energisjekk.core.grading import heating_share
+from energisjekk.core.tiltak import SAVINGS, recommended
+from energisjekk.portfolio import NEW_MATRIX, category_codes
+
+_HEAT = FORMAL_ORDER.index("Oppvarming")
+_EPS = 1e-12
+
+FRONTIERS = LRUCache(maxsize=64)
+
+
+class Plan(NamedTuple):
+    measures: tuple[str, ...]
+    cost: float
+    expected_kwh: float
+    expected_label: str
+    reached: bool
+
+
+class _Model:
+    # Tiltakenes forventede effekt for én kategori, med eller uten fjernvarmevekting
+    __slots__ = ("measures", "mids", "uses", "weights", "plain")
+
+    def __init__(self, kategori: str, har_fjernvarme: bool, measures):
+        shares = CORRECTED_SHARES.get(kategori, CORRECTED_SHARES[FALLBACK_CATEGORY])
+        plain = [shares[e] for e in FORMAL_ORDER]
+        total = sum(plain)
+        self.plain = [s / total for s in plain]  # uvektet: restandel av levert energi
+        self.weights = list(self.plain)
+        if har_fjernvarme:
+            # Som weighted_sp: oppvarmingsdelen vektes med FJERNVARME_FAKTOR
+            self.weights[_HEAT] -= heating_share(kategori) * (1 - FJERNVARME_FAKTOR)
+        effective = [m for m in dict.fromkeys(measures) if SAVINGS.get(m) is not None]
+        # Sterkeste tiltak først gir gode løsninger tidlig og dermed mer beskjæring
+        effective.sort(key=lambda m: -self.marginal_of(m, [1.0] * len(FORMAL_ORDER)))
+        self.measures = tuple(effective)
+        self.mids = [(SAVINGS[m].low + SAVINGS[m].high) / 2 for m in effective]
+        self.uses = [tuple(FORMAL_ORDER.index(e) for e in SAVINGS[m].end_uses) for m in effective]
+
+    def marginal_of(self, m: str, rest) -> float:
+        r = SAVINGS[m]
+        return (r.low + r.high) / 2 * sum(self.weights[FORMAL_ORDER.index(e)] * rest[FORMAL_ORDER.index(e)]
+                                          for e in r.end_uses)
+
+    def marginal(self, i: int, rest) -> float:
+        return self.mids[i] * sum(self.weights[e] * rest[e] for e in self.uses[i])
+
+    def apply(self, i: int, rest) -> list:
+        rest = list(rest)
+        for e in self.uses[i]:
+            rest[e] *= 1 - self.mids[i]
+        return rest
+
+    def value(self, rest) -> float:
+        return sum(w * r for w, r in zip(self.weights, rest))
+
+    def remaining_kwh(self, chosen) -> float:
+        rest = [1.0] * len(FORMAL_ORDER)
+        for i in chosen:
+            rest = self.apply(i, rest)
+        return sum(w * r for w, r in zip(self.plain, rest))
+
+
+def _best_of_size(model: _Model, k: int, start: float):
+    # Laveste vektede restandel med høyst k tiltak (branch-and-bound, inkluder/utelat)
+    n = len(model.measures)
+    best = [start, ()]
+
+    def search(i, chosen, rest, value):
+        if value < best[0] - _EPS:
+            best[0], best[1] = value, chosen
+        left = k - len(chosen)
+        if left == 0 or i == n:
+            return
+        gains = sorted((model.marginal(j, rest) for j in range(i, n)), reverse=True)
+        if value - sum(gains[:left]) >= best[0] - _EPS:
+            return
+        new_rest = model.apply(i, rest)
+        search(i + 1, chosen + (i,), new_rest, model.value(new_rest))
+        search(i + 1, chosen, rest, value)
+
+    search(0, (), [1.0] * len(FORMAL_ORDER), start)
+    return best[0], best[1]
+
+
+def _frontier(kategori: str, har_fjernvarme: bool, measures: tuple[str, ...]):
+    # For k = 0..n: laveste vektede restandel med høyst k tiltak og settet som gir den
+    model = _Model(kategori, har_fjernvarme, measures)
+    values, sets = [model.value([1.0] * len(FORMAL_ORDER))], [()]
+    for k in range(1, len(model.measures) + 1):
+        value, chosen = _best_of_size(model, k, values[-1])
+        if value >= values[-1] - _EPS:
+            break  # flere tiltak hjelper ikke (alle med effekt er allerede med)
+        values.append(value)
+        sets.append(chosen)
+    return model, np.array(values), tuple(sets)
+
+
+def frontier(kategori: str, har_fjernvarme: bool = False, measures=None):
+    measures = tuple(recommended(kategori) if measures is None else measures)
+    return FRONTIERS.get_or_compute(
+        (kategori, har_fjernvarme, measures), lambda: _frontier(kategori, har_fjernvarme, measures)
+    )
+
+
+def _cheapest(model: _Model, ratio: float, costs: Mapping[str, float]):
+    # Billigste sett med vektet restandel <= ratio. Nedre grense for kostnaden i en node:
+    # fraksjonell ryggsekk over marginal besparelse pr. krone (gyldig fordi besparelsene avtar).
+    n = len(model.measures)
+    cost = [float(costs.get(m, 0.0)) for m in model.measures]
+    best = [float("inf"), None]
+
+    def search(i, chosen, spent, rest, value):
+        if value <= ratio + _EPS:
+            if spent < best[0]:
+                best[0], best[1] = spent, chosen
+            return
+        if i == n:
+            return
+        gap = value - ratio
+        cand = sorted(
+            ((model.marginal(j, rest), cost[j]) for j in range(i, n)),
+            key=lambda gc: gc[1] / gc[0] if gc[0] > 0 else float("inf"),
+        )
+        bound, need = spent, gap
+        for gain, c in cand:
+            if gain <= 0:
+                continue
+            if gain >= need:
+                bound += c * need / gain
+                need = 0.0
+                break
+            bound += c
+            need -= gain
+        if need > _EPS or bound >= best[0]:
+            return  # uoppnåelig eller ikke billigere enn beste kjente
+        new_rest = model.apply(i, rest)
+        search(i + 1, chosen + (i,), spent + cost[i], new_rest, model.value(new_rest))
+        search(i + 1, chosen, spent, rest, value)
+
+    search(0, (), 0.0, [1.0] * len(FORMAL_ORDER), model.value([1.0] * len(FORMAL_ORDER)))
+    return best[1], best[0]
+
+
+def minimum_measures(kategori: str, arsforbruk: float, areal: float, target: str,
+                     har_fjernvarme: bool = False, costs: Optional[Mapping[str, float]] = None,
+                     measures=None) -> Plan:
+    # Færrest tiltak (costs=None) eller lavest sum av costs[tiltak] som forventes å gi
+    # karakteren target eller bedre i ny ordning. reached=False: selv alle tiltakene er ikke nok.
+    model, values, sets = frontier(kategori, har_fjernvarme, measures)
+    code = int(category_codes([kategori])[0])
+    sp = arsforbruk / areal
+    ratio = NEW_MATRIX[code, GRADES.index(target)] / sp if sp > 0 and target != "G" else float("inf")
+
+    if costs is None:
+        k = int(np.searchsorted(-values, -ratio, side="left"))
+        reached = k < len(values)
+        chosen = sets[min(k, len(sets) - 1)]
+        cost = float(len(chosen))
+    else:
+        chosen, cost = _cheapest(model, ratio, costs)
+        reached = chosen is not None
+        if not reached:
+            chosen, cost = sets[-1], float(sum(costs.get(model.measures[i], 0.0) for i in sets[-1]))
+
+    rest = [1.0] * len(FORMAL_ORDER)
+    for i in chosen:
+        rest = model.apply(i, rest)
+    sp_vektet = sp * model.value(rest)
+    return Plan(
+        measures=tuple(model.measures[i] for i in chosen),
+        cost=cost,
+        expected_kwh=arsforbruk * model.remaining_kwh(chosen),
+        expected_label=GRADES[int(np.searchsorted(NEW_MATRIX[code], sp_vektet, side="left"))],
+        reached=reached,
+    )
+
+
+def minimum_measures_portfolio(kategori, arsforbruk, areal, target: str, fjernvarme=False) -> dict[str, np.ndarray]:
+    # Batch-variant (færrest tiltak): én frontier pr. (kategori, fjernvarme), deretter ett
+    # searchsorted-kall pr. gruppe. n_tiltak = -1 betyr at målet ikke nås med anbefalte tiltak.
+    kategori = np.asarray(kategori)
+    codes = category_codes(kategori)
+    arsforbruk = np.asarray(arsforbruk, dtype=np.float64)
+    areal = np.asarray(areal, dtype=np.float64)
+    fjernvarme = np.broadcast_to(np.asarray(fjernvarme, dtype=bool), codes.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = NEW_MATRIX[codes, GRADES.index(target)] / (arsforbruk / areal) if target != "G" \
+            else np.full(codes.shape, np.inf)
+
+    n_tiltak = np.full(codes.shape, -1, dtype=np.int64)
+    forventet = np.full(codes.shape, np.nan)
+    tiltak = np.full(codes.shape, "", dtype=object)
+    for code in np.unique(codes):
+        for fjv in (False, True):
+            rows = np.flatnonzero((codes == code) & (fjernvarme == fjv))
+            if rows.size == 0:
+                continue
+            # Ukjente kategorier har samme kode som fallback-kategorien
+            model, values, sets = frontier(CATEGORIES[code], fjv)
+            k = np.searchsorted(-values, -ratio[rows], side="left")
+            ok = (k < len(values)) & np.isfinite(ratio[rows])
+            k_ok = np.minimum(k, len(values) - 1)
+            n_tiltak[rows] = np.where(ok, k_ok, -1)
+            remaining = np.array([model.remaining_kwh(s) for s in sets])
+            forventet[rows] = np.where(ok, arsforbruk[rows] * remaining[k_ok], np.nan)
+            labels = np.array([" + ".join(model.measures[i] for i in s) for s in sets], dtype=object)
+            tiltak[rows] = np.where(ok, labels[k_ok], "")
+    return {"n_tiltak": n_tiltak, "tiltak": tiltak, "forventet_kwh": forventet}
@@ -0,0 +1,133 @@
+# energisjekk/parsing.py
+# Tolking av tall slik de står i norske regneark og eksporter: mellomrom (også hardt mellomrom)
+# som tusenskille, desimalkomma, enhet bak tallet og tomme celler.
+#
+#   "1 234 567,5"  "1.234.567,5"  "12,5 kWh"  "1,2 MWh"  "3 000 m²"  "-40"  ""  "-"
+#
+# parse_numbers tar en hel kolonne: celler som allerede er rene tall (også "12,5") tas i én
+# omgang, og bare resten går gjennom opprydningen. Tomme celler gir NaN uten å regnes som feil;
+# celler som ikke kan tolkes merkes pr. rad i `invalid`.
+import re
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Mellomrom som brukes som tusenskille: vanlig, tab, hardt (U+00A0), tall-mellomrom (U+2007) og
+# smalt hardt (U+202F). Listes eksplisitt: \s i pyarrow-strengers regex (RE2) dekker bare ASCII.
+_SPACES = " \t\u00a0\u2007\u202f"
+# Enhet til slutt (små bokstaver) -> faktor til kWh eller m²
+UNITS = {"kwh": 1.0, "mwh": 1e3, "gwh": 1e6, "m²": 1.0, "m2": 1.0, "kvm": 1.0}
+_UNIT_RE = "(" + "|".join(UNITS) + ")(?:/år|/m²|bra)?$"
+EMPTY = ("", "-", "–", "—")
+
+# Gyldig tall etter opprydning, og de to formatene der punktum/komma er tusenskille:
+# "1.234.567,5" / "1.234,5" (norsk regneark) og "1,234,567" (minst to komma – ellers desimalkomma)
+_NUMBER = r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?"
+_DOT_THOUSANDS = r"[-+]?\d{1,3}(\.\d{3})+,\d*|[-+]?\d{1,3}(\.\d{3}){2,}"
+_COMMA_THOUSANDS = r"[-+]?\d{1,3}(,\d{3}){2,}(\.\d*)?"
+
+_SCALAR_SPACES = re.compile(f"[{_SPACES}]")
+_SCALAR_UNIT = re.compile(_UNIT_RE)
+_SCALAR_NUMBER = re.compile(_NUMBER)
+_SCALAR_DOT_THOUSANDS = re.compile(_DOT_THOUSANDS)
+_SCALAR_COMMA_THOUSANDS = re.compile(_COMMA_THOUSANDS)
+
+
+class ParsedNumbers(NamedTuple):
+    values: np.ndarray    # float64, NaN for tomme og ugyldige celler
+    empty: np.ndarray     # bool: tom celle (mangler verdi)
+    invalid: np.ndarray   # bool: ikke-tom celle som ikke kunne tolkes som et endelig tall
+
+
+def parse_numbers(col) -> ParsedNumbers:
+    col = col if isinstance(col, pd.Series) else pd.Series(col)
+    if pd.api.types.is_bool_dtype(col):
+        col = col.astype(object)
+    if pd.api.types.is_numeric_dtype(col):
+        values = col.to_numpy(dtype=np.float64, na_value=np.nan)
+        empty = np.isnan(values)
+        invalid = ~empty & ~np.isfinite(values)
+        return ParsedNumbers(np.where(invalid, np.nan, values), empty, invalid)
+
+    # Excel-biter er objektkolonner med blandede tall, tekst og None
+    text = col.astype("str").str.strip()
+    empty = text.isna().to_numpy() | text.isin(EMPTY).to_numpy()
+    # Rask vei: rene tall, med desimalpunktum eller -komma
+    values = _to_float(text.str.replace(",", ".", regex=False))
+    rest = np.flatnonzero(np.isnan(values) & ~empty)
+    if len(rest):
+        values[rest] = _clean(text.iloc[rest])
+    invalid = ~empty & ~np.isfinite(values)
+    values[invalid] = np.nan
+    return ParsedNumbers(values, empty, invalid)
+
+
+def _to_float(t: pd.Series) -> np.ndarray:
+    # Bare strenger som er gyldige tall konverteres; resten blir NaN. pyarrow (valgfri) kaster
+    # en hel kolonne til float langt raskere enn pandas' astype, og pd.to_numeric(errors="coerce")
+    # går rad for rad.
+    t = t.where(t.str.fullmatch(_NUMBER).fillna(False).astype(bool))
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return t.astype(np.float64).to_numpy(copy=True)
+    # null -> NaN; kopien gjør at resultatet kan skrives til (pyarrow gir skrivebeskyttede visninger)
+    floats = pa.array(t, type=pa.string(), from_pandas=True).cast(pa.float64())
+    return np.asarray(floats, dtype=np.float64).copy()
+
+
+def _clean(text: pd.Series) -> np.ndarray:
+    # Mellomrom, enhet og typografisk minus bort, deretter tusenskiller; én vektorisert
+    # operasjon pr. regel over cellene den raske veien ikke klarte. Rene tekst-erstatninger er
+    # flere ganger raskere enn regex her, så mellomrommene fjernes ett tegn om gangen.
+    t = text
+    for space in _SPACES:
+        t = t.str.replace(space, "", regex=False)
+    t = t.str.lower().str.replace("\u2212", "-", regex=False)
+    scale = np.ones(len(t))
+    with_unit = t.str.contains("[a-z²]", regex=True).fillna(False).to_numpy(dtype=bool)
+    if with_unit.any():
+        u = t[with_unit]
+        factors = np.ones(len(u))
+        for unit, factor in UNITS.items():
+            if factor != 1.0:
+                factors[u.str.contains(unit, regex=False).fillna(False).to_numpy(dtype=bool)] = factor
+        scale[with_unit] = factors
+        t = t.where(~with_unit, u.str.replace(_UNIT_RE, "", regex=True))
+
+    dots = t.str.fullmatch(_DOT_THOUSANDS).fillna(False).astype(bool)
+    commas = t.str.fullmatch(_COMMA_THOUSANDS).fillna(False).astype(bool)
+    if dots.any():
+        t = t.where(~dots, t.str.replace(".", "", regex=False))
+    if commas.any():
+        t = t.where(~commas, t.str.replace(",", "", regex=False))
+    return _to_float(t.str.replace(",", ".", regex=False)) * scale
+
+
+def parse_number(text, name: str = "verdien") -> float:
+    # Én verdi med samme regler som parse_numbers; ValueError for tomme og ugyldige verdier
+    if text is None:
+        raise ValueError(f"{name} mangler")
+    if isinstance(text, bool):
+        raise ValueError(f"{name} er ikke et tall: {text!r}")
+    if isinstance(text, (int, float)):
+        value = float(text)
+    else:
+        t = _SCALAR_SPACES.sub("", str(text)).lower().replace("\u2212", "-")
+        if t in EMPTY:
+            raise ValueError(f"{name} mangler")
+        unit = _SCALAR_UNIT.search(t)
+        scale = UNITS[unit.group(1)] if unit else 1.0
+        t = t[:unit.start()] if unit else t
+        if _SCALAR_DOT_THOUSANDS.fullmatch(t):
+            t = t.replace(".", "")
+        elif _SCALAR_COMMA_THOUSANDS.fullmatch(t):
+            t = t.replace(",", "")
+        t = t.replace(",", ".")
+        if not _SCALAR_NUMBER.fullmatch(t):
+            raise ValueError(f"{name} er ikke et tall: {text!r}")
+        value = float(t) * scale
+    if not np.isfinite(value):
+        raise ValueError(f"{name} er ikke et tall: {text!r}")
+    return value
@@ -0,0 +1,99 @@
+# energisjekk/portfolio.py
+# Vektorisert karaktersetting for hele porteføljer (tusenvis til millioner av bygg).
+# Samme regler som energisjekk.core.assess, men uten Python-løkke pr. bygg: tersklene
+# kompileres én gang til matriser (kategori x karaktergrense), og hvert bygg sammenlignes med
+# raden for sin kategori.
+import numpy as np
+
+from energisjekk.core.data import (
+    CATEGORIES, FALLBACK_CATEGORY, FJERNVARME_FAKTOR, GRADES, NEW_THRESH, OLD_THRESH,
+    SHARES, TEK17_REF,
+)
+
+_LIMITS = GRADES[:-1]  # A..F – G er alt over F
+
+# Rad i matrisene = kategoriens indeks i CATEGORIES
+OLD_MATRIX = np.array([[OLD_THRESH[k][g] for g in _LIMITS] for k in CATEGORIES], dtype=np.float64)
+NEW_MATRIX = np.array([[NEW_THRESH[k][g] for g in _LIMITS] for k in CATEGORIES], dtype=np.float64)
+HEAT_SHARE = np.array([SHARES[k]["Oppvarming"] / 100.0 for k in CATEGORIES])
+TEK17 = np.array([TEK17_REF[k] for k in CATEGORIES], dtype=np.float64)
+GRADE_ARRAY = np.array(GRADES)
+
+_CODE = {k: i for i, k in enumerate(CATEGORIES)}
+_FALLBACK_CODE = _CODE[FALLBACK_CATEGORY]
+
+
+def category_codes(kategori) -> np.ndarray:
+    # Kategorinavn -> radindeks; ukjente kategorier får samme fallback som energy_label
+    kategori = np.asarray(kategori)
+    if np.issubdtype(kategori.dtype, np.integer):
+        return kategori.astype(np.intp, copy=False)
+    # 12 vektoriserte sammenligninger er vesentlig raskere enn np.unique over strenger
+    codes = np.full(kategori.shape, _FALLBACK_CODE, dtype=np.intp)
+    for code, name in enumerate(CATEGORIES):
+        codes[kategori == name] = code
+    return codes
+
+
+def known_categories(kategori, codes: np.ndarray) -> np.ndarray:
+    # True der kategorien finnes i CATEGORIES (ikke bare fikk fallback-raden fra category_codes)
+    kategori = np.asarray(kategori)
+    if np.issubdtype(kategori.dtype, np.integer):
+        return np.ones(codes.shape, dtype=bool)
+    return (codes != _FALLBACK_CODE) | (kategori == FALLBACK_CATEGORY)
+
+
+def grade_index(sp, codes: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    # Antall grenser som er strengt mindre enn sp = karakterindeks (0=A ... 6=G),
+    # tilsvarer "sp <= grense -> karakter" i energy_label. Sammenligner sp direkte med
+    # kategoriens egne grenser, så resultatet er bitvis likt assess også på grensene.
+    # Ugyldige verdier (NaN) havner i G – kalleren må selv markere dem som ugyldige
+    sp = np.asarray(sp, dtype=np.float64)
+    idx = (sp[..., None] > matrix[codes]).sum(axis=-1)
+    return np.where(np.isnan(sp), len(_LIMITS), idx)
+
+
+def grade_portfolio(kategori, arsforbruk, areal, fjernvarme=False) -> dict[str, np.ndarray]:
+    codes = category_codes(kategori)
+    arsforbruk = np.asarray(arsforbruk, dtype=np.float64)
+    areal = np.asarray(areal, dtype=np.float64)
+    fjernvarme = np.broadcast_to(np.asarray(fjernvarme, dtype=bool), codes.shape)
+
+    sp = arsforbruk / areal
+    # Samme regnerekkefølge som weighted_sp, så grensetilfeller blir identiske
+    sp_oppvarming = sp * HEAT_SHARE[codes]
+    sp_ny_vektet = np.where(fjernvarme, sp - sp_oppvarming + sp_oppvarming * FJERNVARME_FAKTOR, sp)
+
+    old_idx = grade_index(sp, codes, OLD_MATRIX)
+    new_idx = grade_index(sp_ny_vektet, codes, NEW_MATRIX)
+
+    # Neste bedre karakter i ny ordning (ingen for A)
+    has_better = new_idx > 0
+    better_idx = np.where(has_better, new_idx - 1, 0)
+    limit = NEW_MATRIX[codes, better_idx]
+    needed_kwh_m2 = np.where(has_better, np.maximum(0.0, sp_ny_vektet - limit), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        needed_pct = np.where(sp_ny_vektet > 0, needed_kwh_m2 / sp_ny_vektet * 100, 0.0)
+    needed_pct = np.where(has_better, needed_pct, np.nan)
+
+    # Som tek17_comparison: ukjent kategori har ingen TEK17-referanse (NaN) og avvik 0,
+    # ikke fallback-kategoriens referanse
+    known = known_categories(kategori, codes)
+    tek17 = np.where(known, TEK17[codes], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tek17_diff = np.where(known, sp - tek17, 0.0)
+        tek17_diff_pct = np.where(known, tek17_diff / tek17 * 100, 0.0)
+    return {
+        "sp": sp,
+        "sp_ny_vektet": sp_ny_vektet,
+        "old_label": GRADE_ARRAY[old_idx],
+        "new_label": GRADE_ARRAY[new_idx],
+        "delta": new_idx - old_idx,
+        "better_label": np.where(has_better, GRADE_ARRAY[better_idx], ""),
+        "needed_kwh_m2": needed_kwh_m2,
+        "needed_pct": needed_pct,
+        "needed_kwh_tot": needed_kwh_m2 * areal,
+        "tek17_ref": tek17,
+        "tek17_diff": tek17_diff,
+        "tek17_diff_pct": tek17_diff_pct,
+    }
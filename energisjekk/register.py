@@ -0,0 +1,314 @@
+# energisjekk/register.py
+# Lokalt, indeksert lager av energiattester (dump av det offentlige energimerkeregisteret)
+# for sammenligning av ett bygg mot alle registrerte bygg i samme kategori.
+#
+#   energisjekk energimerker.csv --energimerker -o energimerker/      (bygg lageret)
+#   ENERGISJEKK_REGISTER=energimerker/                                 (appen finner det)
+#
+# Lageret er en mappe med .npy-filer som åpnes med minnekartlegging (mmap): bare sidene som
+# faktisk leses, hentes inn, så flere millioner attester koster nesten ikke RAM i appen.
+#   sp.npy           levert energi kWh/m² (float32), gruppert pr. kategori og sortert innenfor hver
+#   grade.npy        attestens energikarakter (0=A ... 6=G, 255 = mangler), samme rekkefølge
+#   row.npy          radnummer i labels.bin for hver posisjon
+#   addr_*/matr_*    indekser: sorterte 64-bits hasher av adresse og matrikkel (knr-gnr/bnr) -> posisjon
+#   labels.bin       adressetekster (UTF-8) etter hverandre, med label_offsets.npy
+#   meta.json        kategorier, startposisjon pr. kategori, karakterfordeling, antall rader
+# Persentiler og kvantiler er dermed ett searchsorted/oppslag i en sortert vektor.
+import json
+import os
+import re
+import shutil
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from energisjekk.core.data import CATEGORIES, GRADES
+from energisjekk.importer import CHUNKSIZE, iter_chunks, to_number
+from energisjekk.portfolio import NEW_MATRIX
+
+FORMAT_VERSION = 1
+MISSING_GRADE = 255
+
+# Kolonnenavn i registerdumpen (små bokstaver, kun bokstaver/tall) -> internt navn
+REGISTER_ALIASES = {
+    "bygningskategori": "kategori", "kategori": "kategori", "bygningstype": "kategori",
+    "beregnetlevertenergitotaltkwhm2": "sp", "levertenergikwhm2": "sp", "levertenergi": "sp",
+    "kwhm2": "sp", "spesifiktforbruk": "sp", "sp": "sp",
+    "energikarakter": "karakter", "karakter": "karakter",
+    "adresse": "adresse", "gateadresse": "adresse", "gatenavn": "gatenavn",
+    "husnummer": "husnummer", "husnr": "husnummer", "bokstav": "bokstav",
+    "postnummer": "postnummer", "postnr": "postnummer", "poststed": "poststed",
+    "kommunenummer": "knr", "knr": "knr", "kommunenr": "knr",
+    "gardsnummer": "gnr", "gårdsnummer": "gnr", "gnr": "gnr",
+    "bruksnummer": "bnr", "bnr": "bnr",
+}
+REGISTER_REQUIRED = ("kategori", "sp")
+
+# Registerets kategorinavn -> kategori i appen. Boligkategorier (småhus, boligblokk) har
+# ingen motpart og hoppes over i stedet for å havne i fallback-kategorien.
+CATEGORY_ALIASES = {
+    **{k.lower(): k for k in CATEGORIES},
+    "barnehager": "Barnehage", "kontorbygg": "Kontorbygning", "skolebygg": "Skolebygning",
+    "universitets- og høgskolebygg": "Universitets- og høgskolebygning",
+    "sykehjem": "Sykehjem", "hoteller": "Hotellbygning", "hotellbygg": "Hotellbygning",
+    "idrettsbygg": "Idrettsbygning", "forretningsbygg": "Forretningsbygning",
+    "kulturbygg": "Kulturbygning", "lett industri, verksteder": "Lett industribygning, verksted",
+    "lett industri": "Lett industribygning, verksted", "verksted": "Lett industribygning, verksted",
+}
+_CODE = {name: i for i, name in enumerate(CATEGORIES)}
+_MATRIKKEL = re.compile(r"^\s*(\d{3,4})\s*[-/ ]\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+class Match(NamedTuple):
+    label: str
+    kategori: str
+    sp: float
+    karakter: str | None   # karakter på attesten
+    percentile: float
+
+
+# ---------- nøkler ----------
+def _key_text(col: pd.Series) -> pd.Series:
+    # "Storgata 1 A" og "storgata 1a" gir samme nøkkel
+    return (
+        col.astype(str).str.lower()
+        .str.replace(r"(\d)\s+([a-zæøå])\b", r"\1\2", regex=True)
+        .str.replace(r"[^\wæøå]+", " ", regex=True).str.strip()
+    )
+
+
+def _hash(keys: pd.Series) -> np.ndarray:
+    # pandas' siphash med fast nøkkel – samme streng gir samme hash ved bygging og oppslag
+    return pd.util.hash_array(keys.to_numpy(dtype=object), categorize=False)
+
+
+def _matrikkel(knr, gnr, bnr) -> pd.Series:
+    num = [pd.Series(to_number(c), index=c.index).astype("Int64").astype(str) for c in (knr, gnr, bnr)]
+    key = num[0].str.zfill(4) + "-" + num[1] + "/" + num[2]
+    return key.where(~key.str.contains("<NA>", regex=False), "")
+
+
+def _rename(df: pd.DataFrame) -> pd.DataFrame:
+    rename = {}
+    for col in df.columns:
+        key = re.sub(r"[^0-9a-zæøå]", "", str(col).lower())
+        if key in REGISTER_ALIASES and REGISTER_ALIASES[key] not in rename.values():
+            rename[col] = REGISTER_ALIASES[key]
+    df = df.rename(columns=rename)
+    missing = [c for c in REGISTER_REQUIRED if c not in df.columns]
+    if missing:
+        raise ValueError(f"Mangler kolonne(r): {', '.join(missing)}")
+    return df
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name].astype(str).str.strip() if name in df.columns else pd.Series("", index=df.index)
+
+
+def _prepare(df: pd.DataFrame):
+    # Én bit av dumpen -> (kategorikode, sp, karakter, adressehash, matrikkelhash, etiketter)
+    df = _rename(df)
+    names = df["kategori"].astype(str).str.strip().str.lower()
+    codes = names.map(lambda n: _CODE.get(CATEGORY_ALIASES.get(n), -1)).to_numpy(dtype=np.int16)
+    sp = to_number(df["sp"])
+    ok = (codes >= 0) & np.isfinite(sp) & (sp > 0)
+    df, codes, sp = df[ok], codes[ok], sp[ok]
+
+    letter = _column(df, "karakter").str.upper().str[:1]
+    grade = letter.map({g: i for i, g in enumerate(GRADES)}).fillna(MISSING_GRADE).to_numpy(dtype=np.uint8)
+
+    if "adresse" in df.columns:
+        adresse = _column(df, "adresse")
+    else:
+        adresse = (_column(df, "gatenavn") + " " + _column(df, "husnummer") + _column(df, "bokstav")).str.strip()
+    matrikkel = (
+        _matrikkel(df["knr"], df["gnr"], df["bnr"])
+        if {"knr", "gnr", "bnr"} <= set(df.columns) else pd.Series("", index=df.index)
+    )
+    sted = (_column(df, "postnummer") + " " + _column(df, "poststed")).str.strip()
+    label = adresse.where(sted == "", adresse + ", " + sted)
+    label = label.where(matrikkel == "", label + " (" + matrikkel + ")")
+
+    addr_key = _key_text(adresse)
+    addr_hash = np.where(addr_key != "", _hash(addr_key), 0).astype(np.uint64)
+    matr_hash = np.where(matrikkel != "", _hash(matrikkel), 0).astype(np.uint64)
+    return codes, sp.astype(np.float32), grade, addr_hash, matr_hash, label.tolist(), int((~ok).sum())
+
+
+# ---------- bygging ----------
+def _index(hashes: np.ndarray, pos: np.ndarray):
+    keep = hashes != 0
+    hashes, pos = hashes[keep], pos[keep]
+    order = np.argsort(hashes, kind="stable")
+    return hashes[order], pos[order].astype(np.int64)
+
+
+def build(file, filename: str, out_dir: str, chunksize: int = CHUNKSIZE, progress=None) -> dict:
+    # Leser dumpen bit for bit. Bare smale numeriske kolonner (~22 byte pr. attest) holdes i
+    # minnet til sorteringen; adressetekstene skrives rett til labels.bin. Lageret bygges i en
+    # midlertidig mappe og byttes inn til slutt, så en kjørende app aldri ser et halvferdig lager.
+    tmp = f"{out_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    cols = {k: [] for k in ("codes", "sp", "grade", "addr", "matr")}
+    offsets = [np.zeros(1, dtype=np.int64)]
+    end, rows, skipped = 0, 0, 0
+    with open(os.path.join(tmp, "labels.bin"), "wb") as labels:
+        for chunk in iter_chunks(file, filename, chunksize):
+            codes, sp, grade, addr, matr, label, bad = _prepare(chunk)
+            for k, v in zip(cols, (codes, sp, grade, addr, matr)):
+                cols[k].append(v)
+            encoded = [s.encode("utf-8") for s in label]
+            labels.write(b"".join(encoded))
+            offsets.append(end + np.cumsum([len(b) for b in encoded], dtype=np.int64))
+            end = int(offsets[-1][-1]) if len(encoded) else end
+            rows += len(codes)
+            skipped += bad
+            if progress is not None:
+                progress(rows)
+
+    codes, sp, grade, addr, matr = (np.concatenate(v) if v else np.empty(0) for v in cols.values())
+    codes = codes.astype(np.int16)
+    # Kategori først, deretter sp: hver kategori blir en sammenhengende, sortert bit
+    order = np.lexsort((sp, codes))
+    position = np.empty(len(order), dtype=np.int64)
+    position[order] = np.arange(len(order))
+    counts = np.bincount(codes, minlength=len(CATEGORIES))
+
+    np.save(os.path.join(tmp, "sp.npy"), sp[order].astype(np.float32))
+    np.save(os.path.join(tmp, "grade.npy"), grade[order].astype(np.uint8))
+    np.save(os.path.join(tmp, "row.npy"), order.astype(np.int64))
+    np.save(os.path.join(tmp, "label_offsets.npy"), np.concatenate(offsets))
+    for name, hashes in (("addr", addr), ("matr", matr)):
+        h, p = _index(hashes.astype(np.uint64), position)
+        np.save(os.path.join(tmp, f"{name}_hash.npy"), h)
+        np.save(os.path.join(tmp, f"{name}_pos.npy"), p)
+
+    grade_counts = np.zeros((len(CATEGORIES), len(GRADES)), dtype=np.int64)
+    valid = grade < len(GRADES)
+    np.add.at(grade_counts, (codes[valid], grade[valid].astype(np.intp)), 1)
+    meta = {
+        "version": FORMAT_VERSION,
+        "rows": rows,
+        "skipped": skipped,
+        "built": time.strftime("%Y-%m-%d %H:%M"),
+        "source": os.path.basename(filename),
+        "categories": list(CATEGORIES),
+        "offsets": np.concatenate([[0], np.cumsum(counts)]).tolist(),
+        "grade_counts": grade_counts.tolist(),
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+
+    old = f"{out_dir.rstrip(os.sep)}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old)
+    os.replace(tmp, out_dir)
+    shutil.rmtree(old, ignore_errors=True)  # åpne mmap-er mot gamle filer er fortsatt gyldige
+    return meta
+
+
+# ---------- lesing ----------
+class Register:
+    """Skrivebeskyttet, minnekartlagt energimerkeregister."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION or self.meta["categories"] != list(CATEGORIES):
+            raise ValueError(f"{path}: lageret er bygget med en annen versjon – bygg det på nytt")
+        self.offsets = self.meta["offsets"]
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")  # noqa: E731
+        self.sp, self.grade, self.row, self.label_offsets = (
+            load(n) for n in ("sp", "grade", "row", "label_offsets")
+        )
+        self._index = {n: (load(f"{n}_hash"), load(f"{n}_pos")) for n in ("addr", "matr")}
+        self._labels = np.memmap(os.path.join(path, "labels.bin"), dtype=np.uint8, mode="r") \
+            if self.label_offsets[-1] > 0 else np.empty(0, dtype=np.uint8)
+
+    @property
+    def rows(self) -> int:
+        return self.meta["rows"]
+
+    def _slice(self, kategori: str) -> slice:
+        code = _CODE[kategori]
+        return slice(self.offsets[code], self.offsets[code + 1])
+
+    def count(self, kategori: str) -> int:
+        s = self._slice(kategori)
+        return s.stop - s.start
+
+    def percentile(self, kategori: str, sp: float) -> float:
+        # Andel attester i kategorien med likt eller lavere levert energi pr. m² (0–100)
+        values = self.sp[self._slice(kategori)]
+        if not len(values):
+            return float("nan")
+        return float(np.searchsorted(values, np.float32(sp), side="right")) / len(values) * 100
+
+    def quantiles(self, kategori: str, qs=(10, 25, 50, 75, 90)) -> dict:
+        values = self.sp[self._slice(kategori)]
+        if not len(values):
+            return {}
+        idx = np.minimum((np.asarray(qs) / 100 * len(values)).astype(np.intp), len(values) - 1)
+        return dict(zip(qs, np.asarray(values[idx], dtype=np.float64).tolist()))
+
+    def grade_counts(self, kategori: str) -> dict:
+        # Karakterene slik de står på attestene (fra meta.json, ingen dataoppslag)
+        return dict(zip(GRADES, self.meta["grade_counts"][_CODE[kategori]]))
+
+    def new_grade_counts(self, kategori: str) -> dict:
+        # Ny ordning (uten fjernvarmevekting) for alle attestene: 6 searchsorted i den sorterte biten
+        values = self.sp[self._slice(kategori)]
+        edges = np.searchsorted(values, NEW_MATRIX[_CODE[kategori]].astype(np.float32), side="right")
+        return dict(zip(GRADES, np.diff(np.concatenate([[0], edges, [len(values)]])).tolist()))
+
+    def _label(self, pos: int) -> str:
+        r = int(self.row[pos])
+        return bytes(self._labels[self.label_offsets[r]:self.label_offsets[r + 1]]).decode("utf-8")
+
+    def lookup(self, text: str, limit: int = 20) -> list[Match]:
+        # Adresse ("Storgata 1A") eller matrikkel ("0301-208/1"); alle attester med nøkkelen
+        m = _MATRIKKEL.match(text)
+        if m:
+            key = pd.Series([f"{int(m[1]):04d}-{int(m[2])}/{int(m[3])}"])
+            hashes, pos = self._index["matr"]
+        else:
+            key = _key_text(pd.Series([text]))
+            hashes, pos = self._index["addr"]
+        if not key[0]:
+            return []
+        h = _hash(key)[0]
+        lo, hi = np.searchsorted(hashes, h, side="left"), np.searchsorted(hashes, h, side="right")
+        out = []
+        for p in np.sort(pos[lo:min(hi, lo + limit)]):
+            code = int(np.searchsorted(self.offsets, p, side="right")) - 1
+            kategori = CATEGORIES[code]
+            g = int(self.grade[p])
+            sp = float(self.sp[p])
+            out.append(Match(
+                self._label(p), kategori, sp, GRADES[g] if g < len(GRADES) else None,
+                self.percentile(kategori, sp),
+            ))
+        return out
+
+
+@lru_cache(maxsize=4)
+def _open(path: str, stamp: float) -> Register:
+    return Register(path)
+
+
+def open_register(path: str | None = None) -> Register | None:
+    # Delt mellom sesjoner; et nytt bygg av lageret (ny meta.json) åpnes automatisk
+    path = path or os.environ.get("ENERGISJEKK_REGISTER")
+    if not path:
+        return None
+    try:
+        stamp = os.stat(os.path.join(path, "meta.json")).st_mtime
+    except OSError:
+        return None
+    return _open(path, stamp)
@@ -0,0 +1,130 @@
+# energisjekk/results.py
+# Permalenker og prosessvid resultatcache for enkeltbygg.
+#
+# Inndataene (kategori, årsforbruk, areal, fjernvarme) ligger i URL-en som
+# ?kategori=Sykehus&arsforbruk=900000&areal=3000&fjernvarme=1, slik at en delt lenke gir
+# nøyaktig samme vurdering. Samme kanoniske tuppel gir samme Result – karakterer,
+# ferdige tekster og figurer – som deles av alle sesjoner i prosessen.
+import os
+from typing import Any, NamedTuple, Optional
+
+from energisjekk.cache import LRUCache
+from energisjekk.core import CATEGORIES, Assessment, assess
+from energisjekk.metrics import GRADING_SECONDS, REGISTRY
+from energisjekk.parsing import parse_number
+from energisjekk.style import BAR_DARK, BAR_LIGHT, PRIMARY, fmt_int
+
+# Hver oppføring holder referanser til figurbytes (typisk 30–80 kB), derfor en moderat grense
+RESULTS = LRUCache(maxsize=int(os.environ.get("ENERGISJEKK_RESULT_CACHE", "256")))
+
+
+class Inputs(NamedTuple):
+    kategori: str
+    arsforbruk: int
+    areal: int
+    fjernvarme: bool
+
+
+class Result(NamedTuple):
+    inputs: Inputs
+    assessment: Assessment
+    fjernvarme_text: Optional[str]
+    improve_text: str
+    pie: Any   # PNG-bytes eller Vega-Lite-spesifikasjon, etter figurvalg
+    bar: Any
+
+
+# ---------- URL <-> inndata ----------
+def _int(text: str, minimum: int) -> Optional[int]:
+    try:
+        value = int(parse_number(text))
+    except ValueError:
+        return None
+    return value if value >= minimum else None
+
+
+def from_query(params) -> dict:
+    # Gyldige verdier fra URL-en som {widgetnøkkel: verdi}; ugyldige og manglende hoppes over
+    values = {}
+    if params.get("kategori") in CATEGORIES:
+        values["kategori"] = params["kategori"]
+    for name, minimum in (("arsforbruk", 0), ("areal", 1)):
+        value = _int(params.get(name, ""), minimum)
+        if value is not None:
+            values[name] = value
+    if "fjernvarme" in params:
+        values["fjernvarme"] = params["fjernvarme"].strip().lower() in ("1", "ja", "true")
+    return values
+
+
+def to_query(inputs: Inputs) -> dict[str, str]:
+    return {
+        "kategori": inputs.kategori,
+        "arsforbruk": str(inputs.arsforbruk),
+        "areal": str(inputs.areal),
+        "fjernvarme": "1" if inputs.fjernvarme else "0",
+    }
+
+
+# ---------- tekster ----------
+def _improve_text(a: Assessment) -> str:
+    # Hvor mye må energibruken ned for å nå neste karakter (ny ordning)?
+    better_label, dk_m2, dk_pct, dk_tot = a.improvement
+    if better_label is None:
+        return "Bygget har allerede beste mulige karakter (A) i ny ordning."
+    if dk_m2 <= 0:
+        return f"Bygget ligger allerede innenfor grensen for {better_label}."
+    return (
+        f"For å gå fra <b>{a.new_label}</b> til <b>{better_label}</b> må levert energi "
+        f"reduseres med minst <b>{dk_m2:.1f} kWh/m²</b> "
+        f"(ca. <b>{dk_pct:.0f} %</b>, tilsvarende ca. <b>{fmt_int(dk_tot)}</b> kWh/år)."
+    )
+
+
+def _fjernvarme_text(a: Assessment) -> Optional[str]:
+    if not a.har_fjernvarme:
+        return None
+    return (
+        f"For ny energikarakter er oppvarmingsandelen (ca. {a.andel_oppvarming*100:.0f} %) "
+        "vektet med faktor 0,45 i tråd med ny energimerkeordning for fjernvarme. "
+        "Dette er en forenklet tilnærming og erstatter ikke en full NS 3031-beregning."
+    )
+
+
+# ---------- beregning og cache ----------
+def _charts(kategori: str, arsforbruk: float, sp: float, backend: str):
+    # Figurcachene i energisjekk.charts deles fortsatt; her holdes bare referanser
+    if backend == "vega":
+        from energisjekk.charts import bar_data, pie_data
+        from energisjekk.vega import bar_spec, pie_spec
+
+        return (
+            pie_spec(*pie_data(kategori, arsforbruk)),
+            bar_spec(*bar_data(kategori, sp), BAR_LIGHT, BAR_DARK, PRIMARY),
+        )
+    from energisjekk.charts import bar_png, pie_png
+
+    return pie_png(kategori, arsforbruk), bar_png(kategori, sp)
+
+
+def _compute(inputs: Inputs, backend: str) -> Result:
+    with GRADING_SECONDS.time(kind="single"):
+        a = assess(inputs.kategori, inputs.arsforbruk, inputs.areal, inputs.fjernvarme)
+    pie, bar = _charts(inputs.kategori, inputs.arsforbruk, a.sp, backend)
+    return Result(inputs, a, _fjernvarme_text(a), _improve_text(a), pie, bar)
+
+
+def result(inputs: Inputs, backend: str = "png") -> Result:
+    return RESULTS.get_or_compute((inputs, backend), lambda: _compute(inputs, backend))
+
+
+def _collect_metrics():
+    s = RESULTS.stats()
+    yield "energisjekk_result_cache_hits_total", "counter", "Treff i resultatcachen.", [({}, s["hits"])]
+    yield "energisjekk_result_cache_misses_total", "counter", "Bom i resultatcachen.", [({}, s["misses"])]
+    yield "energisjekk_result_cache_evictions_total", "counter", "Resultater kastet ut (LRU).", [({}, s["evictions"])]
+    yield "energisjekk_result_cache_size", "gauge", "Antall resultater i cachen.", [({}, s["size"])]
+    yield "energisjekk_result_cache_hit_ratio", "gauge", "Andel oppslag som traff cachen.", [({}, s["hit_rate"])]
+
+
+REGISTRY.register_collector(_collect_metrics)
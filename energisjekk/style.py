@@ -0,0 +1,22 @@
+# energisjekk/style.py
+# Farger og tallformat som deles av appen og figurene.
+
+# ---------- FARGER ----------
+PRIMARY   = "#097E3E"
+SECONDARY = "#33C831"
+BAR_LIGHT = "#A8E6A1"
+BAR_DARK  = PRIMARY
+BADGE_COLORS = {
+    "A": "#2E7D32", "B": "#4CAF50", "C": "#9CCC65",
+    "D": "#FFEB3B", "E": "#FFC107", "F": "#FF9800", "G": "#F44336"
+}
+FORMAL_COLORS = {
+    "Oppvarming":"#33C831","Tappevann":"#097E3E","Ventilasjon":"#74D680",
+    "Belysning":"#FFC107","El.spesifikk":"#2E7BB4","Kjøling":"#00ACC1"
+}
+# Hva-om-figuren: gammel ordning grå, ny ordning grønn (fjernvarmevariantene stiplet)
+WHATIF_COLORS = ("#8C8C8C", "#8C8C8C", PRIMARY, PRIMARY)
+
+
+def fmt_int(x: float) -> str:
+    return f"{x:,.0f}".replace(",", " ")
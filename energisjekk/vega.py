@@ -0,0 +1,135 @@
+# energisjekk/vega.py
+# Vega-Lite-spesifikasjoner for kake- og søylediagrammet. Kun data og oppsett sendes
+# til nettleseren, som tegner selv – ingen matplotlib og ingen PNG over websocketen.
+# Argumentene speiler render_pie_png / render_bar_png / render_whatif_png / render_history_png
+# i energisjekk.charts.
+
+
+def pie_spec(values, labels, colors) -> dict:
+    total = sum(values) or 1.0
+    rows = [
+        {"rekkefolge": i, "etikett": lab, "kwh": v, "andel": f"{v / total * 100:.1f}%"}
+        for i, (v, lab) in enumerate(zip(values, labels))
+    ]
+    return {
+        "data": {"values": rows},
+        "width": 420,
+        "height": 380,
+        "encoding": {
+            "theta": {"field": "kwh", "type": "quantitative", "stack": True},
+            "order": {"field": "rekkefolge", "type": "ordinal"},
+            "color": {
+                "field": "etikett", "type": "nominal",
+                "scale": {"domain": list(labels), "range": list(colors)},
+                "legend": None,
+            },
+        },
+        "layer": [
+            {"mark": {"type": "arc", "outerRadius": 130}},
+            {"mark": {"type": "text", "radius": 85, "fontSize": 11},
+             "encoding": {"text": {"field": "andel"}}},
+            {"mark": {"type": "text", "radius": 175, "fontSize": 11, "lineBreak": "\n"},
+             "encoding": {"text": {"field": "etikett"}}},
+        ],
+        "view": {"stroke": None},
+    }
+
+
+def bar_spec(cols, vals, light: str, dark: str, accent: str) -> dict:
+    rows = [
+        {"periode": c, "kwh_m2": v, "farge": dark if i == len(vals) - 1 else light}
+        for i, (c, v) in enumerate(zip(cols, vals))
+    ]
+    x = {"field": "periode", "type": "nominal", "sort": list(cols),
+         "axis": {"title": None, "labelAngle": -20, "labelAlign": "right"}}
+    y = {"field": "kwh_m2", "type": "quantitative",
+         "scale": {"domain": [0, max(vals) * 1.25]},
+         "axis": {"title": "kWh/m² BRA", "titleColor": accent, "grid": False}}
+    return {
+        "data": {"values": rows},
+        "width": 420,
+        "height": 210,
+        "encoding": {"x": x, "y": y},
+        "layer": [
+            {"mark": {"type": "bar", "width": {"band": 0.55}},
+             "encoding": {"color": {"field": "farge", "type": "nominal", "scale": None}}},
+            {"mark": {"type": "text", "dy": -6, "fontSize": 9, "color": accent},
+             "encoding": {"text": {"field": "kwh_m2", "type": "quantitative", "format": ".1f"}}},
+        ],
+        "view": {"stroke": None},
+    }
+
+
+def whatif_spec(reductions, names, curves, colors, accent: str) -> dict:
+    from energisjekk.core import GRADES
+
+    rows = [
+        {"reduksjon": r, "variant": name, "karakter": GRADES[g]}
+        for name, curve in zip(names, curves)
+        for r, g in zip(reductions, curve)
+    ]
+    return {
+        "data": {"values": rows},
+        "width": 480,
+        "height": 220,
+        "mark": {"type": "line", "interpolate": "step-after", "strokeWidth": 1.6},
+        "encoding": {
+            "x": {"field": "reduksjon", "type": "quantitative",
+                  "axis": {"title": "Reduksjon i levert energi (%)", "titleColor": accent}},
+            "y": {"field": "karakter", "type": "ordinal", "sort": list(GRADES),
+                  "scale": {"domain": list(GRADES)},
+                  "axis": {"title": "Energikarakter", "titleColor": accent}},
+            "color": {"field": "variant", "type": "nominal",
+                      "scale": {"domain": list(names), "range": list(colors)},
+                      "legend": {"orient": "bottom", "title": None}},
+            "strokeDash": {"field": "variant", "type": "nominal",
+                           "scale": {"domain": list(names), "range": [[1, 0], [5, 3]] * (len(names) // 2)},
+                           "legend": None},
+        },
+        "view": {"stroke": None},
+    }
+
+
+def history_spec(years, sp, old, new, accent: str) -> dict:
+    from energisjekk.core import GRADES
+
+    x = {"field": "ar", "type": "ordinal", "axis": {"title": None, "labelAngle": 0}}
+    grades = [
+        {"ar": y, "ordning": name, "karakter": GRADES[g]}
+        for name, curve in (("Gammel ordning", old), ("Ny ordning", new))
+        for y, g in zip(years, curve)
+    ]
+    return {
+        "vconcat": [
+            {
+                "data": {"values": [{"ar": y, "kwh_m2": v} for y, v in zip(years, sp)]},
+                "width": 480,
+                "height": 170,
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "kwh_m2", "type": "quantitative", "scale": {"domain": [0, max(sp) * 1.25]},
+                          "axis": {"title": "kWh/m² BRA", "titleColor": accent}},
+                },
+                "layer": [
+                    {"mark": {"type": "line", "point": True, "color": accent, "strokeWidth": 1.6}},
+                    {"mark": {"type": "text", "dy": -8, "fontSize": 9, "color": accent},
+                     "encoding": {"text": {"field": "kwh_m2", "type": "quantitative", "format": ".0f"}}},
+                ],
+            },
+            {
+                "data": {"values": grades},
+                "width": 480,
+                "height": 120,
+                "mark": {"type": "line", "interpolate": "step", "point": True, "strokeWidth": 1.6},
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "karakter", "type": "ordinal", "sort": list(GRADES),
+                          "scale": {"domain": list(GRADES)}, "axis": {"title": "Energikarakter", "titleColor": accent}},
+                    "color": {"field": "ordning", "type": "nominal",
+                              "scale": {"domain": ["Gammel ordning", "Ny ordning"], "range": ["#8C8C8C", accent]},
+                              "legend": {"orient": "bottom", "title": None}},
+                },
+            },
+        ],
+        "config": {"view": {"stroke": None}},
+    }
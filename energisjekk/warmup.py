@@ -0,0 +1,48 @@
+# energisjekk/warmup.py
+# Oppvarming av en kald prosess: laster beregningskjernen og fyller figurcachen for
+# alle kategorier med standardinputene, slik at første ekte besøkende slipper å betale
+# for matplotlib-import, fontcache og de første renderingene.
+import os
+import threading
+import time
+
+from energisjekk.core import CATEGORIES, assess
+
+# Samme standardverdier som inputfeltene i streamlit_app.py
+DEFAULT_ARSFORBRUK = 500_000
+DEFAULT_AREAL = 3_000
+
+_started = False
+_lock = threading.Lock()
+
+
+def warm_up(arsforbruk: float = DEFAULT_ARSFORBRUK, areal: float = DEFAULT_AREAL, charts: bool = True) -> dict:
+    t0 = time.perf_counter()
+    for kategori in CATEGORIES:
+        assess(kategori, arsforbruk, areal)
+    result = {"kategorier": len(CATEGORIES), "beregning_s": round(time.perf_counter() - t0, 4)}
+
+    if charts:
+        from energisjekk.charts import bar_png, cache_stats, pie_png
+
+        t1 = time.perf_counter()
+        for kategori in CATEGORIES:
+            pie_png(kategori, arsforbruk)
+            bar_png(kategori, arsforbruk / areal)
+        result["figurer_s"] = round(time.perf_counter() - t1, 4)
+        result["cache"] = cache_stats()
+    return result
+
+
+def start_background_warmup(charts: bool = True) -> bool:
+    # Starter warm_up i en bakgrunnstråd første gang den kalles i prosessen.
+    # ENERGISJEKK_WARMUP=0 slår det av. Returnerer True hvis tråden ble startet nå.
+    global _started
+    if os.environ.get("ENERGISJEKK_WARMUP", "1") == "0":
+        return False
+    with _lock:
+        if _started:
+            return False
+        _started = True
+    threading.Thread(target=warm_up, kwargs={"charts": charts}, name="energisjekk-warmup", daemon=True).start()
+    return True
@@ -0,0 +1,88 @@
+# energisjekk/whatif.py
+# Hva-om-analyse for ett bygg: hva som skal til for å nå hver bedre karakter i gammel og
+# ny ordning, med og uten fjernvarmevekting, og karakter som funksjon av reduksjon (0–80 %).
+# Alt regnes i én matriseoperasjon over (variant x reduksjon x karaktergrense) og caches
+# pr. (kategori, årsforbruk, areal).
+from typing import NamedTuple
+
+import numpy as np
+
+from energisjekk.cache import LRUCache
+from energisjekk.core.data import FJERNVARME_FAKTOR, GRADES
+from energisjekk.portfolio import HEAT_SHARE, NEW_MATRIX, OLD_MATRIX, category_codes
+
+# (ordning, fjernvarme) – rekkefølgen er radene i alle matrisene under
+VARIANTS = (("Gammel", False), ("Gammel", True), ("Ny", False), ("Ny", True))
+VARIANT_NAMES = tuple(f"{o} ordning{' (fjernvarme)' if f else ''}" for o, f in VARIANTS)
+REDUCTIONS = np.round(np.arange(0.0, 80.0 + 1e-9, 0.5), 1)  # prosent reduksjon i levert energi
+
+_FJV = np.array([f for _, f in VARIANTS])
+_NEW = np.array([o == "Ny" for o, _ in VARIANTS])
+_LIMIT_IDX = np.arange(len(GRADES) - 1)  # A..F
+
+CACHE = LRUCache(maxsize=256)
+
+
+class WhatIf(NamedTuple):
+    kategori: str
+    arsforbruk: float
+    areal: float
+    sp: float
+    current: np.ndarray          # (variant,) karakterindeks i dag, 0=A ... 6=G
+    needed_kwh_m2: np.ndarray    # (variant, A..F) reduksjon i levert kWh/m², NaN = ikke bedre enn i dag
+    needed_pct: np.ndarray
+    needed_kwh_tot: np.ndarray
+    curve: np.ndarray            # (variant, REDUCTIONS) karakterindeks etter reduksjon
+
+
+def _frozen(a: np.ndarray) -> np.ndarray:
+    a.flags.writeable = False  # delt mellom sesjoner via cachen
+    return a
+
+
+def _sweep(kategori: str, arsforbruk: float, areal: float) -> WhatIf:
+    code = int(category_codes([kategori])[0])
+    sp = arsforbruk / areal
+    h = HEAT_SHARE[code]
+    limits = np.where(_NEW[:, None], NEW_MATRIX[code], OLD_MATRIX[code])  # (variant, A..F)
+
+    # Levert energi etter hver reduksjon, vektet som weighted_sp (samme regnerekkefølge,
+    # så reduksjon 0 gir nøyaktig samme karakter som assess)
+    sp_r = sp * (1.0 - REDUCTIONS / 100.0)
+    opp = sp_r * h
+    vektet = np.where(_FJV[:, None], sp_r - opp + opp * FJERNVARME_FAKTOR, sp_r)  # (variant, reduksjon)
+    curve = (vektet[:, :, None] > limits[:, None, :]).sum(axis=-1)  # antall grenser under = karakterindeks
+    current = curve[:, 0]
+
+    # Grensene uttrykt i levert (uvektet) energi: vektet = sp * faktor
+    faktor = np.where(_FJV, 1.0 - h * (1.0 - FJERNVARME_FAKTOR), 1.0)
+    better = _LIMIT_IDX[None, :] < current[:, None]
+    needed = np.where(better, np.maximum(0.0, sp - limits / faktor[:, None]), np.nan)
+    pct = needed / sp * 100 if sp > 0 else np.where(better, 0.0, np.nan)
+
+    return WhatIf(
+        kategori, arsforbruk, areal, sp,
+        _frozen(current), _frozen(needed), _frozen(pct), _frozen(needed * areal), _frozen(curve),
+    )
+
+
+def what_if(kategori: str, arsforbruk: float, areal: float) -> WhatIf:
+    return CACHE.get_or_compute((kategori, arsforbruk, areal), lambda: _sweep(kategori, arsforbruk, areal))
+
+
+def ladder_rows(res: WhatIf):
+    # (karakter, [(kWh/m², %, kWh/år) eller None pr. variant]) for karakterer som er bedre i minst én variant
+    rows = []
+    for j in range(int(res.current.max()) - 1, -1, -1):
+        cells = [
+            None if np.isnan(res.needed_kwh_m2[v, j])
+            else (float(res.needed_kwh_m2[v, j]), float(res.needed_pct[v, j]), float(res.needed_kwh_tot[v, j]))
+            for v in range(len(VARIANTS))
+        ]
+        rows.append((GRADES[j], cells))
+    return rows
+
+
+def curve_data(res: WhatIf):
+    # Felles data for PNG- og Vega-figuren: (reduksjoner, variantnavn, karakterindekser pr. variant)
+    return REDUCTIONS.tolist(), list(VARIANT_NAMES), res.curve.tolist()
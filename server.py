@@ -0,0 +1,44 @@
+# server.py
+# Produksjonsoppstart: `streamlit run server.py` kjører streamlit_app.py som st.App, med
+# oppvarming ved serverstart og egne HTTP-ruter ved siden av appen:
+#
+#   GET /healthz   "ok" – prosessen svarer (kjører ikke appskriptet)
+#   GET /warmup    fyller beregningskjernen og figurcachen (energisjekk.warmup) og svarer med
+#                  tidsbruk og cachestatus som JSON; raskt når prosessen allerede er varm
+#
+# Streamlit-ruter (/_stcore/...) og selve appen er uendret. keep_alive-arbeidsflyten kaller
+# /warmup, så en kald prosess varmes opp før første ekte besøkende.
+import os
+from contextlib import asynccontextmanager
+
+import streamlit as st
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from energisjekk.warmup import start_background_warmup, warm_up
+
+CHARTS = os.environ.get("ENERGISJEKK_CHARTS", "png") == "png"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Oppvarmingen starter når serveren starter, ikke ved første sesjon
+    start_background_warmup(charts=CHARTS)
+    yield
+
+
+async def healthz(request):
+    return PlainTextResponse("ok")
+
+
+async def warmup(request):
+    # Rendringen holder GIL-en; kjøres i trådpoolen så hendelsesløkken ikke blokkeres
+    return JSONResponse(await run_in_threadpool(warm_up, charts=CHARTS))
+
+
+app = st.App(
+    "streamlit_app.py",
+    lifespan=lifespan,
+    routes=[Route("/healthz", healthz), Route("/warmup", warmup)],
+)
@@ -1,13 +1,27 @@
 # streamlit_app.py
 import io
+import os
 import base64
 import pathlib
+import tempfile
+import time
 import streamlit as st
-import matplotlib.pyplot as plt
-import pandas as pd
 import streamlit as st
+from energisjekk.charts import history_png, whatif_png
+from energisjekk.vega import history_spec, whatif_spec
+from energisjekk.core import CATEGORIES, GRADES, assess, recommended
+from energisjekk.diagnostics import Diagnostics
+from energisjekk.metrics import ERRORS, RERUN_SECONDS, RERUNS, start_exporters
+from energisjekk.results import Inputs, from_query, result, to_query
+from energisjekk.style import BADGE_COLORS, PRIMARY, SECONDARY, WHATIF_COLORS, fmt_int
+from energisjekk.warmup import start_background_warmup
 st.set_page_config(page_title="Energisjekk", page_icon="🔎", layout="wide")
 
+# Prosessvide måletall (Prometheus-format): ENERGISJEKK_METRICS_PORT og/eller ENERGISJEKK_METRICS_FILE
+start_exporters()
+RERUNS.inc()
+_rerun_start = time.perf_counter()
+
 # ---------- LOGO OG TOPP (uten lenker på tittel) ----------
 st.markdown(f"""
 <style>
@@ -43,32 +57,31 @@ window.addEventListener('load', function() {
 """, unsafe_allow_html=True)
 
 
-# ---------- FARGER ----------
-PRIMARY   = "#097E3E"
-SECONDARY = "#33C831"
-BAR_LIGHT = "#A8E6A1"
-BAR_DARK  = PRIMARY
-BADGE_COLORS = {
-    "A": "#2E7D32", "B": "#4CAF50", "C": "#9CCC65",
-    "D": "#FFEB3B", "E": "#FFC107", "F": "#FF9800", "G": "#F44336"
-}
+# Figurer: "png" (matplotlib på server) eller "vega" (tegnes i nettleseren, mindre data over nett).
+# Kan overstyres per visning med ?grafer=vega
+CHART_BACKEND = st.query_params.get("grafer", os.environ.get("ENERGISJEKK_CHARTS", "png"))
 
+# Første kjøring i prosessen starter oppvarming av figurcachen i bakgrunnen
+start_background_warmup(charts=CHART_BACKEND == "png")
 
-# ---------- HJELPERE ----------
-def fmt_int(x: float) -> str:
-    return f"{x:,.0f}".replace(",", " ")
+# Diagnostikk: tidsbruk pr. seksjon (ENERGISJEKK_DIAG=1 eller ?diag=1),
+# cProfile-dump pr. rerun hvis ENERGISJEKK_PROFILE_DIR er satt
+diag = Diagnostics.from_env(st.query_params)
+diag.start()
 
-def energy_label(sp_kwh_m2: float, thresholds: dict[str, float]) -> str:
-    for letter in ["A", "B", "C", "D", "E", "F"]:
-        if sp_kwh_m2 <= thresholds[letter]:
-            return letter
-    return "G"
+# Permalenke: ?kategori=...&arsforbruk=...&areal=...&fjernvarme=1 fyller inn skjemaet.
+# Leses én gang pr. sesjon; deretter holdes URL-en oppdatert fra skjemaet (oppdater_lenke).
+if "_lenke_lest" not in st.session_state:
+    st.session_state["_lenke_lest"] = True
+    st.session_state.update(from_query(st.query_params))
 
-def parse_int_with_spaces(text: str, default=0):
-    try:
-        return int(text.replace(" ", "").replace(",", ""))
-    except ValueError:
-        return default
+
+# ---------- HJELPERE ----------
+def oppdater_lenke(inputs: Inputs):
+    # Kun endrede parametere skrives, så en uendret URL ikke sendes til nettleseren på nytt
+    for navn, verdi in to_query(inputs).items():
+        if st.query_params.get(navn) != verdi:
+            st.query_params[navn] = verdi
 
 # Felles tittel-stil uten klikkbare lenker
 def title(text: str):
@@ -79,582 +92,51 @@ def title(text: str):
 
 
 # ---------- INPUT ----------
-CATEGORIES = [
-    "Barnehage","Kontorbygning","Skolebygning","Universitets- og høgskolebygning",
-    "Sykehus","Sykehjem","Hotellbygning","Idrettsbygning",
-    "Forretningsbygning","Kulturbygning","Lett industribygning, verksted","Kombinasjon",
-]
-
-c1, c2, c3 = st.columns([1.2, 1, 1])
-
-with c1:
-    kategori = st.selectbox("Bygningskategori", CATEGORIES, index=1)
-
-with c2:
-    arsforbruk = st.number_input(
-        "Årsforbruk (kWh)",
-        min_value=0,
-        value=500_000,
-        step=1_000,
-        format="%i",
-    )
+with diag.section("Input"):
+    c1, c2, c3 = st.columns([1.2, 1, 1])
+
+    with c1:
+        st.session_state.setdefault("kategori", CATEGORIES[1])
+        kategori = st.selectbox("Bygningskategori", list(CATEGORIES), key="kategori")
+
+    with c2:
+        # Startverdiene ligger i session_state, slik at permalenken og AMS-importen kan
+        # overstyre dem uten advarsel
+        st.session_state.setdefault("arsforbruk", 500_000)
+        arsforbruk = st.number_input(
+            "Årsforbruk (kWh)",
+            min_value=0,
+            step=1_000,
+            format="%i",
+            key="arsforbruk",
+        )
 
-with c3:
-    areal = st.number_input(
-        "Oppvarmet areal (m² BRA)",
-        min_value=1,
-        value=3_000,
-        step=100,
-        format="%i",
-    )
+    with c3:
+        st.session_state.setdefault("areal", 3_000)
+        areal = st.number_input(
+            "Oppvarmet areal (m² BRA)",
+            min_value=1,
+            step=100,
+            format="%i",
+            key="areal",
+        )
 
-sp = arsforbruk / areal
+    st.caption("Adressen i nettleseren er en permalenke – den gjenskaper denne vurderingen for mottakeren.")
+
+    sp = arsforbruk / areal
 
 # --- Valg for tiltak
 
 vis_tiltak = False  # Sett til True når du vil aktivere
 
-# ---------- FORMÅLSFORDELING ----------
-SHARES = {
-    "Barnehage":{"Oppvarming":61,"Tappevann":5,"Ventilasjon":14,"Belysning":9,"El.spesifikk":13,"Kjøling":0},
-    "Kontorbygning":{"Oppvarming":31,"Tappevann":5,"Ventilasjon":10,"Belysning":16,"El.spesifikk":31,"Kjøling":7},
-    "Skolebygning":{"Oppvarming":58,"Tappevann":4,"Ventilasjon":8,"Belysning":15,"El.spesifikk":15,"Kjøling":0},
-    "Universitets- og høgskolebygning":{"Oppvarming":37,"Tappevann":7,"Ventilasjon":14,"Belysning":15,"El.spesifikk":19,"Kjøling":8},
-    "Sykehus":{"Oppvarming":33,"Tappevann":8,"Ventilasjon":0,"Belysning":0,"El.spesifikk":45,"Kjøling":14},
-    "Sykehjem":{"Oppvarming":52,"Tappevann":10,"Ventilasjon":12,"Belysning":10,"El.spesifikk":15,"Kjøling":0},
-    "Hotellbygning":{"Oppvarming":42,"Tappevann":16,"Ventilasjon":13,"Belysning":13,"El.spesifikk":15,"Kjøling":1},
-    "Idrettsbygning":{"Oppvarming":36,"Tappevann":10,"Ventilasjon":14,"Belysning":15,"El.spesifikk":16,"Kjøling":10},
-    "Forretningsbygning":{"Oppvarming":22,"Tappevann":3,"Ventilasjon":11,"Belysning":0,"El.spesifikk":58,"Kjøling":6},
-    "Kulturbygning":{"Oppvarming":68,"Tappevann":1,"Ventilasjon":9,"Belysning":9,"El.spesifikk":12,"Kjøling":1},
-    "Lett industribygning, verksted":{"Oppvarming":63,"Tappevann":2,"Ventilasjon":5,"Belysning":13,"El.spesifikk":15,"Kjøling":2},
-    "Kombinasjon":{"Oppvarming":61,"Tappevann":5,"Ventilasjon":10,"Belysning":15,"El.spesifikk":9,"Kjøling":0},
-}
-
-# --- Valg for fjernvarme (påvirker kun NY energikarakter) ---
-har_fjernvarme = st.checkbox(
-    "Bygget har fjernvarme som hovedoppvarming",
-    value=False,
-    help="Brukes kun til en forenklet vekting i ny energikarakter (oppvarming vektes 0,45).",
-)
+# ---------- SEKSJONER ----------
+# Hver seksjon er en funksjon med eksplisitte avhengigheter. Seksjoner med egne widgets
+# er fragmenter: endrer man noe der, kjøres kun den seksjonen på nytt – ikke hele siden.
+# Seksjoner uten egne widgets er vanlige funksjoner; de kjøres bare når siden kjøres på nytt
+# (kategori, årsforbruk, areal eller fjernvarme er endret). Målt med
+# benchmarks/fragment_reruns.py.
 
-# Andel oppvarming fra formålsfordelingen (NVE 2016:24)
-andel_oppvarming = SHARES[kategori]["Oppvarming"] / 100.0
-
-# Spesifikt årsforbruk som brukes til NY energikarakter
-if har_fjernvarme:
-    sp_oppvarming = sp * andel_oppvarming
-    sp_øvrig = sp - sp_oppvarming
-    sp_ny_vektet = sp_øvrig + sp_oppvarming * 0.45
-else:
-    sp_ny_vektet = sp
-
-
-# ---------- REFERANSER TIL SØYLE ----------
-REF = {
-    "labels":["1950 og eldre","1951–1970","1971–1988","1989–1998","1999–2008","2009–2020"],
-    "Barnehage":[407.1,374.5,263.4,231.6,190.0,157.5],
-    "Kontorbygning":[303.1,282.4,240.8,202.6,174.0,156.4],
-    "Skolebygning":[317.2,293.3,237.8,204.3,172.7,143.8],
-    "Universitets- og høgskolebygning":[318.5,297.5,255.7,217.4,189.4,171.4],
-    "Sykehus":[507.6,485.2,440.8,400.9,372.7,355.6],
-    "Sykehjem":[473.3,448.6,389.4,354.0,320.1,290.9],
-    "Hotellbygning":[405.7,380.8,322.0,286.7,254.1,225.2],
-    "Idrettsbygning":[462.7,425.8,360.5,289.4,249.2,202.6],
-    "Forretningsbygning":[405.7,383.6,338.1,297.8,269.5,252.7],
-    "Kulturbygning":[350.8,324.0,264.7,230.2,199.2,171.5],
-    "Lett industribygning, verksted":[462.7,427.7,357.9,285.5,241.6,212.4],
-    "Kombinasjon":[350.8,324.0,264.7,230.2,199.2,171.5],
-}
-
-# ---------- TILTAKSTABELL (typisk effekt) ----------
-TILTAK_DATA = [
-    {
-        "Tiltak": "🛠️ Driftstidsoptimalisering",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "✓",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "5–15 % (ventilasjon/oppvarming)",
-    },
-    {
-        "Tiltak": "🌡️ Temperatur-senking natt/helg",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "5–10 % (oppvarming/kjøling)",
-    },
-    {
-        "Tiltak": "👥 Brukeratferd/opplæring",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "✓",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "2–5 % (totalt)",
-    },
-    {
-        "Tiltak": "🔌 Standby-reduksjon/utstyr",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "",
-        "🌍CO₂-utslipp ↓": "",
-        "🌡️Inneklima": "",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "",
-        "Typisk besparelse / gjelder for": "2–5 % (el-spesifikk)",
-    },
-    {
-        "Tiltak": "📊 EOS (energiovervåking)",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "2–10 % (totalt)",
-    },
-    {
-        "Tiltak": "🌬️ Behovsstyrt ventilasjon",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "✓",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "10–25 % (ventilasjon)",
-    },
-    {
-        "Tiltak": "🔥 Varmegjenvinning ventilasjon",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "20–40 % (ventilasjon/oppvarming)",
-    },
-    {
-        "Tiltak": "🔄 Optimalisering varme/kjøl",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "5–15 % (oppvarming/kjøling)",
-    },
-    {
-        "Tiltak": "🔋 Effektstyring/lastutjevning",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "",
-        "🌍CO₂-utslipp ↓": "",
-        "🌡️Inneklima": "",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "5–10 % kostnad (effektledd)",
-    },
-    {
-        "Tiltak": "🚗 Smart elbillading",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "",
-        "🌍CO₂-utslipp ↓": "",
-        "🌡️Inneklima": "",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "5–10 % kostnad (effektledd)",
-    },
-    {
-        "Tiltak": "💡 LED-belysning",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "✓",
-        "🔧Driftskontroll": "",
-        "Typisk besparelse / gjelder for": "30–60 % (belysning)",
-    },
-    {
-        "Tiltak": "💡 Dagslys-/tilstede-styring",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "✓",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "10–30 % (belysning)",
-    },
-    {
-        "Tiltak": "❄️🔥 Varmepumpe",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "",
-        "Typisk besparelse / gjelder for": "40–70 % (oppvarming)",
-    },
-    {
-        "Tiltak": "☀️ Solceller",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "",
-        "Typisk besparelse / gjelder for": "Avhengig anlegg (red. kjøpt el)",
-    },
-    {
-        "Tiltak": "🏭 Spillvarmegjenvinning",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "✓",
-        "Typisk besparelse / gjelder for": "20–50 % (prosess/oppvarming)",
-    },
-    {
-        "Tiltak": "🧱 Etterisolering tak/vegger",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "✓",
-        "🔧Driftskontroll": "",
-        "Typisk besparelse / gjelder for": "10–25 % (oppvarming)",
-    },
-    {
-        "Tiltak": "🪟 Utskifting av vinduer",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "✓",
-        "🔧Driftskontroll": "",
-        "Typisk besparelse / gjelder for": "10–20 % (oppvarming)",
-    },
-    {
-        "Tiltak": "🕳️ Tetthetstiltak (luftlekkasjer)",
-        "💰Strøm-regning ↓": "✓",
-        "🏷️Energimerke ↑": "✓",
-        "🌍CO₂-utslipp ↓": "✓",
-        "🌡️Inneklima": "✓",
-        "☀️Overtemp ↓": "",
-        "🔧Driftskontroll": "",
-        "Typisk besparelse / gjelder for": "5–15 % (oppvarming)",
-    },
-]
-
-TILTAK_DF = pd.DataFrame(TILTAK_DATA)
-
-# hvilke tiltak vi typisk vil fremheve per kategori (kan justeres fritt)
-ANBEFALTE_TILTAK = {
-    # Barnehage – mye ventilasjon, oppvarming og belysning
-    "Barnehage": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "👥 Brukeratferd/opplæring",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Kontorbygg – mye el-spesifikk, belysning, ventilasjon
-    "Kontorbygning": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "👥 Brukeratferd/opplæring",
-        "🔌 Standby-reduksjon/utstyr",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "🔋 Effektstyring/lastutjevning",
-        "🚗 Smart elbillading",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Skole – likner barnehage, litt mer belysning
-    "Skolebygning": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "👥 Brukeratferd/opplæring",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Universitet / høgskole – mye ventilasjon, prosess/el-spesifikk
-    "Universitets- og høgskolebygning": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "👥 Brukeratferd/opplæring",
-        "🔌 Standby-reduksjon/utstyr",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "🔋 Effektstyring/lastutjevning",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🏭 Spillvarmegjenvinning",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Sykehus – tunge tekniske anlegg og prosess/varme
-    "Sykehus": [
-        "🛠️ Driftstidsoptimalisering",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",          # der det er mulig
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "🔋 Effektstyring/lastutjevning",
-        "❄️🔥 Varmepumpe",
-        "🏭 Spillvarmegjenvinning",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Sykehjem – mye varme, komfort og belysning
-    "Sykehjem": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "👥 Brukeratferd/opplæring",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Hotell – varme, ventilasjon, varmtvann, belysning
-    "Hotellbygning": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "👥 Brukeratferd/opplæring",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Idrettsbygg – mye ventilasjon, varmtvann og belysning
-    "Idrettsbygning": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "💡 LED-belysning",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Forretningsbygg – lys, el-spesifikk, ventilasjon, effekt
-    "Forretningsbygning": [
-        "🛠️ Driftstidsoptimalisering",
-        "🔌 Standby-reduksjon/utstyr",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "🔋 Effektstyring/lastutjevning",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Kulturbygg – ofte mye ventilasjon, belysning, varme
-    "Kulturbygning": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Lett industri/verksted – prosess, ventilasjon, bygningskropp
-    "Lett industribygning, verksted": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "🔌 Standby-reduksjon/utstyr",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "🔋 Effektstyring/lastutjevning",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🏭 Spillvarmegjenvinning",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Kombinasjon – bruk en “generell kontor/næring”-pakke
-    "Kombinasjon": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "👥 Brukeratferd/opplæring",
-        "🔌 Standby-reduksjon/utstyr",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "🔋 Effektstyring/lastutjevning",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-
-    # Fallback hvis noe nytt skulle dukke opp
-    "default": [
-        "🛠️ Driftstidsoptimalisering",
-        "🌡️ Temperatur-senking natt/helg",
-        "👥 Brukeratferd/opplæring",
-        "🔌 Standby-reduksjon/utstyr",
-        "📊 EOS (energiovervåking)",
-        "🌬️ Behovsstyrt ventilasjon",
-        "🔥 Varmegjenvinning ventilasjon",
-        "🔄 Optimalisering varme/kjøl",
-        "💡 LED-belysning",
-        "💡 Dagslys-/tilstede-styring",
-        "❄️🔥 Varmepumpe",
-        "☀️ Solceller",
-        "🧱 Etterisolering tak/vegger",
-        "🪟 Utskifting av vinduer",
-        "🕳️ Tetthetstiltak (luftlekkasjer)",
-    ],
-}
-
-# ---------- ENERGIKARAKTER ----------
-
-# Gammel ordning (dagens skala)
-OLD_THRESH = {
-    "Barnehage":dict(A=85,B=115,C=145,D=180,E=220,F=275),
-    "Kontorbygning":dict(A=90,B=115,C=145,D=180,E=220,F=275),
-    "Skolebygning":dict(A=75,B=105,C=135,D=175,E=220,F=280),
-    "Universitets- og høgskolebygning":dict(A=90,B=125,C=160,D=200,E=240,F=300),
-    "Sykehus":dict(A=175,B=240,C=305,D=360,E=415,F=505),
-    "Sykehjem":dict(A=145,B=195,C=240,D=295,E=355,F=440),
-    "Hotellbygning":dict(A=140,B=190,C=240,D=290,E=340,F=415),
-    "Idrettsbygning":dict(A=125,B=165,C=205,D=275,E=345,F=440),
-    "Forretningsbygning":dict(A=115,B=160,C=210,D=255,E=300,F=375),
-    "Kulturbygning":dict(A=95,B=135,C=175,D=215,E=255,F=320),
-    "Lett industribygning, verksted":dict(A=105,B=145,C=185,D=250,E=315,F=405),
-    "Kombinasjon":dict(A=95,B=135,C=175,D=215,E=255,F=320),
-}
-
-# Ny ordning (justert skala)
-NEW_THRESH = {
-    "Barnehage":dict(A=105,B=120,C=180,D=240,E=300,F=360),
-    "Kontorbygning":dict(A=75,B=90,C=140,D=190,E=235,F=285),
-    "Skolebygning":dict(A=70,B=85,C=150,D=210,E=275,F=340),
-    "Universitets- og høgskolebygning":dict(A=75,B=90,C=140,D=190,E=245,F=295),
-    "Sykehus":dict(A=125,B=145,C=220,D=300,E=375,F=455),
-    "Sykehjem":dict(A=95,B=115,C=190,D=265,E=340,F=415),
-    "Hotellbygning":dict(A=100,B=115,C=195,D=275,E=355,F=435),
-    "Idrettsbygning":dict(A=85,B=100,C=170,D=235,E=305,F=375),
-    "Forretningsbygning":dict(A=110,B=130,C=200,D=265,E=330,F=395),
-    "Kulturbygning":dict(A=80,B=95,C=165,D=230,E=300,F=370),
-    "Lett industribygning, verksted":dict(A=95,B=110,C=190,D=270,E=345,F=425),
-    # for kombinasjon bruker vi samme som kulturbygg
-    "Kombinasjon":dict(A=80,B=95,C=165,D=230,E=300,F=370),
-}
-
-# Gammel ordning: alltid basert på uvektet levert energi
-old_label = energy_label(sp, OLD_THRESH.get(kategori, OLD_THRESH["Kombinasjon"]))
-
-# Ny ordning: tar hensyn til fjernvarme hvis valgt (oppvarming vektes 0,45)
-new_label = energy_label(sp_ny_vektet, NEW_THRESH.get(kategori, NEW_THRESH["Kombinasjon"]))
-
-order = ["A","B","C","D","E","F","G"]
-delta = order.index(new_label) - order.index(old_label)
-
-def improvement_to_better_grade(sp, kategori, thresholds, current_label, areal):
-    # A er best mulig – da finnes det ingen bedre karakter
-    if current_label == "A":
-        return None, None, None, None
-
-    idx = order.index(current_label)
-    better_label = order[idx - 1]          # én bedre karakter (for eksempel C -> B)
-    limit = thresholds[kategori][better_label]
-
-    needed_kwh_m2 = max(0.0, sp - limit)
-    needed_pct = (needed_kwh_m2 / sp * 100) if sp > 0 else 0.0
-    needed_kwh_tot = needed_kwh_m2 * areal
-
-    return better_label, needed_kwh_m2, needed_pct, needed_kwh_tot
-
-better_label, dk_m2, dk_pct, dk_tot = improvement_to_better_grade(
-    sp_ny_vektet, kategori, NEW_THRESH, new_label, areal
-)
-
-# ---------- LAYOUT ----------
-left, right = st.columns([1, 1.5])
-with left:
+def forbruk_og_tek17(arsforbruk, sp, tek17):
     title("Årsforbruk(faktisk levert energi)")
     st.markdown(f"<div style='font-size:42px;color:{SECONDARY};font-weight:700'>{fmt_int(arsforbruk)} kWh</div>", unsafe_allow_html=True)
     st.markdown("<div style='height:35px;'></div>", unsafe_allow_html=True)
@@ -665,36 +147,7 @@ with left:
         unsafe_allow_html=True
     )
 
-    # --- TEK17-referansetall pr kategori ---
-    TEK17_REF = {
-        "Barnehage": 135,
-        "Kontorbygning": 115,
-        "Skolebygning": 110,
-        "Universitets- og høgskolebygning": 125,
-        "Sykehus": 225,                             # alternativt nivå: 265
-        "Sykehjem": 195,                            # alternativt nivå: 230
-        "Hotellbygning": 170,
-        "Idrettsbygning": 145,
-        "Forretningsbygning": 180,
-        "Kulturbygning": 130,
-        "Lett industribygning, verksted": 140,      # alternativt nivå: 160
-        "Kombinasjon": 135,
-    }
-
-    # Parentesverdier der TEK17 oppgir to tall (vises i grått som "ev. XXX")
-    TEK17_ALT = {
-        "Sykehus": 265,
-        "Sykehjem": 230,
-        "Lett industribygning, verksted": 160,
-}
-
-    ref_tek17 = TEK17_REF.get(kategori)
-    alt_tek17 = TEK17_ALT.get(kategori)
-
-    # beregn differanse mot TEK17
-    spes = sp  # du har allerede beregnet sp = arsforbruk / areal
-    diff = spes - ref_tek17 if ref_tek17 else 0
-    diff_pct = (diff / ref_tek17) * 100 if ref_tek17 else 0
+    ref_tek17, alt_tek17, diff, diff_pct = tek17
 
     farge = "#2e8b57" if diff <= 0 else ("#e6a700" if diff_pct < 10 else "#cc4444")
     vurdering = (
@@ -730,6 +183,16 @@ with left:
   
     st.markdown("<div style='height:35px;'></div>", unsafe_allow_html=True)
 
+
+def karakterpanel(kategori, arsforbruk, areal, har_fjernvarme):
+    # Karakterer og tekster hentes fra den prosessvide resultatcachen (energisjekk.results);
+    # beregningen (karakterer, fjernvarmevekting, TEK17) ligger i energisjekk.core
+    inputs = Inputs(kategori, int(arsforbruk), int(areal), har_fjernvarme)
+    oppdater_lenke(inputs)
+    with diag.section("Karakter"):
+        res = result(inputs, CHART_BACKEND)
+    old_label, new_label = res.assessment.old_label, res.assessment.new_label
+
     title("Kalkulert energikarakter – gammel vs. ny ordning")
 
     st.markdown(
@@ -759,17 +222,6 @@ with left:
         unsafe_allow_html=True
     )
 
-# Tekstlig forklaring av forskjellen
-    if delta > 0:
-        diff_text = f"Energikarakteren svekkes med {delta} trinn ({old_label} → {new_label})."
-        diff_color = "#cc4444"
-    elif delta < 0:
-        diff_text = f"Energikarakteren forbedres med {abs(delta)} trinn ({old_label} → {new_label})."
-        diff_color = "#2e8b57"
-    else:
-        diff_text = f"Energikarakteren er uendret ({old_label})."
-        diff_color = "#555555"
-
     st.markdown(
         """
         <div style='font-size:12.5px;color:#666;margin-top:4px;'>
@@ -779,30 +231,12 @@ with left:
         unsafe_allow_html=True,
     )
 
-    if har_fjernvarme:
+    if res.fjernvarme_text:
         st.markdown(
-            f"""
-            <div style='font-size:11.5px;color:#666;margin-top:4px;'>
-                For ny energikarakter er oppvarmingsandelen (ca. {andel_oppvarming*100:.0f} %) 
-                vektet med faktor 0,45 i tråd med ny energimerkeordning for fjernvarme. 
-                Dette er en forenklet tilnærming og erstatter ikke en full NS 3031-beregning.
-            </div>
-            """,
+            f"<div style='font-size:11.5px;color:#666;margin-top:4px;'>{res.fjernvarme_text}</div>",
             unsafe_allow_html=True,
         )
 
-    # Hvor mye må energibruken ned for å nå neste karakter (ny ordning)?
-    if better_label is None:
-        improve_text = "Bygget har allerede beste mulige karakter (A) i ny ordning."
-    elif dk_m2 <= 0:
-        improve_text = f"Bygget ligger allerede innenfor grensen for {better_label}."
-    else:
-        improve_text = (
-            f"For å gå fra <b>{new_label}</b> til <b>{better_label}</b> må levert energi "
-            f"reduseres med minst <b>{dk_m2:.1f} kWh/m²</b> "
-            f"(ca. <b>{dk_pct:.0f} %</b>, tilsvarende ca. <b>{fmt_int(dk_tot)}</b> kWh/år)."
-        )
-
     st.markdown(
         f"""
         <div style='margin-top:14px; padding:10px 14px; border-radius:10px;
@@ -814,118 +248,466 @@ with left:
           </div>
 
           <div style='font-size:13px; color:#222; line-height:1.4;'>
-            {improve_text}
+            {res.improve_text}
           </div>
 
         </div>
         """,
         unsafe_allow_html=True,
     )
-# ---------- HØYRE: formålsfordelt forbruk ----------
-with right:
-    # ---------- PIE: formålsfordelt forbruk ----------
-    title("Energiforbruk formålsfordelt*")
 
-    pct = SHARES[kategori].copy()
 
-    # Korreksjoner (NVE 2016:24)
+def formalsfordeling(kategori, figur):
+    title("Energiforbruk formålsfordelt*")
+
+    # Korrigert formålsfordeling (NVE 2016:24) er forhåndsberegnet pr. kategori i energisjekk.core
     note_text = None
     if kategori == "Forretningsbygning":
-        pct["El.spesifikk"] += pct.get("Belysning", 0)
-        pct["Belysning"] = 0
         note_text = "For <b>Forretningsbygning</b> er belysning inkludert i <b>El.spesifikk</b> (NVE 2016:24)."
     elif kategori == "Sykehus":
-        pct["El.spesifikk"] += pct.get("Ventilasjon", 0) + pct.get("Belysning", 0)
-        pct["Ventilasjon"] = 0
-        pct["Belysning"] = 0
         note_text = "For <b>Sykehus</b> er ventilasjon og belysning inkludert i <b>El.spesifikk</b> (NVE 2016:24)."
 
-    FORMAL_ORDER  = ["Oppvarming","Tappevann","Ventilasjon","Belysning","El.spesifikk","Kjøling"]
-    FORMAL_COLORS = {
-        "Oppvarming":"#33C831","Tappevann":"#097E3E","Ventilasjon":"#74D680",
-        "Belysning":"#FFC107","El.spesifikk":"#2E7BB4","Kjøling":"#00ACC1"
-    }
-
-    def disp(name: str) -> str:
-        if name == "El.spesifikk" and kategori == "Forretningsbygning":
-            return "El.spesifikk (inkl. belysning)"
-        if name == "El.spesifikk" and kategori == "Sykehus":
-            return "El.spesifikk (inkl. ventilasjon og belysning)"
-        return name
-
-    ordered      = [(k, pct[k]) for k in FORMAL_ORDER if k in pct and pct[k] > 0]
-    pie_values   = [arsforbruk * (v/100) for _, v in ordered]
-    pie_labels   = [f"{disp(k)}\n{fmt_int(val)} kWh" for k, val in zip([k for k,_ in ordered], pie_values)]
-    pie_colors   = [FORMAL_COLORS[k] for k,_ in ordered]
-
-    fig_pie, ax_pie = plt.subplots(figsize=(5.2, 4.8))
-    ax_pie.pie(pie_values, labels=pie_labels, colors=pie_colors,
-               autopct=lambda p: f"{p:.1f}%", startangle=90, counterclock=False)
-    ax_pie.axis("equal")
-
-    buf_pie = io.BytesIO()
-    fig_pie.savefig(buf_pie, format="png", bbox_inches="tight", dpi=160)
-    buf_pie.seek(0)
-    st.image(buf_pie, width=580)
+    # Figuren kommer ferdig fra resultatcachen (PNG-bytes eller Vega-Lite-spesifikasjon)
+    if CHART_BACKEND == "vega":
+        st.vega_lite_chart(figur)
+    else:
+        st.image(figur, width=580)
 
     st.markdown(
         f"<div style='font-size:12px;color:#666;margin-top:6px;'>* {note_text if note_text else 'Kategorier følger NVE 2016:24.'}</div>",
         unsafe_allow_html=True
     )
 
-    # Litt luft mellom figurene
-    st.markdown("<div style='height:16px;'></div>", unsafe_allow_html=True)
 
-    # ---------- BAR: referanse vs. bygg ----------
+def referansesoyle(figur):
     title("Energibruk pr. m² BRA (referanse vs. bygg)")
 
-    cols = REF["labels"] + ["AKTUELT BYGG"]
-    vals = REF[kategori] + [sp]
+    if CHART_BACKEND == "vega":
+        st.vega_lite_chart(figur)
+    else:
+        st.image(figur, width=480)
+
+
+def karakterstige(kategori, arsforbruk, areal):
+    # Hele stigen (alle bedre karakterer) i begge ordninger, med og uten fjernvarmevekting
+    from energisjekk.whatif import VARIANT_NAMES, curve_data, ladder_rows, what_if
+
+    res = what_if(kategori, arsforbruk, areal)
+    rader = ladder_rows(res)
+    if not rader:
+        st.markdown("Bygget har allerede karakter **A** i alle varianter.")
+    else:
+        linjer = ["| Karakter | " + " | ".join(VARIANT_NAMES) + " |", "|---|" + "---:|" * len(VARIANT_NAMES)]
+        for karakter, celler in rader:
+            tekst = [
+                "–" if c is None else f"{c[0]:.1f} kWh/m² ({c[1]:.0f} %)<br>{fmt_int(c[2])} kWh/år"
+                for c in celler
+            ]
+            linjer.append(f"| **{karakter}** | " + " | ".join(tekst) + " |")
+        st.markdown("\n".join(linjer), unsafe_allow_html=True)
+        st.caption(
+            "Nødvendig reduksjon i levert energi (kWh/m² BRA, andel og kWh pr. år) for å nå karakteren. "
+            "Reduksjonen er antatt fordelt likt på alle formål. – betyr at bygget allerede har karakteren."
+        )
 
-    fig_bar, ax_bar = plt.subplots(figsize=(4.6, 2.3))
-    bar_colors = [BAR_LIGHT] * (len(vals)-1) + [BAR_DARK]
-    bars = ax_bar.bar(cols, vals, color=bar_colors, width=0.55)
+    if CHART_BACKEND == "vega":
+        st.vega_lite_chart(whatif_spec(*curve_data(res), WHATIF_COLORS, PRIMARY))
+    else:
+        st.image(whatif_png(kategori, arsforbruk, areal), width=640)
 
-    ax_bar.set_ylabel("kWh/m² BRA", fontsize=10, color=PRIMARY, labelpad=4)
-    ax_bar.set_ylim(0, max(vals)*1.25)
-    ax_bar.spines["top"].set_visible(False)
-    ax_bar.spines["right"].set_visible(False)
 
-    for t in ax_bar.get_xticklabels():
-        t.set_rotation(20)
-        t.set_ha("right")
+@st.fragment
+def tiltakssimulering(kategori, arsforbruk, areal, har_fjernvarme):
+    from energisjekk.montecarlo import SAMPLES, simulate
 
-    for b, v in zip(bars, vals):
-        ax_bar.text(b.get_x()+b.get_width()/2, v+3, f"{v:.1f}",
-                    ha="center", va="bottom", fontsize=8, color=PRIMARY)
+    valgte = st.multiselect("Velg tiltak", recommended(kategori), key=f"mc_tiltak_{kategori}")
+    if not valgte:
+        st.caption("Velg ett eller flere tiltak for å simulere besparelsen.")
+        return
 
-    # Fremhev "AKTUELT BYGG" uten kantlinje
-    bars[-1].set_linewidth(0)
-    bars[-1].set_alpha(0.95)
+    sim = simulate(kategori, arsforbruk, areal, valgte, har_fjernvarme)
+    p = sim.percentiles
+    st.markdown(
+        f"**Forventet årsforbruk etter tiltak:** {fmt_int(p[50])} kWh "
+        f"(90 % intervall {fmt_int(p[5])}–{fmt_int(p[95])} kWh, "
+        f"besparelse {fmt_int(arsforbruk - p[50])} kWh / {(1 - p[50] / arsforbruk) * 100 if arsforbruk else 0:.0f} %)"
+    )
+    linjer = ["| Karakter | Gammel ordning | Ny ordning | Minst denne (ny) |", "|---|---:|---:|---:|"]
+    for g, karakter in enumerate(GRADES):
+        if sim.old_prob[g] or sim.new_prob[g]:
+            linjer.append(
+                f"| **{karakter}** | {sim.old_prob[g] * 100:.0f} % | {sim.new_prob[g] * 100:.0f} % "
+                f"| {sim.new_reach[g] * 100:.0f} % |"
+            )
+    st.markdown("\n".join(linjer))
+    uten = [v for v in valgte if v not in sim.measures]
+    st.caption(
+        f"{fmt_int(SAMPLES)} trekk. Hvert tiltak trekker en besparelse jevnt fordelt i intervallet fra tiltakstabellen, "
+        "på formålene det gjelder; flere tiltak på samme formål virker multiplikativt."
+        + (f" Uten energieffekt i tabellen: {', '.join(uten)}." if uten else "")
+    )
 
-    buf_bar = io.BytesIO()
-    fig_bar.savefig(buf_bar, format="png", bbox_inches="tight", dpi=200)
-    buf_bar.seek(0)
-    st.image(buf_bar, width=480)
 
-if vis_tiltak:
-    # --- Tiltakskode her ---
+@st.fragment
+def tiltakspakke(kategori, arsforbruk, areal, har_fjernvarme):
+    from energisjekk.optimizer import minimum_measures
+
+    naa = assess(kategori, arsforbruk, areal, har_fjernvarme).new_label
+    bedre = GRADES[:GRADES.index(naa)]
+    if not bedre:
+        st.markdown("Bygget har allerede karakter **A** i ny ordning.")
+        return
+    maal = st.selectbox("Målkarakter (ny ordning)", bedre[::-1], key="maalkarakter")
+    plan = minimum_measures(kategori, arsforbruk, areal, maal, har_fjernvarme)
+    if not plan.reached:
+        st.markdown(
+            f"Selv alle anbefalte tiltak gir forventet karakter **{plan.expected_label}** "
+            f"({fmt_int(plan.expected_kwh)} kWh/år) – **{maal}** nås ikke med tiltakene alene."
+        )
+        return
+    st.markdown(
+        f"**{len(plan.measures)} tiltak** gir forventet karakter **{plan.expected_label}** "
+        f"({fmt_int(plan.expected_kwh)} kWh/år, besparelse {fmt_int(arsforbruk - plan.expected_kwh)} kWh):\n\n"
+        + "\n".join(f"- {m}" for m in plan.measures)
+    )
+    st.caption(
+        "Færrest mulig anbefalte tiltak, med midtpunktet i besparelsesintervallet fra tiltakstabellen. "
+        "Se simuleringen over for usikkerheten."
+    )
+
+
+@st.fragment
+def energimerkeregister(kategori, sp):
+    # Minnekartlagt lager bygget med `energisjekk dump.csv --energimerker -o MAPPE`
+    from energisjekk.register import open_register
+
+    register = open_register()
+    if register is None:
+        st.info(
+            "Ingen registerdump er lastet. Bygg et lager med "
+            "`energisjekk energimerker.csv --energimerker -o energimerker/` og start appen med "
+            "`ENERGISJEKK_REGISTER=energimerker/`."
+        )
+        return
+    n = register.count(kategori)
+    if not n:
+        st.markdown(f"Registeret har ingen attester for **{kategori}**.")
+        return
+
+    andel = register.percentile(kategori, sp)
+    st.markdown(
+        f"Bygget ({sp:.0f} kWh/m²) bruker mer energi pr. m² enn **{andel:.0f} %** av "
+        f"{fmt_int(n)} registrerte attester for {kategori.lower()}."
+    )
+    kv = register.quantiles(kategori)
+    st.markdown(
+        "| Persentil | " + " | ".join(f"P{q}" for q in kv) + " |\n|---|" + "---:|" * len(kv) + "\n"
+        "| kWh/m² | " + " | ".join(f"{v:.0f}" for v in kv.values()) + " |"
+    )
+
+    attest, ny = register.grade_counts(kategori), register.new_grade_counts(kategori)
+    sum_attest, sum_ny = sum(attest.values()) or 1, sum(ny.values()) or 1
+    linjer = ["| Karakter | På attesten | Ny ordning (levert energi) |", "|:---:|---:|---:|"]
+    for g in GRADES:
+        linjer.append(f"| **{g}** | {attest[g] / sum_attest * 100:.0f} % | {ny[g] / sum_ny * 100:.0f} % |")
+    st.markdown("\n".join(linjer))
+    st.caption(
+        "Attestene bruker beregnet levert energi (normert), bygget her målt levert energi – sammenligningen "
+        f"er veiledende. Lager: {register.meta['source']}, bygget {register.meta['built']}."
+    )
+
+    sok = st.text_input("Finn attest (adresse eller kommunenr-gnr/bnr)", key="register_sok",
+                        placeholder="Storgata 1A eller 0301-208/1")
+    if sok:
+        treff = register.lookup(sok)
+        if not treff:
+            st.markdown("Ingen attester funnet.")
+        else:
+            linjer = ["| Bygg | Kategori | kWh/m² | Karakter | Persentil |", "|---|---|---:|:---:|---:|"]
+            for m in treff:
+                linjer.append(
+                    f"| {m.label} | {m.kategori} | {m.sp:.0f} | {m.karakter or '–'} | {m.percentile:.0f} % |"
+                )
+            st.markdown("\n".join(linjer))
+
+
+@st.fragment
+def graddagskorrigering(kategori, arsforbruk, areal, har_fjernvarme):
+    from energisjekk.degreedays import available, factor, locations, normalize, table_path, years
+
+    if not available():
+        st.info(
+            "Graddagskorrigering krever offisielle graddagstall. Start appen med "
+            "`ENERGISJEKK_GRADDAGER=graddager.csv` (kolonnene sted;ar;graddager, med ar = normal for "
+            "normalåret) – tall fra Meteorologisk institutt eller Enova."
+        )
+        return
+    a, b = st.columns(2)
+    sted = a.selectbox("Sted", locations(), index=locations().index("Oslo") if "Oslo" in locations() else 0)
+    ar = b.selectbox("Forbruksår", years(sted)[::-1])
+
+    normalisert = float(normalize(kategori, arsforbruk, sted, ar)[0])
+    raa = assess(kategori, arsforbruk, areal, har_fjernvarme)
+    norm = assess(kategori, normalisert, areal, har_fjernvarme)
+    f = float(factor(sted, [ar])[0])
+    st.markdown(
+        f"| | Årsforbruk | kWh/m² | Gammel | Ny |\n|---|---:|---:|:---:|:---:|\n"
+        f"| Målt ({ar}) | {fmt_int(arsforbruk)} kWh | {raa.sp:.1f} | **{raa.old_label}** | **{raa.new_label}** |\n"
+        f"| Normalår | {fmt_int(normalisert)} kWh | {norm.sp:.1f} | **{norm.old_label}** | **{norm.new_label}** |"
+    )
+    st.caption(
+        f"Oppvarmingsandelen ({raa.andel_oppvarming * 100:.0f} % for {kategori}) er skalert med "
+        f"normalårets graddager / graddager i {ar} = {f:.3f}".replace(".", ",")
+        + f". Graddagstabell: {table_path()}."
+    )
+
+
+@st.fragment
+def historikk(kategori, arsforbruk, areal, har_fjernvarme):
+    # Lokal SQLite (ENERGISJEKK_HISTORIKK); bare det lagrede året karaktersettes på nytt
+    from energisjekk.history import building_history, category_trend, connect, find_buildings, save_year, trend_data
+
+    a, b, c = st.columns([2, 1, 1])
+    bygg_id = a.text_input("Bygg-ID", key="historikk_bygg", placeholder="f.eks. gnr/bnr eller eget nummer").strip()
+    st.session_state.setdefault("historikk_ar", time.localtime().tm_year - 1)
+    ar = b.number_input("År", min_value=1990, max_value=2100, step=1, key="historikk_ar")
+    c.markdown("<div style='height:28px;'></div>", unsafe_allow_html=True)
+    if c.button("Lagre år", disabled=not bygg_id, key="historikk_lagre"):
+        try:
+            lagret = save_year(connect(), bygg_id, int(ar), kategori, arsforbruk, areal, har_fjernvarme)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.toast(f"{ar} lagret for {bygg_id}" if lagret else f"{ar} var allerede lagret med samme tall")
+
+    # Databasefilen lages først når noe lagres
+    conn = connect(create=False)
+    if conn is None:
+        st.caption("Skriv inn en bygg-ID og lagre inndataene over som ett år for å bygge opp historikk.")
+        return
+    if not bygg_id:
+        treff = find_buildings(conn, limit=10)
+        if treff:
+            st.caption("Lagrede bygg: " + ", ".join(t[0] for t in treff) + (" …" if len(treff) == 10 else ""))
+        else:
+            st.caption("Skriv inn en bygg-ID og lagre inndataene over som ett år for å bygge opp historikk.")
+        return
+
+    historie = building_history(conn, bygg_id)
+    if not historie:
+        st.markdown(f"Ingen lagrede år for **{bygg_id}**.")
+        return
+    linjer = ["| År | Kategori | Årsforbruk | kWh/m² | Gammel | Ny |", "|---|---|---:|---:|:---:|:---:|"]
+    for r in historie:
+        linjer.append(
+            f"| {r.ar} | {r.kategori} | {fmt_int(r.arsforbruk)} kWh | {r.sp:.1f} "
+            f"| **{r.old_label}** | **{r.new_label}** |"
+        )
+    st.markdown("\n".join(linjer))
+    if len(historie) > 1:
+        if CHART_BACKEND == "vega":
+            st.vega_lite_chart(history_spec(*trend_data(historie), PRIMARY))
+        else:
+            st.image(history_png(*trend_data(historie)), width=600)
+
+    trend = category_trend(conn, historie[-1].kategori)
+    if len(trend) > 1:
+        st.markdown(f"**Alle lagrede bygg i kategorien {historie[-1].kategori.lower()}**")
+        linjer = ["| År | Bygg | Snitt kWh/m² | " + " | ".join(GRADES) + " |", "|---|---:|---:|" + ":---:|" * len(GRADES)]
+        for t in trend:
+            linjer.append(
+                f"| {t.ar} | {t.bygg} | {t.sp_snitt:.0f} | " + " | ".join(str(t.new_counts[g]) for g in GRADES) + " |"
+            )
+        st.markdown("\n".join(linjer))
+        st.caption("Karakterfordelingen er i ny ordning.")
+
+
+def tiltak(kategori):
     title("Tiltak som ofte gir effekt for denne typen bygg")
 
-    anb_liste = ANBEFALTE_TILTAK.get(kategori, ANBEFALTE_TILTAK["default"])
-    df_anb = TILTAK_DF[TILTAK_DF["Tiltak"].isin(anb_liste)].copy()
+    from energisjekk.frames import anbefalte_frame, tiltak_frame
 
     st.dataframe(
-        df_anb.set_index("Tiltak"),
+        anbefalte_frame(kategori),
         use_container_width=True,
     )
 
     with st.expander("Se full oversikt over tiltak og effekter"):
         st.dataframe(
-            TILTAK_DF.set_index("Tiltak"),
+            tiltak_frame(),
             use_container_width=True,
         )
-  
+
+
+# ---------- LAYOUT ----------
+left, right = st.columns([1, 1.5])
+with left:
+    tek17_plass = st.container()
+    # Fjernvarme påvirker kun NY energikarakter – derfor ligger valget ved karakterene og ikke
+    # øverst. Det står utenfor fragmentene: alle seksjonene under bruker verdien, så en endring
+    # må kjøre hele siden på nytt.
+    st.session_state.setdefault("fjernvarme", False)
+    har_fjernvarme = st.checkbox(
+        "Bygget har fjernvarme som hovedoppvarming",
+        help="Brukes kun til en forenklet vekting i ny energikarakter (oppvarming vektes 0,45).",
+        key="fjernvarme",
+    )
+
+# Samme kanoniske inndata (også fra en delt lenke) gir ferdig resultat fra cachen
+with diag.section("Resultat"):
+    resultat = result(Inputs(kategori, int(arsforbruk), int(areal), har_fjernvarme), CHART_BACKEND)
+
+with left:
+    with tek17_plass, diag.section("TEK17"):
+        forbruk_og_tek17(arsforbruk, sp, resultat.assessment.tek17)
+    karakterpanel(kategori, arsforbruk, areal, har_fjernvarme)
+
+# ---------- HØYRE: formålsfordelt forbruk og referanser ----------
+with right:
+    with diag.section("Formålsfordeling (kake)"):
+        formalsfordeling(kategori, resultat.pie)
+
+    # Litt luft mellom figurene
+    st.markdown("<div style='height:16px;'></div>", unsafe_allow_html=True)
+
+    with diag.section("Referanser (søyle)"):
+        referansesoyle(resultat.bar)
+
+with st.expander("Hva skal til? – alle bedre karakterer og hva-om-kurve", expanded=False):
+    with diag.section("Hva-om"):
+        karakterstige(kategori, arsforbruk, areal)
+
+with st.expander("Sammenligning med energimerkeregisteret", expanded=False):
+    with diag.section("Energimerkeregister"):
+        energimerkeregister(kategori, sp)
+
+with st.expander("Graddagskorrigert karakter (normalår)", expanded=False):
+    with diag.section("Graddager"):
+        graddagskorrigering(kategori, arsforbruk, areal, har_fjernvarme)
+
+with st.expander("Historikk – flere år (lagret lokalt)", expanded=False):
+    with diag.section("Historikk"):
+        historikk(kategori, arsforbruk, areal, har_fjernvarme)
+
+with st.expander("Simuler tiltak (Monte Carlo)", expanded=False):
+    with diag.section("Tiltakssimulering"):
+        tiltakssimulering(kategori, arsforbruk, areal, har_fjernvarme)
+
+with st.expander("Minste tiltakspakke for målkarakter", expanded=False):
+    with diag.section("Tiltakspakke"):
+        tiltakspakke(kategori, arsforbruk, areal, har_fjernvarme)
+
+if vis_tiltak:
+    with diag.section("Tiltak"):
+        tiltak(kategori)
+
+# ---------- PORTEFØLJE (CSV/Excel) ----------
+# Egen fragment: opplasting og behandling kjører uten å rendre resten av siden på nytt
+@st.fragment
+def portefolje():
+    fil = st.file_uploader(
+        "Last opp CSV eller Excel med kolonnene kategori, årsforbruk, areal og (valgfritt) fjernvarme",
+        type=["csv", "txt", "xlsx", "xlsm"],
+    )
+    if fil is None or not st.button("Vurder fil"):
+        return
+
+    from energisjekk.importer import grade_file
+
+    fremdrift = st.progress(0.0, text="Leser fil …")
+    resultat = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024, mode="w+b")
+    ut = io.TextIOWrapper(resultat, encoding="utf-8-sig", newline="")
+    try:
+        rader = grade_file(
+            fil, fil.name, ut,
+            progress=lambda andel, n: fremdrift.progress(andel, text=f"{fmt_int(n)} bygg vurdert …"),
+        )
+    except ValueError as e:
+        ERRORS.inc(kind="upload")
+        st.error(f"Kunne ikke lese filen: {e}")
+        return
+    ut.detach()  # resultatfilen skal leve videre etter at TextIOWrapper-en er ryddet bort
+    fremdrift.progress(1.0, text=f"Ferdig – {fmt_int(rader)} bygg vurdert.")
+
+    def last_ned():
+        # Leses først når brukeren trykker på knappen; til da ligger resultatet i den
+        # midlertidige filen (på disk over 16 MB) og ikke som bytes i hver rerun
+        resultat.seek(0)
+        return resultat.read()
+
+    st.download_button(
+        "Last ned resultat (CSV)",
+        data=last_ned,
+        file_name=pathlib.Path(fil.name).stem + "_energikarakter.csv",
+        mime="text/csv",
+        on_click="ignore",  # en rerun ville skjult knappen før nedlastingen er hentet
+    )
+
+with st.expander("Porteføljevurdering (CSV/Excel)", expanded=False):
+    portefolje()
+
+# ---------- AMS-TIMESVERDIER ----------
+def _bruk_ams_forbruk(kwh):
+    # Callback: widget-verdien kan bare settes før number_input tegnes på nytt
+    st.session_state["arsforbruk"] = int(round(kwh))
+
+
+@st.fragment
+def ams_import():
+    fil = st.file_uploader(
+        "Last opp timesverdier (CSV/Excel/Parquet) med kolonnene målepunkt, tid og kWh",
+        type=["csv", "txt", "xlsx", "xlsm", "parquet"],
+        key="ams_fil",
+    )
+    if fil is not None and st.button("Les timesverdier"):
+        from energisjekk.ams import aggregate
+
+        fremdrift = st.progress(0.0, text="Leser timesverdier …")
+        try:
+            agg = aggregate(
+                fil, fil.name,
+                progress=lambda n: fremdrift.progress(
+                    min(fil.tell() / fil.size, 1.0) if fil.size else 0.0, text=f"{fmt_int(n)} timer lest …"
+                ),
+            )
+        except ValueError as e:
+            ERRORS.inc(kind="upload")
+            st.error(f"Kunne ikke lese filen: {e}")
+            return
+        fremdrift.progress(1.0, text=f"Ferdig – {fmt_int(agg.rows)} timer, {fmt_int(agg.invalid)} ugyldige.")
+        st.session_state["ams_resultat"] = agg.result()
+
+    resultat = st.session_state.get("ams_resultat")
+    if resultat is None or resultat.empty:
+        return
+
+    from energisjekk.ams import MONTHS
+
+    valg = st.selectbox(
+        "Målepunkt og år", range(len(resultat)),
+        format_func=lambda i: f"{resultat['malepunkt'].iat[i]} – {resultat['ar'].iat[i]}",
+    )
+    rad = resultat.iloc[valg]
+    a, b, c = st.columns(3)
+    a.metric("Årsforbruk", f"{fmt_int(rad['arsforbruk'])} kWh", help=f"{fmt_int(rad['timer'])} timer med måledata")
+    b.metric("Maks effekt", f"{rad['maks_effekt_kw']:.1f} kW".replace(".", ","))
+    c.metric("Grunnlast (kl. 01–06)", f"{rad['grunnlast_kw']:.1f} kW".replace(".", ","))
+    st.bar_chart(
+        {"Måned": list(MONTHS), "kWh": [rad[f"kwh_{m}"] for m in MONTHS]},
+        x="Måned", y="kWh", color=PRIMARY, height=220,
+    )
+    if st.button("Bruk som årsforbruk", on_click=_bruk_ams_forbruk, args=(rad["arsforbruk"],)):
+        st.rerun(scope="app")  # karakter, TEK17 og formålsfordeling beregnes med målt forbruk
+    st.download_button(
+        "Last ned alle målepunkt (CSV)",
+        data=resultat.to_csv(sep=";", decimal=",", index=False).encode("utf-8-sig"),
+        file_name="ams_arsforbruk.csv",
+        mime="text/csv",
+    )
+
+with st.expander("Timesverdier fra AMS-målere", expanded=False):
+    ams_import()
+
 # ---------- KILDER ----------
 with st.expander("Kilder og forutsetninger", expanded=False):
     st.markdown("""
@@ -938,5 +720,14 @@ with st.expander("Kilder og forutsetninger", expanded=False):
     - **Referansehistorikk:** NVE/Enova referansetall for ulike byggeperioder. 
     """)
 
-
-
+RERUN_SECONDS.observe(time.perf_counter() - _rerun_start)
+
+# ---------- DIAGNOSTIKK ----------
+if diag.enabled:
+    profil = diag.stop()
+    with st.expander("Diagnostikk – tidsbruk pr. seksjon", expanded=False):
+        st.markdown(diag.markdown())
+        if profil is not None:
+            st.caption(f"cProfile lagret: {profil} (les med `python -m pstats {profil}`)")
+        elif diag.profile_busy:
+            st.caption("cProfile var opptatt av en annen sesjon – denne rerunen ble ikke profilert.")
@@ -0,0 +1,47 @@
+# tests/test_ams.py
+# Aggregering av AMS-timesverdier (energisjekk.ams.AmsAggregator) til årsforbruk, maks effekt
+# og grunnlast pr. målepunkt og år.
+import pandas as pd
+import pytest
+
+from energisjekk.ams import AmsAggregator
+
+
+def _hours(kwh, meter="707057500000000001"):
+    return pd.DataFrame({
+        "Målepunkt": [meter] * len(kwh),
+        "Tid": [f"2024-01-01T{h:02d}:00:00+01:00" for h in range(len(kwh))],
+        "kWh": kwh,
+    })
+
+
+def test_mixed_kwh_column():
+    # Excel-kolonner kan blande tall og tekst med desimalkomma; tallene skal ikke forsvinne
+    agg = AmsAggregator()
+    agg.add(_hours(pd.Series([1, "2,5", 3.0, "1 000"], dtype=object)))
+    res = agg.result()
+    assert agg.invalid == 0
+    assert res["arsforbruk"].tolist() == [1006.5]
+    assert res["maks_effekt_kw"].tolist() == [1000.0]
+
+
+def test_totals_peak_and_base_load():
+    kwh = [float(h % 7) for h in range(24)]
+    agg = AmsAggregator()
+    agg.add(_hours([f"{v:.1f}".replace(".", ",") for v in kwh[:12]]))
+    agg.add(_hours(kwh).iloc[12:])  # neste bit som tall
+    res = agg.result().iloc[0]
+    assert res["ar"] == 2024
+    assert res["timer"] == 24
+    assert res["arsforbruk"] == pytest.approx(sum(kwh))
+    assert res["kwh_jan"] == pytest.approx(sum(kwh))
+    assert res["maks_effekt_kw"] == 6.0
+    # Grunnlast: snitt av timene 01–05
+    assert res["grunnlast_kw"] == pytest.approx(sum(kwh[1:6]) / 5)
+
+
+def test_invalid_rows_are_counted():
+    agg = AmsAggregator()
+    agg.add(_hours(pd.Series(["1,0", "", "abc", None], dtype=object)))
+    assert agg.invalid == 3
+    assert agg.result()["arsforbruk"].tolist() == [1.0]
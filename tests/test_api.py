@@ -0,0 +1,90 @@
+# tests/test_api.py
+# Karakter-API-et (energisjekk.api) mot en ekte server på en ledig port: enkeltbygg, grenser for
+# forespørselsstørrelse (også chunked) og bulk-NDJSON med ugyldige linjer.
+import http.client
+import json
+import threading
+
+import pytest
+
+from energisjekk import api
+from energisjekk.core import assess
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = api.make_server(0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _request(server, method, path, body=None, chunks=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    if chunks is None:
+        conn.request(method, path, body=body)
+    else:
+        conn.putrequest(method, path)
+        conn.putheader("Transfer-Encoding", "chunked")
+        conn.endheaders()
+        for chunk in chunks:
+            conn.send(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        conn.send(b"0\r\n\r\n")
+    resp = conn.getresponse()
+    data = resp.read()
+    conn.close()
+    return resp.status, data
+
+
+def test_grade_matches_assess():
+    out = api.grade({"kategori": "Kontorbygning", "arsforbruk": "500 000", "areal": 3000, "fjernvarme": "ja"})
+    a = assess("Kontorbygning", 500_000, 3_000, True)
+    assert (out["old_label"], out["new_label"], out["sp_ny_vektet"]) == (a.old_label, a.new_label, a.sp_ny_vektet)
+
+
+@pytest.mark.parametrize("data", [
+    {"kategori": "Kontorbygning", "arsforbruk": 1e308, "areal": 1e-10},
+    {"kategori": "Kontorbygning", "arsforbruk": 5, "areal": 0},
+    {"kategori": "", "arsforbruk": 5, "areal": 1},
+    {"kategori": "Kontorbygning", "arsforbruk": "mye", "areal": 1},
+], ids=["ikke-endelig", "areal-0", "kategori", "tall"])
+def test_grade_rejects(data):
+    with pytest.raises(ValueError):
+        api.grade(data)
+
+
+def test_single_get_and_post(server):
+    status, body = _request(server, "GET", "/v1/karakter?kategori=Kontorbygning&arsforbruk=500000&areal=3000")
+    assert status == 200 and json.loads(body)["new_label"] == assess("Kontorbygning", 500_000, 3_000).new_label
+    status, body = _request(server, "POST", "/v1/karakter", body=b'{"kategori":"Kontorbygning","areal":0,"arsforbruk":1}')
+    assert status == 400 and "areal" in json.loads(body)["feil"]
+
+
+def test_chunked_body_limit(server, monkeypatch):
+    monkeypatch.setattr(api, "MAX_BODY", 1024)
+    body = json.dumps({"kategori": "Kontorbygning", "arsforbruk": 500_000, "areal": 3_000}).encode()
+    status, _ = _request(server, "POST", "/v1/karakter", chunks=[body[:10], body[10:]])
+    assert status == 200
+    status, data = _request(server, "POST", "/v1/karakter", chunks=[b" " * 600, b" " * 600])
+    assert status == 413 and "1024" in json.loads(data)["feil"]
+    status, _ = _request(server, "POST", "/v1/karakter", body=b" " * 2048)
+    assert status == 413
+
+
+def test_bulk_invalid_lines(server):
+    lines = [
+        b'{"id": "a", "kategori": "Kontorbygning", "arsforbruk": 500000, "areal": 3000}',
+        b'{"id": "b", "kategori": ',  # avkuttet JSON
+        b'',
+        b'{"id": "c", "kategori": "Kontorbygning", "arsforbruk": 500000, "areal": 0}',
+        b'[1, 2]',
+    ]
+    status, data = _request(server, "POST", "/v1/karakter/bulk", chunks=[b"\n".join(lines)[:50], b"\n".join(lines)[50:]])
+    assert status == 200
+    rows = [json.loads(line) for line in data.splitlines()]
+    assert [r["linje"] for r in rows] == [1, 2, 4, 5]
+    assert rows[0]["id"] == "a" and "feil" not in rows[0]
+    assert rows[1]["feil"].startswith("ugyldig JSON") and "id" not in rows[1]
+    assert rows[2]["id"] == "c" and "areal" in rows[2]["feil"]
+    assert rows[3]["feil"] == "forventet et JSON-objekt"
@@ -0,0 +1,48 @@
+# tests/test_charts.py
+# Rendering via prosesspoolen (energisjekk.charts.render) skal alltid gi et bilde: ved timeout,
+# ødelagt pool eller avbrutt jobb tegnes figuren direkte i tråden i stedet.
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from energisjekk import charts
+
+
+class _Pool:
+    def __init__(self, future):
+        self.future = future
+        self.shutdowns = []
+
+    def submit(self, fn, *args):
+        return self.future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns.append(cancel_futures)
+
+
+def _cancelled():
+    f = Future()
+    f.cancel()
+    return f
+
+
+def _broken():
+    f = Future()
+    f.set_exception(BrokenProcessPool("arbeideren døde"))
+    return f
+
+
+@pytest.mark.parametrize("future", [_cancelled, _broken], ids=["avbrutt", "ødelagt"])
+def test_render_falls_back_inline(monkeypatch, future):
+    pool = _Pool(future())
+    monkeypatch.setattr(charts, "_get_pool", lambda: pool)
+    monkeypatch.setattr(charts, "_pool", pool)
+    assert charts.render(lambda x: x * 2, 21) == 42
+    # En ødelagt pool byttes ut uten å avbryte andre sesjoners jobber i kø
+    assert all(c is False for c in pool.shutdowns)
+
+
+def test_render_png_inline():
+    png = charts.render(charts.render_bar_png, ["a", "AKTUELT BYGG"], [100.0, 120.0], "#A8E6A1", "#097E3E", "#097E3E")
+    assert png.startswith(b"\x89PNG")
@@ -0,0 +1,93 @@
+# tests/test_degreedays.py
+# Graddagskorrigering (energisjekk.degreedays) mot håndregnede verdier fra en liten tabell:
+# bare oppvarmingsandelen skaleres med normalår / årets graddager.
+import numpy as np
+import pandas as pd
+import pytest
+
+from energisjekk import degreedays
+from energisjekk.core import assess
+from energisjekk.importer import grade_chunk
+
+TABLE = """\
+# kommentarlinjer hoppes over
+sted;ar;graddager
+Oslo;normal;4000
+Oslo;2023;3200
+Oslo;2022;5000
+Bergen;Normal;3000
+Bergen;2022;3750,0
+"""
+
+
+def _clear():
+    degreedays.load_table.cache_clear()
+    degreedays._factors.cache_clear()
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    path = tmp_path / "graddager.csv"
+    path.write_text(TABLE, encoding="utf-8")
+    monkeypatch.setenv("ENERGISJEKK_GRADDAGER", str(path))
+    _clear()
+    yield path
+    _clear()
+
+
+def test_not_configured(monkeypatch):
+    monkeypatch.delenv("ENERGISJEKK_GRADDAGER", raising=False)
+    _clear()
+    assert not degreedays.available()
+    with pytest.raises(ValueError):
+        degreedays.load_table()
+
+
+def test_missing_normal_year(tmp_path, monkeypatch):
+    path = tmp_path / "graddager.csv"
+    path.write_text("sted;ar;graddager\nOslo;2023;3200\n", encoding="utf-8")
+    monkeypatch.setenv("ENERGISJEKK_GRADDAGER", str(path))
+    _clear()
+    with pytest.raises(ValueError, match="normalår"):
+        degreedays.load_table()
+    _clear()
+
+
+def test_table_and_factors(table):
+    assert degreedays.available()
+    assert degreedays.locations() == ("Bergen", "Oslo")
+    assert degreedays.years("Oslo") == (2022, 2023)
+    # 4000/3200 = 1,25, 4000/5000 = 0,8, 3000/3750 = 0,8; manglende år gir NaN
+    np.testing.assert_allclose(degreedays.factor("Oslo", [2023, 2022, 2021, np.nan]), [1.25, 0.8, np.nan, np.nan])
+    np.testing.assert_allclose(degreedays.factor("Bergen", 2022), 0.8)
+    with pytest.raises(KeyError):
+        degreedays.factor("Tromsø", 2023)
+
+
+def test_normalize_hand_computed(table):
+    # Kontorbygning 31 % oppvarming: 690 000 + 310 000 x 1,25 = 1 077 500
+    # Skolebygning 58 % oppvarming: 210 000 + 290 000 x 0,8 = 442 000
+    out = degreedays.normalize(
+        ["Kontorbygning", "Skolebygning", "Kontorbygning", "Kontorbygning"],
+        [1_000_000, 500_000, 1_000_000, 1_000_000],
+        ["Oslo", "Bergen", "Tromsø", "Oslo"],
+        [2023, 2022, 2023, 2019],
+    )
+    np.testing.assert_allclose(out, [1_077_500, 442_000, np.nan, np.nan])
+    # Ett sted for alle bygg
+    np.testing.assert_allclose(degreedays.normalize("Kontorbygning", [1_000_000, 2_000_000], "Oslo", 2022),
+                               [690_000 + 310_000 * 0.8, 2 * (690_000 + 310_000 * 0.8)])
+
+
+def test_importer_grades_normalized(table):
+    chunk = pd.DataFrame({
+        "kategori": ["Kontorbygning", "Kontorbygning"],
+        "arsforbruk": ["1 000 000", "1 000 000"],
+        "areal": [5_000, 5_000],
+        "sted": ["Oslo", "Tromsø"],
+        "ar": [2023, 2023],
+    })
+    out = grade_chunk(chunk)
+    assert out["arsforbruk_normalisert"].iloc[0] == 1_077_500
+    assert out["new_label_normalisert"].iloc[0] == assess("Kontorbygning", 1_077_500, 5_000).new_label
+    assert pd.isna(out["new_label_normalisert"].iloc[1])
@@ -0,0 +1,46 @@
+# tests/test_diagnostics.py
+# Profilering pr. rerun (energisjekk.diagnostics): samtidige sesjoner med profilering på skal
+# ikke feile, bare den første profileres.
+import threading
+
+from energisjekk.diagnostics import Diagnostics
+
+
+def test_concurrent_profiling_is_skipped(tmp_path):
+    first = Diagnostics(True, str(tmp_path))
+    second = Diagnostics(True, str(tmp_path))
+    first.start()
+    second.start()  # ville gitt ValueError på Python 3.12 uten den delte låsen
+    assert not first.profile_busy
+    assert second.profile_busy
+    assert second.stop() is None
+    path = first.stop()
+    assert path is not None and path.exists()
+
+    third = Diagnostics(True, str(tmp_path))
+    third.start()
+    assert not third.profile_busy
+    assert third.stop().exists()
+
+
+def test_abandoned_profiler_is_released(tmp_path):
+    # En rerun som avbrytes (f.eks. st.rerun) kaller aldri stop(); tråden er da ferdig
+    abandoned = Diagnostics(True, str(tmp_path))
+    t = threading.Thread(target=abandoned.start)
+    t.start()
+    t.join()
+
+    diag = Diagnostics(True, str(tmp_path))
+    diag.start()
+    assert not diag.profile_busy
+    assert diag.stop().exists()
+
+
+def test_sections_without_profiling():
+    diag = Diagnostics(True)
+    diag.start()
+    with diag.section("a"):
+        pass
+    assert diag.stop() is None
+    assert not diag.profile_busy
+    assert [name for name, _, _ in diag.rows()] == ["a"]
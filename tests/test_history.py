@@ -0,0 +1,112 @@
+# tests/test_history.py
+# Byggregister med historikk (energisjekk.history) i en midlertidig SQLite-fil: lagrede
+# resultater er de samme som assess, uendrede inndata skrives ikke, og rader fra en eldre
+# regelversjon regnes om – og bare de.
+import pytest
+
+from energisjekk import history
+from energisjekk.core import GRADES, assess
+
+ROWS = [
+    ("b1", 2021, "Kontorbygning", 600_000, 3_000, False, "Rådhuset"),
+    ("b1", 2022, "Kontorbygning", 540_000, 3_000, False),
+    ("b1", 2023, "Kontorbygning", 450_000, 3_000, True),
+    ("b2", 2022, "Kontorbygning", 2_730_000, 10_766, True),
+    ("s1", 2022, "Skolebygning", 300_000, 2_500, False),
+]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / "historikk.sqlite3")
+    conn = history.connect(path)
+    yield conn
+    history._local.conns.pop(path).close()
+
+
+def _assert_matches_assess(row, kategori, arsforbruk, areal, fjernvarme):
+    a = assess(kategori, arsforbruk, areal, fjernvarme)
+    assert (row.old_label, row.new_label) == (a.old_label, a.new_label)
+    assert row.sp == pytest.approx(a.sp) and row.sp_ny_vektet == pytest.approx(a.sp_ny_vektet)
+    assert row.tek17_diff_pct == pytest.approx(a.tek17.diff_pct)
+
+
+def test_save_year_matches_assess(conn):
+    assert history.save_year(conn, "b1", 2022, "Kontorbygning", 540_000, 3_000, True, navn="Rådhuset")
+    assert not history.save_year(conn, "b1", 2022, "Kontorbygning", 540_000, 3_000, True)  # uendret
+    (row,) = history.building_history(conn, "b1")
+    _assert_matches_assess(row, "Kontorbygning", 540_000, 3_000, True)
+    assert history.save_year(conn, "b1", 2022, "Kontorbygning", 500_000, 3_000, True)
+    assert history.building_history(conn, "b1")[0].arsforbruk == 500_000
+    assert history.find_buildings(conn, "b") == [("b1", "Rådhuset", "Kontorbygning")]
+    with pytest.raises(ValueError):
+        history.save_year(conn, "b1", 2022, "Kontorbygning", 500_000, 0)
+
+
+def test_save_years_matches_save_year(conn, tmp_path):
+    assert history.save_years(conn, ROWS) == len(ROWS)
+    assert history.save_years(conn, ROWS) == 0
+    changed = ROWS[:1] + [("b1", 2022, "Kontorbygning", 560_000, 3_000, False)]
+    assert history.save_years(conn, changed) == 1
+
+    path = str(tmp_path / "enkeltvis.sqlite3")
+    single = history.connect(path)
+    for r in ROWS[:1] + changed[1:] + ROWS[2:]:
+        history.save_year(single, *r[:6])
+    for bygg_id in ("b1", "b2", "s1"):
+        bulk, one = history.building_history(conn, bygg_id), history.building_history(single, bygg_id)
+        assert [r.ar for r in bulk] == sorted(r.ar for r in bulk)
+        assert len(bulk) == len(one)
+        for b, s in zip(bulk, one):
+            _assert_matches_assess(b, b.kategori, b.arsforbruk, b.areal, b.fjernvarme)
+            # Samlet karaktersetting (grade_portfolio) gir samme rader som én og én (assess)
+            assert (b.ar, b.old_label, b.new_label, b.fjernvarme) == (s.ar, s.old_label, s.new_label, s.fjernvarme)
+            assert (b.sp, b.sp_ny_vektet) == pytest.approx((s.sp, s.sp_ny_vektet))
+    history._local.conns.pop(path).close()
+
+
+def test_regrade_stale_after_rule_change(conn, monkeypatch):
+    history.save_years(conn, ROWS)
+    # Simuler resultater fra en eldre regelversjon: feil karakter og et annet regelverk på to rader
+    conn.execute("UPDATE arsdata SET new_label = 'G', old_label = 'G', regelverk = 1 WHERE bygg_id = 'b1' AND ar < 2023")
+    conn.commit()
+    assert history.regrade_stale(conn) == 2
+    for row in history.building_history(conn, "b1"):
+        _assert_matches_assess(row, row.kategori, row.arsforbruk, row.areal, row.fjernvarme)
+    assert history.regrade_stale(conn) == 0
+
+    # Nye regler: alle rader er utdaterte, og save_year/save_years skriver dem på nytt
+    monkeypatch.setattr(history, "RULES_VERSION", history.RULES_VERSION + 1)
+    assert history.save_year(conn, *ROWS[1][:6])
+    assert history.save_years(conn, ROWS[3:]) == 2
+    assert history.regrade_stale(conn) == 2
+    assert {v for (v,) in conn.execute("SELECT regelverk FROM arsdata")} == {history.RULES_VERSION}
+
+
+def test_category_trend(conn):
+    history.save_years(conn, ROWS)
+    trend = history.category_trend(conn, "Kontorbygning")
+    assert [t.ar for t in trend] == [2021, 2022, 2023]
+    t2022 = trend[1]
+    assert t2022.bygg == 2
+    assert t2022.sp_snitt == pytest.approx((540_000 / 3_000 + 2_730_000 / 10_766) / 2)
+    expected = dict.fromkeys(GRADES, 0)
+    for kategori, e, m, f in (("Kontorbygning", 540_000, 3_000, False), ("Kontorbygning", 2_730_000, 10_766, True)):
+        expected[assess(kategori, e, m, f).new_label] += 1
+    assert t2022.new_counts == expected
+    assert sum(t2022.old_counts.values()) == 2
+    assert history.category_trend(conn, "Sykehus") == []
+
+
+def test_trend_data_and_delete(conn):
+    history.save_years(conn, ROWS)
+    ar, sp, old, new = history.trend_data(history.building_history(conn, "b1"))
+    assert ar == [2021, 2022, 2023]
+    assert sp == pytest.approx([200, 180, 150])
+    assert new[-1] == GRADES.index(assess("Kontorbygning", 450_000, 3_000, True).new_label)
+    history.delete_year(conn, "b1", 2022)
+    assert [r.ar for r in history.building_history(conn, "b1")] == [2021, 2023]
+
+
+def test_connect_without_create(tmp_path):
+    assert history.connect(str(tmp_path / "finnes-ikke.sqlite3"), create=False) is None
@@ -0,0 +1,42 @@
+# tests/test_importer.py
+# Porteføljeimporten (energisjekk.importer): fjernvarme-kolonnen tolkes likt enten den kommer
+# som tekst fra CSV eller som tall fra Excel, og resultatet beholder brukerens kolonner.
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energisjekk.core import assess
+from energisjekk.importer import grade_chunk, iter_chunks, parse_flags
+
+
+@pytest.mark.parametrize("col, expected", [
+    (pd.Series([1.0, np.nan, 0.0]), [True, False, False]),
+    (pd.Series(["ja", "", "1", "1,0", "0", "nei", None], dtype="str"), [True, False, True, True, False, False, False]),
+    (pd.Series([1, "x", "", None, 0, "J"], dtype=object), [True, True, False, False, False, True]),
+    (pd.Series([True, False]), [True, False]),
+], ids=["float", "tekst", "blandet", "bool"])
+def test_parse_flags(col, expected):
+    assert parse_flags(col).tolist() == expected
+
+
+def test_excel_float_flag_column():
+    # 1 og tomme celler i Excel leses som float64 (1.0 / NaN)
+    buf = io.BytesIO()
+    pd.DataFrame({
+        "Kategori": ["Kontorbygning", "Kontorbygning"],
+        "Årsforbruk": [100_000, 100_000],
+        "Areal": [1_000, 1_000],
+        "Fjernvarme": [1, None],
+    }).to_excel(buf, index=False)
+    buf.seek(0)
+    chunk = next(iter_chunks(buf, "portefolje.xlsx"))
+    assert chunk["Fjernvarme"].dtype.kind == "f"
+    out = grade_chunk(chunk)
+    assert out["new_label"].tolist() == [
+        assess("Kontorbygning", 100_000, 1_000, True).new_label,
+        assess("Kontorbygning", 100_000, 1_000, False).new_label,
+    ]
+    assert out["new_label"][0] != out["new_label"][1]
+    assert list(out.columns[:4]) == ["Kategori", "Årsforbruk", "Areal", "Fjernvarme"]
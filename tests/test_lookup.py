@@ -0,0 +1,36 @@
+# tests/test_lookup.py
+# De tette oppslagstabellene (energisjekk.core.lookup) skal gi nøyaktig samme karakter og
+# nødvendig reduksjon som bisect-varianten (energy_label / improvement_to_better_grade) for alle
+# kategorier over 0–2000 kWh/m², inkludert eksakte grenser og verdier like ved.
+import pytest
+
+from energisjekk.core import (
+    CATEGORIES, GRADES, NEW_TABLES, NEW_THRESH, OLD_TABLES, OLD_THRESH,
+    energy_label, improvement_to_better_grade,
+)
+
+MAX_SP = 2000
+STEP = 0.25
+GRID = [i * STEP for i in range(int(MAX_SP / STEP) + 1)]
+
+
+@pytest.mark.parametrize("thresh, tables", [(OLD_THRESH, OLD_TABLES), (NEW_THRESH, NEW_TABLES)], ids=["gammel", "ny"])
+@pytest.mark.parametrize("kategori", CATEGORIES)
+def test_dense_table_matches_bisect(thresh, tables, kategori):
+    table = tables[kategori]
+    edges = [t + d for t in table.limits for d in (-1e-9, 0.0, 1e-9)]
+    for sp in GRID + edges:
+        label = energy_label(sp, thresh[kategori])
+        assert table.label(sp) == label, (sp, label, table.label(sp))
+        better, dk_m2, _, _ = improvement_to_better_grade(sp, kategori, thresh, label, 1.0)
+        if better is not None:
+            assert table.needed(sp, GRADES.index(better)) == dk_m2, sp
+            assert table.ladder(sp)[0] == (better, dk_m2), sp
+
+
+@pytest.mark.parametrize("tables", [OLD_TABLES, NEW_TABLES])
+def test_out_of_range_values(tables):
+    table = tables[CATEGORIES[0]]
+    assert table.label(-5.0) == "A"
+    assert table.label(float("nan")) == "G"
+    assert table.label(table.limits[-1] * 10) == "G"
@@ -0,0 +1,59 @@
+# tests/test_montecarlo.py
+# Monte Carlo-simuleringen (energisjekk.montecarlo) mot håndregnede verdier: uten tiltak er alt
+# på dagens karakter, og ett tiltak gir forventet besparelse = andel av formålene x midtpunktet.
+import numpy as np
+import pytest
+
+from energisjekk.core import CATEGORIES, GRADES, assess
+from energisjekk.core.data import CORRECTED_SHARES, FORMAL_ORDER
+from energisjekk.core.tiltak import SAVINGS
+from energisjekk.montecarlo import draws, effective_measures, simulate
+
+LED = "💡 LED-belysning"
+VARMEPUMPE = "❄️🔥 Varmepumpe"
+
+
+@pytest.mark.parametrize("kategori", CATEGORIES)
+@pytest.mark.parametrize("fjernvarme", [False, True])
+def test_no_measures_gives_current_grade(kategori, fjernvarme):
+    a = assess(kategori, 500_000, 3_000, fjernvarme)
+    sim = simulate(kategori, 500_000, 3_000, [], fjernvarme, samples=100)
+    assert sim.old_prob[GRADES.index(a.old_label)] == 1.0
+    assert sim.new_prob[GRADES.index(a.new_label)] == 1.0
+    assert sim.percentiles[50] == pytest.approx(500_000)
+
+
+@pytest.mark.parametrize("measure", [LED, VARMEPUMPE])
+def test_single_measure_expected_saving(measure):
+    kategori = "Kontorbygning"
+    r = SAVINGS[measure]
+    shares = CORRECTED_SHARES[kategori]
+    andel = sum(shares[e] for e in r.end_uses) / sum(shares[e] for e in FORMAL_ORDER)
+    total, _ = draws(kategori, [measure])
+    # Uniform besparelse i [low, high] på formålene: forventet restandel 1 - andel * midtpunkt
+    assert total.mean() == pytest.approx(1 - andel * (r.low + r.high) / 2, abs=2e-3)
+    assert total.min() >= 1 - andel * r.high - 1e-12
+    assert total.max() <= 1 - andel * r.low + 1e-12
+
+
+def test_measures_on_same_end_use_multiply():
+    # To tiltak på oppvarming: restoppvarming = (1 - s1)(1 - s2) for hvert trekk, innenfor grensene
+    a, b = SAVINGS[VARMEPUMPE], SAVINGS["🧱 Etterisolering tak/vegger"]
+    _, heat = draws("Kontorbygning", [VARMEPUMPE, "🧱 Etterisolering tak/vegger"])
+    assert heat.min() >= (1 - a.high) * (1 - b.high) - 1e-12
+    assert heat.max() <= (1 - a.low) * (1 - b.low) + 1e-12
+    assert heat.mean() == pytest.approx((1 - (a.low + a.high) / 2) * (1 - (b.low + b.high) / 2), abs=2e-3)
+
+
+def test_probabilities_and_determinism():
+    sim = simulate("Kontorbygning", 500_000, 3_000, [LED, VARMEPUMPE, "☀️ Solceller"], True)
+    again = simulate("Kontorbygning", 500_000, 3_000, [VARMEPUMPE, LED], True)
+    assert sim.measures == effective_measures([LED, VARMEPUMPE]) == again.measures  # solceller uten effekt
+    np.testing.assert_array_equal(sim.kwh, again.kwh)
+    assert sim.old_prob.sum() == pytest.approx(1) and sim.new_prob.sum() == pytest.approx(1)
+    assert np.all(np.diff(sim.new_reach) >= 0) and sim.new_reach[-1] == pytest.approx(1)
+    p = sim.percentiles
+    assert p[5] <= p[25] <= p[50] <= p[75] <= p[95] < 500_000
+    # Ingen trekk skal gi dårligere karakter enn uten tiltak
+    a = assess("Kontorbygning", 500_000, 3_000, True)
+    assert sim.new_prob[GRADES.index(a.new_label) + 1:].sum() == 0
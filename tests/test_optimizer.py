@@ -0,0 +1,91 @@
+# tests/test_optimizer.py
+# Minste tiltakspakke (energisjekk.optimizer) mot uttømmende søk over alle delmengder av små
+# tiltakssett. Restandelen regnes her uavhengig av optimizer._Model.
+import itertools
+
+import numpy as np
+import pytest
+
+from energisjekk.core import GRADES, NEW_THRESH, heating_share
+from energisjekk.core.data import CORRECTED_SHARES, FJERNVARME_FAKTOR, FORMAL_ORDER
+from energisjekk.core.tiltak import SAVINGS
+from energisjekk.optimizer import frontier, minimum_measures, minimum_measures_portfolio
+
+EFFECTIVE = [m for m, r in SAVINGS.items() if r is not None]
+# Små sett (2^8 delmengder) med overlappende formål, så rekkefølge og multiplikasjon betyr noe
+SETS = [tuple(np.random.default_rng(seed).choice(EFFECTIVE, 8, replace=False)) for seed in range(4)]
+CASES = [("Kontorbygning", False), ("Kontorbygning", True), ("Sykehus", True), ("Skolebygning", False)]
+
+
+def _value(kategori, fjernvarme, chosen, weighted=True):
+    # Vektet (som weighted_sp) eller uvektet restandel av levert energi etter tiltakene
+    shares = CORRECTED_SHARES[kategori]
+    total = sum(shares[e] for e in FORMAL_ORDER)
+    rest = {e: 1.0 for e in FORMAL_ORDER}
+    for m in chosen:
+        r = SAVINGS[m]
+        for e in r.end_uses:
+            rest[e] *= 1 - (r.low + r.high) / 2
+    value = sum(shares[e] / total * rest[e] for e in FORMAL_ORDER)
+    if weighted and fjernvarme:
+        value -= heating_share(kategori) * (1 - FJERNVARME_FAKTOR) * rest["Oppvarming"]
+    return value
+
+
+def _subsets(measures):
+    for k in range(len(measures) + 1):
+        yield from itertools.combinations(measures, k)
+
+
+@pytest.mark.parametrize("kategori, fjernvarme", CASES)
+@pytest.mark.parametrize("measures", SETS, ids=[f"sett{i}" for i in range(len(SETS))])
+def test_frontier_matches_brute_force(kategori, fjernvarme, measures):
+    model, values, sets = frontier(kategori, fjernvarme, measures)
+    best = {}
+    for s in _subsets(measures):
+        best[len(s)] = min(best.get(len(s), np.inf), _value(kategori, fjernvarme, s))
+    for k, value in enumerate(values):
+        assert value == pytest.approx(min(best[j] for j in range(k + 1)))
+        chosen = [model.measures[i] for i in sets[k]]
+        assert len(chosen) <= k
+        assert _value(kategori, fjernvarme, chosen) == pytest.approx(value)
+    # Frontieren stopper først når flere tiltak ikke hjelper
+    assert values[-1] == pytest.approx(min(best.values()))
+
+
+@pytest.mark.parametrize("kategori, fjernvarme", CASES)
+@pytest.mark.parametrize("measures", SETS[:2], ids=["sett0", "sett1"])
+@pytest.mark.parametrize("target", GRADES[:-1])
+def test_minimum_and_cheapest_match_brute_force(kategori, fjernvarme, measures, target):
+    arsforbruk, areal = 900_000, 3_000
+    ratio = NEW_THRESH[kategori][target] / (arsforbruk / areal)
+    ok = [s for s in _subsets(measures) if _value(kategori, fjernvarme, s) <= ratio + 1e-12]
+
+    plan = minimum_measures(kategori, arsforbruk, areal, target, fjernvarme, measures=measures)
+    assert plan.reached == bool(ok)
+    if ok:
+        assert len(plan.measures) == min(len(s) for s in ok)
+        assert GRADES.index(plan.expected_label) <= GRADES.index(target)
+    assert plan.expected_kwh == pytest.approx(arsforbruk * _value(kategori, fjernvarme, plan.measures, weighted=False))
+
+    costs = {m: float(c) for m, c in zip(measures, [70, 20, 35, 90, 10, 55, 40, 25])}
+    cheap = minimum_measures(kategori, arsforbruk, areal, target, fjernvarme, costs=costs, measures=measures)
+    assert cheap.reached == bool(ok)
+    if ok:
+        assert cheap.cost == pytest.approx(min(sum(costs[m] for m in s) for s in ok))
+        assert _value(kategori, fjernvarme, cheap.measures) <= ratio + 1e-12
+
+
+def test_portfolio_matches_single():
+    kategori = np.array(["Kontorbygning", "Sykehus", "Kontorbygning", "Ukjent"])
+    arsforbruk = np.array([900_000, 1_500_000, 300_000, 800_000], dtype=float)
+    areal = np.array([3_000, 4_000, 3_000, 2_000], dtype=float)
+    fjernvarme = np.array([False, True, True, False])
+    res = minimum_measures_portfolio(kategori, arsforbruk, areal, "C", fjernvarme)
+    for i in range(len(kategori)):
+        plan = minimum_measures(str(kategori[i]), arsforbruk[i], areal[i], "C", bool(fjernvarme[i]))
+        if plan.reached:
+            assert res["n_tiltak"][i] == len(plan.measures)
+            assert res["forventet_kwh"][i] == pytest.approx(plan.expected_kwh)
+        else:
+            assert res["n_tiltak"][i] == -1
@@ -0,0 +1,70 @@
+# tests/test_portfolio.py
+# Vektorisert karaktersetting (energisjekk.portfolio.grade_portfolio) skal gi samme resultat
+# som assess pr. bygg – også nøyaktig på og rett ved hver karaktergrense, og for
+# TEK17-sammenligningen for kategorier som ikke finnes.
+import math
+
+import numpy as np
+import pytest
+
+from energisjekk.core import CATEGORIES, GRADES, NEW_THRESH, OLD_THRESH, assess
+from energisjekk.core.data import FJERNVARME_FAKTOR, SHARES
+from energisjekk.portfolio import grade_portfolio
+
+
+@pytest.mark.parametrize("kategori", CATEGORIES + ("Ukjent kategori", ""))
+@pytest.mark.parametrize("fjernvarme", [False, True])
+def test_matches_assess(kategori, fjernvarme):
+    a = assess(kategori, 150_000, 1_000, fjernvarme)
+    res = grade_portfolio([kategori], [150_000], [1_000], fjernvarme)
+    assert res["old_label"][0] == a.old_label
+    assert res["new_label"][0] == a.new_label
+    assert res["sp_ny_vektet"][0] == pytest.approx(a.sp_ny_vektet)
+    if a.tek17.ref is None:
+        assert math.isnan(res["tek17_ref"][0])
+    else:
+        assert res["tek17_ref"][0] == a.tek17.ref
+    assert res["tek17_diff"][0] == pytest.approx(a.tek17.diff)
+    assert res["tek17_diff_pct"][0] == pytest.approx(a.tek17.diff_pct)
+
+
+def _around(limit: float):
+    # Grensen selv og nærmeste flyttall på hver side
+    return [np.nextafter(limit, -np.inf), limit, np.nextafter(limit, np.inf)]
+
+
+@pytest.mark.parametrize("kategori", CATEGORIES)
+def test_grade_limits_match_assess(kategori):
+    # Uten fjernvarme er sp_ny_vektet = sp: areal 1 gir sp nøyaktig lik årsforbruket
+    limits = [NEW_THRESH[kategori][g] for g in GRADES[:-1]] + [OLD_THRESH[kategori][g] for g in GRADES[:-1]]
+    sp = np.array([v for limit in limits for v in _around(float(limit))])
+    res = grade_portfolio(np.full(len(sp), kategori), sp, np.ones(len(sp)))
+    for i, v in enumerate(sp):
+        a = assess(kategori, float(v), 1.0)
+        assert (res["old_label"][i], res["new_label"][i]) == (a.old_label, a.new_label), v
+
+
+@pytest.mark.parametrize("kategori", CATEGORIES)
+def test_weighted_limits_match_assess(kategori):
+    # Med fjernvarme: sp valgt slik at sp_ny_vektet havner på (eller rett ved) hver ny grense
+    share = SHARES[kategori]["Oppvarming"] / 100.0
+    factor = 1 - share + share * FJERNVARME_FAKTOR
+    sp = np.array([v for g in GRADES[:-1] for v in _around(NEW_THRESH[kategori][g] / factor)])
+    res = grade_portfolio(np.full(len(sp), kategori), sp, np.ones(len(sp)), True)
+    for i, v in enumerate(sp):
+        assert res["new_label"][i] == assess(kategori, float(v), 1.0, True).new_label, v
+
+
+def test_random_portfolio_matches_assess():
+    rng = np.random.default_rng(7)
+    n = 20_000
+    kategori = np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), n)]
+    areal = rng.integers(200, 20_000, n).astype(float)
+    arsforbruk = np.round(areal * rng.uniform(40, 600, n), -4)
+    fjernvarme = rng.random(n) < 0.5
+    # Kjent grensetilfelle som tidligere ga C i stedet for D
+    kategori[0], arsforbruk[0], areal[0], fjernvarme[0] = "Hotellbygning", 2_730_000, 10_766, True
+    res = grade_portfolio(kategori, arsforbruk, areal, fjernvarme)
+    for i in range(n):
+        a = assess(str(kategori[i]), arsforbruk[i], areal[i], bool(fjernvarme[i]))
+        assert (res["old_label"][i], res["new_label"][i]) == (a.old_label, a.new_label), i
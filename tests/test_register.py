@@ -0,0 +1,92 @@
+# tests/test_register.py
+# Energimerkeregisteret (energisjekk.register) bygget fra en liten dump: antall, persentiler,
+# kvantiler og karakterfordelinger mot håndregnede verdier, og oppslag på adresse/matrikkel.
+import io
+
+import numpy as np
+import pytest
+
+from energisjekk import register
+from energisjekk.register import build, open_register
+
+DUMP = """\
+Bygningskategori;Levert energi kWh/m2;Energikarakter;Adresse;Postnummer;Poststed;Kommunenummer;Gårdsnummer;Bruksnummer
+Kontorbygg;300;G;Storgata 1 A;0155;Oslo;301;208;1
+Kontorbygg;100;C;Kirkeveien 5;0368;Oslo;301;30;12
+Kontorbygning;150,0;D;Storgata 1A;0155;Oslo;301;208;1
+Småhus;120;C;Granveien 2;1400;Ski;3207;1;1
+Kontorbygg;200;;Havnegata 9;7010;Trondheim;5001;400;3
+Kontorbygg;150;d;Parkveien 3;5007;Bergen;4601;160;40
+Skolebygg;0;A;Skoleveien 1;0001;Oslo;301;1;1
+Skolebygg;95;B;Skoleveien 2;0001;Oslo;301;1;2
+"""
+
+
+@pytest.fixture(scope="module")
+def reg(tmp_path_factory):
+    out = str(tmp_path_factory.mktemp("register") / "energimerker")
+    # Små biter, så lageret settes sammen på tvers av bitene
+    meta = build(io.BytesIO(DUMP.encode("utf-8")), "energimerker.csv", out, chunksize=3)
+    assert meta["rows"] == 6 and meta["skipped"] == 2  # småhus og sp = 0
+    return open_register(out)
+
+
+def test_counts_and_sorting(reg):
+    assert reg.rows == 6
+    assert reg.count("Kontorbygning") == 5
+    assert reg.count("Skolebygning") == 1
+    assert reg.count("Sykehus") == 0
+    assert list(reg.sp[reg._slice("Kontorbygning")]) == [100, 150, 150, 200, 300]
+
+
+@pytest.mark.parametrize("sp, expected", [
+    (50, 0), (100, 20), (149.9, 20), (150, 60), (250, 80), (300, 100), (1_000, 100),
+])
+def test_percentile(reg, sp, expected):
+    # Andel av 100, 150, 150, 200, 300 som er <= sp
+    assert reg.percentile("Kontorbygning", sp) == pytest.approx(expected)
+
+
+def test_percentile_empty_category(reg):
+    assert np.isnan(reg.percentile("Sykehus", 100))
+    assert reg.quantiles("Sykehus") == {}
+
+
+def test_quantiles(reg):
+    # Indeks int(q/100 * 5) i den sorterte vektoren
+    assert reg.quantiles("Kontorbygning") == {10: 100, 25: 150, 50: 150, 75: 200, 90: 300}
+
+
+def test_grade_counts(reg):
+    # Karakter fra attesten (tom karakter telles ikke) og ny ordning med grensene 75/90/140/190/235/285
+    assert reg.grade_counts("Kontorbygning") == {"A": 0, "B": 0, "C": 1, "D": 2, "E": 0, "F": 0, "G": 1}
+    assert reg.new_grade_counts("Kontorbygning") == {"A": 0, "B": 0, "C": 1, "D": 2, "E": 1, "F": 0, "G": 1}
+    assert reg.grade_counts("Skolebygning")["B"] == 1
+
+
+def test_lookup(reg):
+    # "Storgata 1 A" og "Storgata 1A" er samme adresse; to attester
+    matches = reg.lookup("storgata 1a")
+    assert sorted(m.sp for m in matches) == [150, 300]
+    assert {m.karakter for m in matches} == {"D", "G"}
+    assert all(m.label.startswith("Storgata 1") and "(0301-208/1)" in m.label for m in matches)
+    assert {m.percentile for m in matches} == {60, 100}
+    assert [m.sp for m in reg.lookup("0301-30/12")] == [100]
+    assert reg.lookup("Havnegata 9")[0].karakter is None
+    assert reg.lookup("Finnes ikke 1") == []
+
+
+def test_open_register_not_configured(monkeypatch, tmp_path):
+    monkeypatch.delenv("ENERGISJEKK_REGISTER", raising=False)
+    assert open_register() is None
+    assert open_register(str(tmp_path / "mangler")) is None
+
+
+def test_rebuild_is_picked_up(tmp_path):
+    out = str(tmp_path / "energimerker")
+    build(io.BytesIO(DUMP.encode("utf-8")), "energimerker.csv", out)
+    first = open_register(out)
+    register._open.cache_clear()  # mtime kan være lik innenfor samme sekund på enkelte filsystemer
+    build(io.BytesIO(DUMP.split("Småhus")[0].encode("utf-8")), "energimerker.csv", out)
+    second = open_register(out)
+    assert first.count("Kontorbygning") == 5 and second.count("Kontorbygning") == 3
@@ -0,0 +1,68 @@
+# tests/test_results.py
+# Permalenker og resultatcache (energisjekk.results): URL-parametere tilbake til samme inndata,
+# ugyldige verdier hoppes over, og samme kanoniske inndata gir samme delte Result.
+import pytest
+
+from energisjekk import results
+from energisjekk.cache import LRUCache
+from energisjekk.core import CATEGORIES, assess
+from energisjekk.results import Inputs, from_query, result, to_query
+
+
+@pytest.mark.parametrize("inputs", [
+    Inputs("Sykehus", 900_000, 3_000, True),
+    Inputs("Kontorbygning", 0, 1, False),
+    Inputs("Lett industribygning, verksted", 2_730_000, 10_766, False),
+], ids=["sykehus", "minimum", "komma-i-navn"])
+def test_query_round_trip(inputs):
+    assert Inputs(**from_query(to_query(inputs))) == inputs
+
+
+@pytest.mark.parametrize("params, expected", [
+    ({"kategori": "Ukjent", "arsforbruk": "500000"}, {"arsforbruk": 500_000}),
+    ({"arsforbruk": "2 730 000", "areal": "3000,7"}, {"arsforbruk": 2_730_000, "areal": 3_000}),
+    ({"arsforbruk": "-5", "areal": "0"}, {}),
+    ({"arsforbruk": "inf", "areal": "nan"}, {}),
+    ({"arsforbruk": "mye", "areal": ""}, {}),
+    ({"fjernvarme": " JA "}, {"fjernvarme": True}),
+    ({"fjernvarme": "0"}, {"fjernvarme": False}),
+], ids=["ukjent-kategori", "mellomrom-komma", "under-minimum", "ikke-endelig", "tekst", "ja", "nei"])
+def test_from_query_skips_invalid(params, expected):
+    assert from_query(params) == expected
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fresh = LRUCache(maxsize=2)
+    monkeypatch.setattr(results, "RESULTS", fresh)
+    return fresh
+
+
+def test_result_is_shared_and_correct(cache):
+    inputs = Inputs("Kontorbygning", 500_000, 3_000, True)
+    res = result(inputs, "vega")
+    assert res.assessment == assess("Kontorbygning", 500_000, 3_000, True)
+    assert res.fjernvarme_text is not None and "0,45" in res.fjernvarme_text
+    # Lik tuppel fra en annen sesjon (f.eks. via URL-en) gir samme objekt
+    again = result(Inputs(**from_query(to_query(inputs))), "vega")
+    assert again is res
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_result_cache_keys_and_eviction(cache):
+    a = result(Inputs("Kontorbygning", 500_000, 3_000, False), "vega")
+    assert a.fjernvarme_text is None
+    b = result(Inputs("Kontorbygning", 500_000, 3_000, True), "vega")
+    assert b is not a and b.assessment.new_label == assess("Kontorbygning", 500_000, 3_000, True).new_label
+    result(Inputs(CATEGORIES[0], 100_000, 1_000, False), "vega")
+    assert cache.stats()["evictions"] == 1
+    # a var eldst og er kastet ut; ny beregning gir likt, men nytt, objekt
+    a2 = result(Inputs("Kontorbygning", 500_000, 3_000, False), "vega")
+    assert a2 is not a and a2.assessment == a.assessment
+
+
+def test_improve_text():
+    best = results._improve_text(assess("Kontorbygning", 10_000, 3_000))
+    assert "allerede beste" in best
+    text = results._improve_text(assess("Kontorbygning", 900_000, 3_000))
+    assert "kWh/m²" in text and "<b>" in text
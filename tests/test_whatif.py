@@ -0,0 +1,68 @@
+# tests/test_whatif.py
+# Hva-om-analysen (energisjekk.whatif) mot de skalare reglene: dagens karakter i alle fire
+# varianter, og at nødvendig reduksjon til hver bedre karakter faktisk gir karakteren – og at
+# litt mindre ikke gjør det. "Gammel ordning (fjernvarme)" er en tenkt variant med vektingen
+# fra ny ordning, så karakterene regnes med energy_label(weighted_sp(...)) og ikke assess.
+import numpy as np
+import pytest
+
+from energisjekk.core import CATEGORIES, GRADES, NEW_THRESH, OLD_THRESH, assess, energy_label
+from energisjekk.core.grading import thresholds_for, weighted_sp
+from energisjekk.whatif import REDUCTIONS, VARIANTS, ladder_rows, what_if
+
+BUILDINGS = [(500_000, 3_000), (2_730_000, 10_766), (90_000, 1_000), (1_000_000, 2_000)]
+
+
+def _grade(kategori, arsforbruk, areal, ordning, fjernvarme):
+    thresholds = thresholds_for(kategori, OLD_THRESH if ordning == "Gammel" else NEW_THRESH)
+    return GRADES.index(energy_label(weighted_sp(arsforbruk / areal, kategori, fjernvarme), thresholds))
+
+
+@pytest.mark.parametrize("kategori", CATEGORIES)
+@pytest.mark.parametrize("arsforbruk, areal", BUILDINGS)
+def test_current_grade_matches_rules(kategori, arsforbruk, areal):
+    res = what_if(kategori, arsforbruk, areal)
+    for v, (ordning, fjernvarme) in enumerate(VARIANTS):
+        assert res.current[v] == _grade(kategori, arsforbruk, areal, ordning, fjernvarme)
+    # De tre variantene som finnes i assess
+    a, a_fjv = assess(kategori, arsforbruk, areal), assess(kategori, arsforbruk, areal, True)
+    assert res.current[VARIANTS.index(("Gammel", False))] == GRADES.index(a.old_label)
+    assert res.current[VARIANTS.index(("Ny", False))] == GRADES.index(a.new_label)
+    assert res.current[VARIANTS.index(("Ny", True))] == GRADES.index(a_fjv.new_label)
+    for v in range(len(VARIANTS)):
+        assert np.all(np.diff(res.curve[v]) <= 0)  # mer reduksjon gir aldri dårligere karakter
+
+
+@pytest.mark.parametrize("kategori", CATEGORIES)
+@pytest.mark.parametrize("arsforbruk, areal", BUILDINGS)
+def test_needed_reduction_reaches_grade(kategori, arsforbruk, areal):
+    res = what_if(kategori, arsforbruk, areal)
+    for v, (ordning, fjernvarme) in enumerate(VARIANTS):
+        for j in range(len(GRADES) - 1):
+            needed = res.needed_kwh_m2[v, j]
+            if j >= res.current[v]:
+                assert np.isnan(needed)
+                continue
+            after = (res.sp - needed) * areal
+            assert _grade(kategori, after * (1 - 1e-12), areal, ordning, fjernvarme) <= j
+            if needed > 0.01:
+                assert _grade(kategori, (res.sp - needed + 0.01) * areal, areal, ordning, fjernvarme) > j
+            assert res.needed_kwh_tot[v, j] == pytest.approx(needed * areal)
+
+
+def test_next_grade_matches_improvement():
+    a = assess("Kontorbygning", 500_000, 3_000)
+    res = what_if("Kontorbygning", 500_000, 3_000)
+    ny = VARIANTS.index(("Ny", False))
+    j = GRADES.index(a.improvement.better_label)
+    assert res.needed_kwh_m2[ny, j] == pytest.approx(a.improvement.needed_kwh_m2)
+    assert res.needed_pct[ny, j] == pytest.approx(a.improvement.needed_pct)
+
+
+def test_ladder_rows():
+    res = what_if("Kontorbygning", 500_000, 3_000)
+    rows = ladder_rows(res)
+    # Én rad pr. karakter som er bedre enn dagens i minst én variant, beste karakter sist
+    assert [g for g, _ in rows] == list(GRADES[:int(res.current.max())][::-1])
+    assert all(len(cells) == len(VARIANTS) for _, cells in rows)
+    assert REDUCTIONS[0] == 0 and REDUCTIONS[-1] == 80